@@ -1,36 +1,86 @@
 import os
-from langchain_google_vertexai import ChatVertexAI
+import asyncio
+import threading
+from types import SimpleNamespace
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.runnables import Runnable
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import StructuredTool
 from typing import Any, Dict, List, Optional, Callable
+from backend.agents.llm_cache import llm_cache
+from backend.agents.rate_limiter import llm_throttle
+from backend.agents.providers import LLM_PROVIDER, create_llm
+from backend.telemetry import observe_llm_call, record_cache_lookup
 
-# Initialize Vertex AI LLM
+# Vertex AI LLM settings
 # Ensure GOOGLE_CLOUD_PROJECT and GOOGLE_CLOUD_LOCATION are set in .env or environment variables
-llm = ChatVertexAI(
-    model_name="gemini-2.5-flash",
-    project=os.getenv("GOOGLE_CLOUD_PROJECT"),
-    location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1"),
-    temperature=0.3
-)
+# (not needed with LLM_PROVIDER=fake)
+LLM_MODEL_NAME = "gemini-2.5-flash"
+LLM_TEMPERATURE = 0.3
+
+_llm: Optional[BaseChatModel] = None
+_llm_overridden = False  # True while _llm comes from set_llm rather than the configured provider
+_llm_lock = threading.Lock()
+
+def get_llm() -> BaseChatModel:
+    """
+    Returns the shared chat model (Vertex AI unless LLM_PROVIDER says otherwise), creating it on first use.
+    Importing the Vertex SDK and building the client is the slowest part of startup, so it is
+    deferred until an agent actually needs the LLM (or `warm_up` is called).
+    """
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = create_llm(LLM_PROVIDER, LLM_MODEL_NAME, LLM_TEMPERATURE)
+    return _llm
+
+def set_llm(model: Optional[BaseChatModel]) -> None:
+    """
+    Replaces the shared chat model (None resets to the configured provider). Takes effect on the
+    next call of every agent without its own model, including agents built before the swap.
+    """
+    global _llm, _llm_overridden
+    with _llm_lock:
+        _llm = model
+        _llm_overridden = model is not None
+
+# Completion size assumed when reserving token quota before a call
+EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", 1024))
+# Most prompts `AIAgent.abatch` submits to the model in one batch call
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", 8))
+
+def total_tokens(response: Any) -> Optional[int]:
+    """Total token count reported by the LLM for a response, when available."""
+    usage = getattr(response, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+def _batch_response(responses: List[Any]) -> Any:
+    # One response-like object for the telemetry of a batch call: joined text and summed token usage
+    usages = [getattr(response, "usage_metadata", None) for response in responses]
+    usage = {
+        key: sum(item[key] for item in usages) for key in ("input_tokens", "output_tokens", "total_tokens")
+    } if usages and all(usages) else None
+    return SimpleNamespace(content="".join(response_text(response) for response in responses), usage_metadata=usage)
+
+def response_text(response: Any) -> str:
+    """Extracts the text content from an LLM response (AIMessage, dict or plain value)."""
+    if hasattr(response, "content"):
+        return response.content
+    if isinstance(response, dict) and "content" in response:
+        return response["content"]
+    return str(response)
 
 class AIAgent:
-    def __init__(self, name: str, description: str, system_prompt: str, tools: Optional[List[StructuredTool]] = None):
+    def __init__(self, name: str, description: str, system_prompt: str, tools: Optional[List[StructuredTool]] = None,
+                 llm: Optional[BaseChatModel] = None):
         self.name = name
         self.description = description
         self.system_prompt = system_prompt
         self.tools = tools if tools is not None else []
-        self._runnable = self._create_runnable()
-
-    def _create_runnable(self) -> Runnable:
-        """Creates the core LangChain Runnable for the agent."""
-        # Simple agent: LLM with a system prompt. Can be extended with tool usage.
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content="{input}")
-        ])
-
+        # Per-agent model override; by default every agent shares get_llm()
+        self.llm = llm
         if self.tools:
             # For complex agents with tools, you'd use AgentExecutor or a custom tool-calling chain
             # This is a simplified example. For real tool usage, consider:
@@ -41,17 +91,134 @@ class AIAgent:
             # For now, we'll just expose a placeholder. LLM can "decide" based on prompt.
             tool_names = ", ".join([tool.name for tool in self.tools])
             self.system_prompt += f"\n\nAvailable tools: {tool_names}. If needed, you can indicate which tool you'd use."
-            prompt = ChatPromptTemplate.from_messages([
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content="{input}")
-            ])
+        # Built on first use and again whenever the shared model is swapped; see get_runnable
+        self._runnable: Optional[Runnable] = None
+        self._runnable_model: Optional[BaseChatModel] = None
+        self._runnable_lock = threading.Lock()
 
-
-        return prompt | llm
+    def _create_runnable(self, model: BaseChatModel) -> Runnable:
+        """Creates the core LangChain Runnable for the agent."""
+        # Simple agent: LLM with a system prompt. Can be extended with tool usage.
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessage(content=self.system_prompt),
+            ("human", "{input}")
+        ])
+        return prompt | model
 
     def get_runnable(self) -> Runnable:
+        model = self.llm or get_llm()
+        if self._runnable is None or self._runnable_model is not model:
+            with self._runnable_lock:
+                if self._runnable is None or self._runnable_model is not model:
+                    self._runnable = self._create_runnable(model)
+                    self._runnable_model = model
         return self._runnable
 
+    def _cache_key(self, input_text: str) -> str:
+        # Keyed on the model get_runnable calls. The configured provider is identified by its
+        # settings rather than through get_llm(), so a cache hit never builds the client.
+        model = self.llm or (_llm if _llm_overridden else None)
+        if model is not None:
+            model_name = getattr(model, "model_name", type(model).__name__)
+            temperature = getattr(model, "temperature", None)
+        else:
+            model_name = LLM_MODEL_NAME if LLM_PROVIDER == "vertex" else f"{LLM_PROVIDER}:{LLM_MODEL_NAME}"
+            temperature = LLM_TEMPERATURE
+        return llm_cache.make_key(
+            model_name,
+            temperature,
+            self.system_prompt,
+            input_text,
+        )
+
+    def _estimate_tokens(self, input_text: str) -> int:
+        # ~4 characters per token for the prompt, plus a typical completion size.
+        return (len(self.system_prompt) + len(input_text)) // 4 + EXPECTED_COMPLETION_TOKENS
+
+    def _call_llm(self, input_text: str) -> str:
+        """Sends one prompt to the LLM through the shared quota throttle (no caching)."""
+        estimated = self._estimate_tokens(input_text)
+        with observe_llm_call(self.name, len(self.system_prompt) + len(input_text)) as call:
+            call.response = llm_throttle.call(
+                call.timed(lambda: self.get_runnable().invoke({"input": input_text})), estimated, on_wait=call.add_queue_wait
+            )
+        llm_throttle.record_usage(estimated, total_tokens(call.response))
+        return response_text(call.response)
+
+    async def _acall_llm(self, input_text: str) -> str:
+        if self._runnable is None:
+            # First call builds the LLM client (slow imports); keep that off the event loop.
+            await asyncio.to_thread(self.get_runnable)
+        estimated = self._estimate_tokens(input_text)
+        with observe_llm_call(self.name, len(self.system_prompt) + len(input_text)) as call:
+            call.response = await llm_throttle.acall(
+                call.atimed(lambda: self.get_runnable().ainvoke({"input": input_text})), estimated, on_wait=call.add_queue_wait
+            )
+        llm_throttle.record_usage(estimated, total_tokens(call.response))
+        return response_text(call.response)
+
+    def invoke(self, input_text: str) -> str:
+        """Runs the agent's runnable synchronously and returns the response text."""
+        key = self._cache_key(input_text)
+        cached = llm_cache.get(key)
+        record_cache_lookup(self.name, cached is not None)
+        if cached is not None:
+            return cached
+        content = self._call_llm(input_text)
+        llm_cache.set(key, content)
+        return content
+
+    async def ainvoke(self, input_text: str) -> str:
+        """Async counterpart of `invoke`; awaits the LLM without blocking the event loop."""
+        key = self._cache_key(input_text)
+        cached = await llm_cache.aget(key)
+        record_cache_lookup(self.name, cached is not None)
+        if cached is not None:
+            return cached
+        content = await self._acall_llm(input_text)
+        await llm_cache.aset(key, content)
+        return content
+
+    async def _abatch_llm(self, input_texts: List[str]) -> List[str]:
+        """
+        Sends several prompts through the model's batch API as one throttled call: it holds one
+        concurrency slot and reserves the batch's requests and tokens together (no caching).
+        """
+        if self._runnable is None:
+            await asyncio.to_thread(self.get_runnable)
+        estimated = sum(self._estimate_tokens(text) for text in input_texts)
+        prompt_chars = sum(len(self.system_prompt) + len(text) for text in input_texts)
+        with observe_llm_call(self.name, prompt_chars) as call:
+            responses = await llm_throttle.acall(
+                call.atimed(lambda: self.get_runnable().abatch([{"input": text} for text in input_texts])),
+                estimated, on_wait=call.add_queue_wait, requests=len(input_texts),
+            )
+            call.response = _batch_response(responses)
+        llm_throttle.record_usage(estimated, total_tokens(call.response))
+        return [response_text(response) for response in responses]
+
+    async def abatch(self, input_texts: List[str], batch_size: Optional[int] = None) -> List[str]:
+        """
+        Runs several prompts, returning texts in input order. Cached prompts are answered from the
+        cache; the misses are grouped into batches of at most `batch_size` (default LLM_BATCH_SIZE)
+        and each batch is submitted as one model batch call, see `_abatch_llm`. Batches run
+        concurrently, bounded by the LLM throttle.
+        """
+        keys = [self._cache_key(text) for text in input_texts]
+        results: List[Optional[str]] = await llm_cache.aget_many(keys)
+        for result in results:
+            record_cache_lookup(self.name, result is not None)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            size = max(1, batch_size or LLM_BATCH_SIZE)
+            batches = [missing[start:start + size] for start in range(0, len(missing), size)]
+            responses = await asyncio.gather(*(self._abatch_llm([input_texts[i] for i in batch]) for batch in batches))
+            for batch, contents in zip(batches, responses):
+                for i, content in zip(batch, contents):
+                    results[i] = content
+            await llm_cache.aset_many({keys[i]: results[i] for i in missing})
+        return results
+
     def get_name(self) -> str:
         return self.name
 
@@ -1,5 +1,65 @@
+import re
 from backend.agents.base import AIAgent, file_writer_tool
+from backend.models import BugReport
 from langchain_core.tools import StructuredTool
+from typing import Any, Dict, List, Sequence
+
+# Report field labels as the prompt asks for them -> BugReport field
+_FIELDS = {
+    "title": "title", "description": "description", "steps to reproduce": "steps_to_reproduce",
+    "expected vs. actual results": "expected_vs_actual", "expected vs actual results": "expected_vs_actual",
+    "expected vs. actual": "expected_vs_actual", "environment": "environment",
+    "severity": "severity", "priority": "priority",
+}
+_MULTILINE_FIELDS = {"description", "steps_to_reproduce", "expected_vs_actual"}
+_FIELD_LINE = re.compile(r"^\s*(?:[-*]\s*)?\**\s*([A-Za-z .]+?)\s*:?\s*\**\s*:\s*\**\s*(.*)$")
+_HEADING = re.compile(r"^\s*#{1,6}\s*(.*)$")
+_REPORT_PREFIX = re.compile(r"^(bug(\s+report)?\s*#?\d*\s*[:.-]\s*)", re.IGNORECASE)
+
+
+def parse_bug_reports(markdown: str) -> List[BugReport]:
+    """
+    Bug report records of a generated Markdown reply. A report starts at a heading or a Title
+    field; "**Field:** value" lines (and the lines that follow them) fill its fields. Blocks
+    without any recognised field are skipped.
+    """
+    reports: List[Dict[str, str]] = []
+    current: Dict[str, str] = {}
+    field = None
+
+    def close() -> None:
+        if current.get("title") and len(current) > 1:
+            reports.append(dict(current))
+
+    for line in markdown.splitlines():
+        heading = _HEADING.match(line)
+        match = _FIELD_LINE.match(line)
+        label = _FIELDS.get(match.group(1).strip().lower()) if match else None
+        if heading and not label:
+            close()
+            current, field = {"title": _REPORT_PREFIX.sub("", heading.group(1).strip("* ")).strip()}, None
+        elif label == "title":
+            if len(current) > 1:
+                close()
+                current = {}
+            current["title"], field = match.group(2).strip("* "), "title"
+        elif label:
+            field = label
+            current[field] = match.group(2).strip("* ")
+        elif re.match(r"^\s*([-*_])\1{2,}\s*$", line):
+            field = None  # Horizontal rule between reports
+        elif field in _MULTILINE_FIELDS and line.strip():
+            current[field] = (current[field] + "\n" + line.strip()).strip()
+    close()
+    return [BugReport(**report) for report in reports]
+
+
+def summarize_bug_reports(reports: Sequence[Dict[str, Any]]) -> str:
+    """One line per bug report record (severity, priority, title), for downstream prompts."""
+    return "\n".join(
+        f"- [{report.get('severity') or 'Unknown'} / {report.get('priority') or 'Unknown'}] {report.get('title', '')}"
+        for report in reports
+    )
  
  
 class BugReportGenerationAgent(AIAgent):
@@ -19,19 +79,19 @@ class BugReportGenerationAgent(AIAgent):
             tools=[file_writer_tool]
         )
  
-    def generate_bug_reports(self, raw_issue_logs: str) -> str:
-        """
-        Generates structured Markdown bug reports from raw issue logs.
-        """
-        input_text = (
+    def _build_input(self, raw_issue_logs: str) -> str:
+        return (
             "Transform the following raw issue logs into structured bug reports in Markdown format. "
             "Each report must include Title, Description, Steps to Reproduce, Expected vs. Actual Results, "
             "Environment, Severity, and Priority.\n\n"
             f"Raw Logs:\n{raw_issue_logs}"
         )
  
-        response = self.get_runnable().invoke({"input": input_text})
-        generated_bug_reports = response.content if hasattr(response, "content") else str(response)
+    def generate_bug_reports(self, raw_issue_logs: str) -> str:
+        """
+        Generates structured Markdown bug reports from raw issue logs.
+        """
+        generated_bug_reports = self.invoke(self._build_input(raw_issue_logs))
  
         # Optional: save to file
         # file_writer_tool.run({
@@ -39,4 +99,10 @@ class BugReportGenerationAgent(AIAgent):
         #     "content": generated_bug_reports
         # })
  
-        return generated_bug_reports
\ No newline at end of file
+        return generated_bug_reports
+
+    async def agenerate_bug_reports(self, raw_issue_logs: str) -> str:
+        """
+        Async variant of `generate_bug_reports`.
+        """
+        return await self.ainvoke(self._build_input(raw_issue_logs))
@@ -1,6 +1,12 @@
-from backend.agents.base import AIAgent, file_writer_tool
-from langchain_core.tools import StructuredTool
-from typing import Dict
+import ast
+import asyncio
+from backend.agents.base import AIAgent
+from backend.agents.dependency_index import (
+    DependencyIndex, imported_names, module_name_for, resolve_module, test_case_ids, test_functions
+)
+from backend.agents.diff_analysis import iter_diff_chunks, iter_lines
+from backend.execution.pytest_runner import extract_test_modules
+from typing import Dict, Optional
 
 class ChangeImpactAnalysisAgent(AIAgent):
     def __init__(self):
@@ -15,7 +21,97 @@ class ChangeImpactAnalysisAgent(AIAgent):
             ),
             # tools=[change_impact_analyzer_tool]
         )
-    def analyze_impact(self, code_diffs: str, existing_test_summary: str) -> Dict:
-        # ... logic that uses change_impact_analyzer_tool ...
-        # Returns a dict like {"impact_level": "high", "affected_areas": [...], "recommendations": [...]}
-        pass
\ No newline at end of file
+        # Import graph of the repository under test; opened on first use
+        self.dependency_index = DependencyIndex.from_env()
+
+    def analyze_impact(self, code_diffs: str, automated_scripts: str = "", repository_path: Optional[str] = None) -> Dict:
+        """
+        Determines the tests a diff can reach through the import graph of the repository at
+        `repository_path` (refreshed on every call: files whose size or mtime changed, including
+        new modules and tests anywhere in the checkout, are parsed again), covering both the
+        repository's own tests and the generated tests in `automated_scripts`.
+
+        `affected_tests` lists the generated pytest IDs to run. Tests that import nothing from
+        the repository cannot be ruled out and are always included; they are also listed in
+        `unlinked_tests` and left out of the impact level, which is the share of linked tests the
+        change reaches. It is None when the diff touches files outside the import graph (e.g. CSS,
+        SQL), since their reach is unknown. Without `repository_path` there is no index to measure
+        that share against, so `impact_level` is None and the caller's diff rules decide.
+        """
+        changed_paths = sorted({chunk.path for chunk in iter_diff_chunks(iter_lines(code_diffs))} - {"(unknown)"})
+        changed_modules = {module_name_for(path) for path in changed_paths} - {None}
+
+        known = set(changed_modules)
+        repository_tests: Dict[str, list] = {}
+        if repository_path:
+            self.dependency_index.refresh(repository_path)
+            repository_tests = self.dependency_index.modules(repository_path)
+            known.update(repository_tests)
+            reached = self.dependency_index.reverse_dependencies(repository_path, changed_modules)
+        else:
+            reached = set(changed_modules)
+        unindexed_files = [path for path in changed_paths if module_name_for(path) is None]
+
+        affected_repository_tests = sorted(
+            f"{module}::{test}" for module in reached for test in repository_tests.get(module, [])
+        )
+        generated_tests, affected_tests, unlinked_tests, test_cases = 0, [], [], set()
+        for i, source in enumerate(extract_test_modules(automated_scripts or "")):
+            tree = ast.parse(source)
+            targets = {resolve_module(name, known) for name in imported_names(tree, f"test_generated_{i}", False)} - {None}
+            for name, node in test_functions(tree):
+                generated_tests += 1
+                if not targets:
+                    unlinked_tests.append(f"test_generated_{i}.py::{name}")
+                if not targets or targets & reached:
+                    affected_tests.append(f"test_generated_{i}.py::{name}")
+                    test_cases.update(test_case_ids(node))
+
+        total = generated_tests - len(unlinked_tests) + sum(len(tests) for tests in repository_tests.values())
+        affected = len(affected_tests) - len(unlinked_tests) + len(affected_repository_tests)
+        if not repository_path:
+            impact_level = None
+        elif unindexed_files:
+            impact_level = "medium"
+        elif not reached:
+            impact_level = "none"
+        elif not total:
+            impact_level = "medium"
+        else:
+            impact_level = "low" if affected / total < 0.2 else "medium" if affected / total < 0.5 else "high"
+
+        recommendations = []
+        if unindexed_files:
+            recommendations.append(
+                f"{len(unindexed_files)} changed file(s) are outside the import graph (e.g. {', '.join(unindexed_files[:3])}); "
+                "run the full suite."
+            )
+        else:
+            recommendations.append(
+                f"Dependency index: the change reaches {len(reached)} module(s), "
+                f"{len(affected_tests)} of {generated_tests} generated test(s) and "
+                f"{len(affected_repository_tests)} repository test(s)."
+            )
+        if unlinked_tests:
+            recommendations.append(
+                f"{len(unlinked_tests)} generated test(s) import nothing from the repository; they are always run."
+            )
+        return {
+            "impact_level": impact_level,
+            "affected_areas": sorted(reached),
+            "changed_modules": sorted(changed_modules),
+            # A changed non-Python file (template, SQL, CSS, config) has no edges in the import graph,
+            # so its reach is unknown: None makes test execution run every test, not a selection
+            "affected_tests": None if unindexed_files else affected_tests,
+            "affected_repository_tests": affected_repository_tests,
+            "affected_test_cases": sorted(test_cases),
+            "unindexed_files": unindexed_files,
+            "unlinked_tests": unlinked_tests,
+            "recommendations": recommendations,
+        }
+
+    async def aanalyze_impact(self, code_diffs: str, automated_scripts: str = "", repository_path: Optional[str] = None) -> Dict:
+        """
+        Async variant of `analyze_impact`.
+        """
+        return await asyncio.to_thread(self.analyze_impact, code_diffs, automated_scripts, repository_path)
@@ -0,0 +1,205 @@
+import os
+import re
+import ast
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.storage import connect_sqlite
+
+# Test case IDs as written by the test case generator (e.g. "TC-001"), found in test names and docstrings
+TEST_CASE_ID = re.compile(r"(?<![A-Za-z0-9])TC[-_ ]?(\d+)(?![0-9])", re.IGNORECASE)
+_SKIPPED_DIRECTORIES = {".git", ".hg", ".venv", "venv", "node_modules", "__pycache__", "build", "dist", ".tox"}
+
+
+def module_name_for(relative_path: str) -> Optional[str]:
+    """"pkg/sub/mod.py" -> "pkg.sub.mod"; "pkg/__init__.py" -> "pkg"; None for non-Python files."""
+    if not relative_path.endswith(".py"):
+        return None
+    parts = relative_path[:-3].replace("\\", "/").strip("/").split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts) if parts else None
+
+
+def is_test_module(relative_path: str) -> bool:
+    name = os.path.basename(relative_path)
+    return name.startswith("test_") or name.endswith("_test.py")
+
+
+def imported_names(tree: ast.AST, module: str, is_package: bool) -> Set[str]:
+    """
+    Every module name an import in `tree` may refer to. `from a import b` yields both "a" and
+    "a.b", since b may be a submodule; names are matched against indexed modules later.
+    """
+    names: Set[str] = set()
+    package = module if is_package else module.rpartition(".")[0]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base_parts = package.split(".") if package else []
+                base_parts = base_parts[:len(base_parts) - (node.level - 1)] if node.level > 1 else base_parts
+                base = ".".join(base_parts + ([node.module] if node.module else []))
+            else:
+                base = node.module or ""
+            if base:
+                names.add(base)
+            names.update(f"{base}.{alias.name}" if base else alias.name for alias in node.names if alias.name != "*")
+    return names
+
+
+def test_functions(tree: ast.AST) -> List[Tuple[str, ast.AST]]:
+    """(pytest-style name, node) for the test functions and `Test*` class methods of a module."""
+    tests = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+            tests.append((node.name, node))
+        elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith("test"):
+                    tests.append((f"{node.name}::{item.name}", item))
+    return tests
+
+
+def find_test_case_ids(text: str) -> List[str]:
+    """Test case IDs mentioned in `text`, normalized to "TC-001"."""
+    return sorted({f"TC-{int(number):03d}" for number in TEST_CASE_ID.findall(text)})
+
+
+def test_case_ids(node: ast.AST) -> List[str]:
+    """Test case IDs a test refers to in its name or docstring, normalized to "TC-001"."""
+    return find_test_case_ids(f"{getattr(node, 'name', '')} {ast.get_docstring(node) or ''}")
+
+
+class DependencyIndex:
+    """
+    Persistent index of a target repository: the module import graph and the tests defined in
+    each module. It is refreshed incrementally (only files whose size or mtime changed are
+    parsed again) and answers which modules and tests a change can reach.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "DependencyIndex":
+        return cls(os.getenv("STLC_DEPENDENCY_INDEX_PATH", "artifacts/dependency_index.sqlite"))
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect_sqlite(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS modules ("
+                " repository TEXT NOT NULL, module TEXT NOT NULL, path TEXT NOT NULL,"
+                " size INTEGER NOT NULL, mtime REAL NOT NULL, digest TEXT NOT NULL, tests TEXT NOT NULL,"
+                " PRIMARY KEY (repository, module))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS imports ("
+                " repository TEXT NOT NULL, module TEXT NOT NULL, imported TEXT NOT NULL,"
+                " PRIMARY KEY (repository, module, imported))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_imports_imported ON imports(repository, imported)")
+        return self._conn
+
+    # --- Indexing ---
+
+    def _index_file(self, conn: sqlite3.Connection, repository: str, relative_path: str) -> None:
+        module = module_name_for(relative_path)
+        full_path = os.path.join(repository, relative_path)
+        conn.execute("DELETE FROM imports WHERE repository = ? AND module = ?", (repository, module))
+        if not os.path.exists(full_path):
+            conn.execute("DELETE FROM modules WHERE repository = ? AND module = ?", (repository, module))
+            return
+        with open(full_path, "rb") as f:
+            source = f.read()
+        stat = os.stat(full_path)
+        try:
+            tree = ast.parse(source)
+        except (SyntaxError, ValueError):
+            tree = ast.Module(body=[], type_ignores=[])  # Keep the module known, without edges
+        is_package = os.path.basename(relative_path) == "__init__.py"
+        tests = [name for name, _ in test_functions(tree)] if is_test_module(relative_path) else []
+        conn.execute(
+            "INSERT OR REPLACE INTO modules (repository, module, path, size, mtime, digest, tests) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (repository, module, relative_path, stat.st_size, stat.st_mtime, hashlib.sha256(source).hexdigest(), json.dumps(tests)),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO imports (repository, module, imported) VALUES (?, ?, ?)",
+            [(repository, module, name) for name in imported_names(tree, module, is_package)],
+        )
+
+    def refresh(self, repository: str) -> Dict[str, int]:
+        """Brings the index of `repository` up to date, parsing only new or modified files."""
+        repository = os.path.abspath(repository)
+        on_disk: Dict[str, Tuple[str, int, float]] = {}
+        for root, directories, files in os.walk(repository):
+            directories[:] = [d for d in directories if d not in _SKIPPED_DIRECTORIES and not d.startswith(".")]
+            for name in files:
+                relative_path = os.path.relpath(os.path.join(root, name), repository)
+                module = module_name_for(relative_path)
+                if module:
+                    stat = os.stat(os.path.join(root, name))
+                    on_disk[module] = (relative_path, stat.st_size, stat.st_mtime)
+
+        with self._lock:
+            conn = self._connection()
+            indexed = {
+                module: (path, size, mtime)
+                for module, path, size, mtime in conn.execute(
+                    "SELECT module, path, size, mtime FROM modules WHERE repository = ?", (repository,)
+                )
+            }
+            changed = [entry[0] for module, entry in on_disk.items() if indexed.get(module) != entry]
+            removed = [indexed[module][0] for module in indexed.keys() - on_disk.keys()]
+            for relative_path in changed + removed:
+                self._index_file(conn, repository, relative_path)
+            conn.commit()
+        return {"modules": len(on_disk), "parsed": len(changed), "removed": len(removed)}
+
+    # --- Queries ---
+
+    def modules(self, repository: str) -> Dict[str, List[str]]:
+        """Indexed modules of `repository` and the tests each defines."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT module, tests FROM modules WHERE repository = ?", (os.path.abspath(repository),)
+            ).fetchall()
+        return {module: json.loads(tests) for module, tests in rows}
+
+    def reverse_dependencies(self, repository: str, changed_modules: Iterable[str]) -> Set[str]:
+        """The changed modules plus every indexed module that imports one of them, transitively."""
+        repository = os.path.abspath(repository)
+        with self._lock:
+            conn = self._connection()
+            known = {module for (module,) in conn.execute("SELECT module FROM modules WHERE repository = ?", (repository,))}
+            edges = conn.execute("SELECT module, imported FROM imports WHERE repository = ?", (repository,)).fetchall()
+        importers: Dict[str, Set[str]] = defaultdict(set)
+        for module, imported in edges:
+            target = resolve_module(imported, known)
+            if target:
+                importers[target].add(module)
+        reached = set(changed_modules)
+        queue = deque(reached)
+        while queue:
+            for importer in importers.get(queue.popleft(), ()):
+                if importer not in reached:
+                    reached.add(importer)
+                    queue.append(importer)
+        return reached
+
+
+def resolve_module(name: str, known: Set[str]) -> Optional[str]:
+    """Maps an imported name to the indexed module it refers to (longest known prefix), if any."""
+    while name:
+        if name in known:
+            return name
+        name = name.rpartition(".")[0]
+    return None
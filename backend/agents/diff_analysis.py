@@ -0,0 +1,197 @@
+import asyncio
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from backend.agents.base import analyze_code_diff_tool
+
+# Longest run of diff lines analyzed as one unit; larger hunks are split.
+MAX_CHUNK_LINES = 400
+IMPACT_ORDER = {"none": 0, "low": 1, "medium": 2, "high": 3}
+
+
+class DiffChunk(NamedTuple):
+    """A piece of one file's diff: at most one hunk, of at most MAX_CHUNK_LINES lines."""
+    path: str
+    hunk_header: str
+    lines: List[str]
+    new_file: bool
+    deleted_file: bool
+
+    def text(self) -> str:
+        return f"--- a/{self.path}\n+++ b/{self.path}\n{self.hunk_header}\n" + "\n".join(self.lines)
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    # Like text.splitlines(), without materializing every line of a large diff at once
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text)
+        yield text[start:end]
+        start = end + 1
+
+
+def _strip_prefix(path: str) -> Optional[str]:
+    path = path.split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    return path[2:] if path[:2] in ("a/", "b/") else path
+
+
+def iter_diff_chunks(lines: Iterable[str], max_chunk_lines: int = MAX_CHUNK_LINES) -> Iterator[DiffChunk]:
+    """
+    Streams a unified diff as chunks, one file hunk at a time (long hunks are split), holding
+    no more than one chunk in memory. Text before the first file header is attributed to
+    "(unknown)", so plain text still gets analyzed.
+    """
+    path, header = "(unknown)", ""
+    new_file = deleted_file = False
+    buffer: List[str] = []
+    held_minus: Optional[str] = None  # "--- x" is a file header only if "+++ y" follows
+
+    def flush() -> Iterator[DiffChunk]:
+        if buffer:
+            yield DiffChunk(path, header, list(buffer), new_file, deleted_file)
+            buffer.clear()
+
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if held_minus is not None:
+            if line.startswith("+++ "):
+                yield from flush()
+                old_path, new_path = _strip_prefix(held_minus[4:]), _strip_prefix(line[4:])
+                path = new_path or old_path or path
+                new_file = new_file or old_path is None
+                deleted_file = deleted_file or new_path is None
+                header = ""
+                held_minus = None
+                continue
+            buffer.append(held_minus)
+            held_minus = None
+
+        if line.startswith("diff --git "):
+            yield from flush()
+            parts = line.split(" ")
+            path = _strip_prefix(parts[-1]) or path
+            header, new_file, deleted_file = "", False, False
+        elif line.startswith("--- "):
+            held_minus = line
+        elif line.startswith("new file mode"):
+            new_file = True
+        elif line.startswith("deleted file mode"):
+            deleted_file = True
+        elif line.startswith(("index ", "old mode", "new mode", "similarity index", "rename from", "rename to")):
+            continue
+        elif line.startswith("@@"):
+            yield from flush()
+            header = line
+        else:
+            buffer.append(line)
+            if len(buffer) >= max_chunk_lines:
+                yield from flush()
+    if held_minus is not None:
+        buffer.append(held_minus)
+    yield from flush()
+
+
+def analyze_chunk(chunk: DiffChunk) -> Dict[str, Any]:
+    """Map step: rule-based verdict for one chunk, using the change impact analyzer tool."""
+    note = analyze_code_diff_tool(chunk.text())
+    lowered = note.lower()
+    if lowered.startswith("high impact"):
+        level = "high"
+    elif lowered.startswith("low impact"):
+        level = "low"
+    elif lowered.startswith("new feature"):
+        level = "high"
+    else:
+        level = "medium"
+    return {
+        "path": chunk.path,
+        "impact_level": level,
+        "new_feature": lowered.startswith("new feature"),
+        "new_file": chunk.new_file,
+        "deleted_file": chunk.deleted_file,
+        "added": sum(1 for line in chunk.lines if line.startswith("+")),
+        "removed": sum(1 for line in chunk.lines if line.startswith("-")),
+        "note": note,
+    }
+
+
+class ImpactReducer:
+    """Reduce step: folds chunk verdicts into per-file verdicts and an overall impact."""
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.notes: Dict[str, Set[str]] = {}
+        self.chunks = 0
+
+    def add(self, verdict: Dict[str, Any]) -> None:
+        self.chunks += 1
+        entry = self.files.setdefault(verdict["path"], {
+            "impact_level": "none", "new_feature": False, "new_file": False, "deleted_file": False,
+            "added": 0, "removed": 0, "chunks": 0,
+        })
+        if IMPACT_ORDER[verdict["impact_level"]] > IMPACT_ORDER[entry["impact_level"]]:
+            entry["impact_level"] = verdict["impact_level"]
+        entry["new_feature"] = entry["new_feature"] or verdict["new_feature"]
+        entry["new_file"] = entry["new_file"] or verdict["new_file"]
+        entry["deleted_file"] = entry["deleted_file"] or verdict["deleted_file"]
+        entry["added"] += verdict["added"]
+        entry["removed"] += verdict["removed"]
+        entry["chunks"] += 1
+        self.notes.setdefault(verdict["note"], set()).add(verdict["path"])
+
+    def result(self) -> Dict[str, Any]:
+        if not self.files:
+            return {"impact_level": "none", "affected_areas": [], "recommendations": [], "files": {}, "stats": {"files": 0, "chunks": 0}}
+        impact_level = max((entry["impact_level"] for entry in self.files.values()), key=IMPACT_ORDER.get)
+        new_feature = any(entry["new_feature"] for entry in self.files.values())
+        affected = sorted(self.files, key=lambda path: (-IMPACT_ORDER[self.files[path]["impact_level"]], path))
+
+        recommendations = []
+        if impact_level == "high":
+            recommendations.append("Extensive re-testing of affected functionalities is required.")
+        elif impact_level == "low":
+            recommendations.append("Focus on visual regression or specific UI interaction tests.")
+        if new_feature:
+            recommendations.append("New test cases and test data are needed for the new functionality.")
+            impact_level = "high"  # Elevate if new features
+        for note, paths in sorted(self.notes.items(), key=lambda item: -len(item[1])):
+            examples = ", ".join(sorted(paths)[:5])
+            recommendations.append(f"{note} ({len(paths)} file(s), e.g. {examples})")
+
+        return {
+            "impact_level": impact_level,
+            "affected_areas": affected,
+            "recommendations": recommendations,
+            "files": self.files,
+            "stats": {
+                "files": len(self.files),
+                "chunks": self.chunks,
+                "lines_added": sum(entry["added"] for entry in self.files.values()),
+                "lines_removed": sum(entry["removed"] for entry in self.files.values()),
+            },
+        }
+
+
+async def aanalyze_diff(code_diffs: str, analyze: Callable[[DiffChunk], Dict[str, Any]] = analyze_chunk,
+                        max_concurrency: int = 8, max_chunk_lines: int = MAX_CHUNK_LINES) -> Dict[str, Any]:
+    """
+    Map-reduce change impact analysis. The diff is parsed as a stream of per-file/per-hunk
+    chunks, `analyze` runs on up to `max_concurrency` chunks at a time in worker threads, and the
+    verdicts are reduced as they arrive, so memory is bounded by chunk size, not diff size.
+    Returns the structured `change_impact_analysis` dict.
+    """
+    reducer = ImpactReducer()
+    pending: Set[asyncio.Future] = set()
+    for chunk in iter_diff_chunks(iter_lines(code_diffs), max_chunk_lines):
+        if len(pending) >= max_concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                reducer.add(task.result())
+        pending.add(asyncio.ensure_future(asyncio.to_thread(analyze, chunk)))
+    if pending:
+        for task in (await asyncio.wait(pending))[0]:
+            reducer.add(task.result())
+    return reducer.result()
@@ -0,0 +1,248 @@
+import os
+import re
+import time
+import json
+import random
+import sqlite3
+import hashlib
+import textwrap
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.storage import connect_sqlite
+
+# MinHash signature size and LSH banding: 16 bands of 4 rows make issues with a shingle Jaccard
+# similarity around 0.5 and above likely to share a band; candidates are then checked against
+# SIMILARITY_THRESHOLD on the full signature.
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+SIMILARITY_THRESHOLD = 0.6
+SHINGLE_SIZE = 3
+MAX_REPRESENTATIVE_CHARS = 2000
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)  # Fixed seed: signatures must be comparable across processes and runs
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+# Volatile parts of log lines, replaced by placeholders before comparing: the same bug logged
+# twice differs in timestamps, addresses, IDs, line numbers and counts
+_VOLATILE = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"0x[0-9a-f]+"), "<addr>"),
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"), "<uuid>"),
+    (re.compile(r"\b[0-9a-f]{16,}\b"), "<hex>"),
+    (re.compile(r", line \d+"), ", line <n>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),  # Also inside names: test_login_3 and test_login_4 fail alike
+]
+# Outside quotes, test parameters ("test_x[chrome-1]") are masked as well. Quoted values are kept
+# apart from their volatile tokens: they name the key, selector or field that failed, so
+# KeyError: 'user' and KeyError: 'order' stay different issues.
+_PARAMETERS = (re.compile(r"\[[^\]\n]*\]"), "[<param>]")
+_QUOTED = re.compile(r"'[^'\n]*'|\"[^\"\n]*\"")
+_WHITESPACE = re.compile(r"\s+")
+_TRACEBACK_LINE = re.compile(r"^Traceback|^\s+File \"|^E\s|^During handling")
+_FRAME = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+_EXCEPTION = re.compile(r"^(?:E\s+)?([A-Za-z_][\w.]*(?:Error|Exception|Failure|Timeout)\w*\b.*)$", re.MULTILINE)
+
+
+def split_issues(raw_logs: str) -> List[str]:
+    """
+    Splits raw issue logs into individual issues: blank-line separated blocks, where a block
+    without a header line ("<test id> (failed):") or traceback lines is one issue per line.
+    Blocks are dedented first, so an indented plain log is not mistaken for a traceback.
+    """
+    issues = []
+    for block in re.split(r"\n\s*\n", raw_logs):
+        lines = [line.rstrip() for line in textwrap.dedent(block).splitlines() if line.strip()]
+        if not lines:
+            continue
+        if len(lines) > 1 and not lines[0].endswith(":") and not any(_TRACEBACK_LINE.match(line) for line in lines[1:]):
+            issues.extend(line.strip() for line in lines)
+        else:
+            issues.append("\n".join(lines).strip())
+    return issues
+
+
+def _mask(text: str, normalizers: List[Tuple[re.Pattern, str]]) -> str:
+    for pattern, placeholder in normalizers:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def normalize(issue: str) -> str:
+    text = issue.lower()
+    parts, position = [], 0
+    for quoted in _QUOTED.finditer(text):
+        parts.append(_mask(text[position:quoted.start()], [_PARAMETERS] + _VOLATILE))
+        parts.append(_mask(quoted.group(), _VOLATILE))
+        position = quoted.end()
+    parts.append(_mask(text[position:], [_PARAMETERS] + _VOLATILE))
+    return _WHITESPACE.sub(" ", "".join(parts)).strip()
+
+
+def signature(issue: str) -> str:
+    """
+    Exact-match key of an issue: for stack traces, the final exception line and the (file, function)
+    frames without line numbers; otherwise the normalized text.
+    """
+    frames = _FRAME.findall(issue)
+    exceptions = _EXCEPTION.findall(issue)
+    if frames and exceptions:
+        key = normalize(exceptions[-1] + "|" + "|".join(f"{os.path.basename(path)}:{function}" for path, function in frames))
+    else:
+        key = normalize(issue)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def minhash(issue: str) -> List[int]:
+    """MinHash signature of the issue's normalized word shingles."""
+    words = normalize(issue).split()
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))}
+    values = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") for shingle in shingles]
+    return [min((a * value + b) % _MERSENNE_PRIME for value in values) for a, b in _PERMUTATIONS]
+
+
+def similarity(left: List[int], right: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+def band_keys(signature_values: List[int]) -> List[str]:
+    return [
+        f"{band}:" + hashlib.blake2b(json.dumps(signature_values[band * ROWS:(band + 1) * ROWS]).encode("utf-8"), digest_size=8).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+class IssueClusterStore:
+    """
+    Clusters of near-duplicate issues, kept across runs. An issue joins a cluster when its
+    normalized signature matches exactly, or when MinHash/LSH finds a cluster representative
+    with similar shingles; otherwise it starts a new cluster. Occurrences are counted per run.
+    """
+
+    def __init__(self, path: str, similarity_threshold: float = SIMILARITY_THRESHOLD):
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "IssueClusterStore":
+        return cls(
+            path=os.getenv("STLC_ISSUE_CLUSTERS_PATH", "artifacts/issue_clusters.sqlite"),
+            similarity_threshold=float(os.getenv("STLC_ISSUE_SIMILARITY_THRESHOLD", SIMILARITY_THRESHOLD)),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect_sqlite(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS clusters ("
+                " cluster_id INTEGER PRIMARY KEY AUTOINCREMENT, representative TEXT NOT NULL,"
+                " minhash TEXT NOT NULL, first_seen REAL NOT NULL, last_seen REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures (signature TEXT PRIMARY KEY, cluster_id INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands (band_key TEXT NOT NULL, cluster_id INTEGER NOT NULL,"
+                " PRIMARY KEY (band_key, cluster_id))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS occurrences (cluster_id INTEGER NOT NULL, run_id TEXT NOT NULL,"
+                " count INTEGER NOT NULL, PRIMARY KEY (cluster_id, run_id))"
+            )
+        return self._conn
+
+    def _find_similar(self, conn: sqlite3.Connection, values: List[int]) -> Optional[int]:
+        keys = band_keys(values)
+        candidates = [
+            cluster_id for (cluster_id,) in conn.execute(
+                f"SELECT DISTINCT cluster_id FROM bands WHERE band_key IN ({','.join('?' * len(keys))})", keys
+            )
+        ]
+        best, best_score = None, self.similarity_threshold
+        for cluster_id in candidates:
+            (stored,) = conn.execute("SELECT minhash FROM clusters WHERE cluster_id = ?", (cluster_id,)).fetchone()
+            score = similarity(values, json.loads(stored))
+            if score >= best_score:
+                best, best_score = cluster_id, score
+        return best
+
+    def cluster(self, raw_logs: str, run_id: str) -> List[Dict[str, Any]]:
+        """
+        Assigns every issue in `raw_logs` to a cluster and records the run's occurrence counts.
+        Returns the run's clusters, most frequent first: {"cluster_id", "representative",
+        "occurrences", "total_occurrences", "runs", "first_seen", "new"}, where `representative`
+        is the cluster's first issue in this run.
+        """
+        # Exact duplicates are folded before any MinHash work, so volume costs one dict lookup each
+        by_signature: Dict[str, Tuple[str, int]] = {}
+        for issue in split_issues(raw_logs):
+            key = signature(issue)
+            first, count = by_signature.get(key, (issue, 0))
+            by_signature[key] = (first, count + 1)
+
+        now = time.time()
+        counts: Dict[int, int] = {}
+        texts: Dict[int, str] = {}
+        created = set()
+        with self._lock:
+            conn = self._connection()
+            for key, (issue, count) in by_signature.items():
+                row = conn.execute("SELECT cluster_id FROM signatures WHERE signature = ?", (key,)).fetchone()
+                if row:
+                    cluster_id = row[0]
+                else:
+                    values = minhash(issue)
+                    cluster_id = self._find_similar(conn, values)
+                    if cluster_id is None:
+                        cluster_id = conn.execute(
+                            "INSERT INTO clusters (representative, minhash, first_seen, last_seen) VALUES (?, ?, ?, ?)",
+                            (issue[:MAX_REPRESENTATIVE_CHARS], json.dumps(values), now, now),
+                        ).lastrowid
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO bands (band_key, cluster_id) VALUES (?, ?)",
+                            [(band_key, cluster_id) for band_key in band_keys(values)],
+                        )
+                        created.add(cluster_id)
+                    conn.execute("INSERT OR IGNORE INTO signatures (signature, cluster_id) VALUES (?, ?)", (key, cluster_id))
+                counts[cluster_id] = counts.get(cluster_id, 0) + count
+                texts.setdefault(cluster_id, issue[:MAX_REPRESENTATIVE_CHARS])
+
+            # Replaced, not added to: a node re-running within the same run must not double count
+            conn.executemany(
+                "INSERT OR REPLACE INTO occurrences (cluster_id, run_id, count) VALUES (?, ?, ?)",
+                [(cluster_id, run_id, count) for cluster_id, count in counts.items()],
+            )
+            conn.executemany("UPDATE clusters SET last_seen = ? WHERE cluster_id = ?", [(now, cluster_id) for cluster_id in counts])
+            conn.commit()
+
+            clusters = []
+            for cluster_id, count in counts.items():
+                (first_seen,) = conn.execute("SELECT first_seen FROM clusters WHERE cluster_id = ?", (cluster_id,)).fetchone()
+                total, runs = conn.execute(
+                    "SELECT SUM(count), COUNT(*) FROM occurrences WHERE cluster_id = ?", (cluster_id,)
+                ).fetchone()
+                clusters.append({
+                    "cluster_id": cluster_id,
+                    "representative": texts[cluster_id],
+                    "occurrences": count,
+                    "total_occurrences": total,
+                    "runs": runs,
+                    "first_seen": first_seen,
+                    "new": cluster_id in created,
+                })
+        clusters.sort(key=lambda cluster: (-cluster["occurrences"], cluster["cluster_id"]))
+        return clusters
+
+
+def format_clusters(clusters: List[Dict[str, Any]]) -> str:
+    """Raw-log text for the bug report agent: one representative per cluster, with its counts."""
+    entries = []
+    for cluster in clusters:
+        seen = "first seen in this run" if cluster["runs"] <= 1 else f"also seen in {cluster['runs'] - 1} earlier run(s)"
+        entries.append(f"[Issue cluster {cluster['cluster_id']}: {cluster['occurrences']} occurrence(s), {seen}]\n{cluster['representative']}")
+    return "\n\n".join(entries)
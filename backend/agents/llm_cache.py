@@ -0,0 +1,228 @@
+import os
+import time
+import asyncio
+import json
+import sqlite3
+import hashlib
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.storage import connect_sqlite
+
+# Per-request switch to skip the cache (set for the duration of one STLC run).
+_bypass_cache: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def cache_bypass(enabled: bool = True) -> Iterator[None]:
+    """Bypasses the LLM response cache (no lookups, no writes) inside the `with` block."""
+    token = _bypass_cache.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+def is_cache_bypassed() -> bool:
+    return _bypass_cache.get()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache for LLM responses: an in-memory LRU in front of an on-disk SQLite table.
+    Entries expire after `ttl_seconds`; the disk tier keeps about `max_entries` rows, evicting
+    the least recently used ones first. Memory-tier hits are written to the disk tier's access
+    times in one batch at its next read or write, and eviction runs once every `evict_interval`
+    writes, so the table may hold up to that many rows over `max_entries` in between.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10000,
+                 memory_entries: int = 256, enabled: bool = True, evict_interval: int = 100):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.enabled = enabled
+        self.evict_interval = max(1, evict_interval)
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._touched: Dict[str, float] = {}  # Memory-tier hits not yet written to last_access
+        self._writes_since_evict = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()  # SQLite tier
+        self._memory_lock = threading.Lock()  # In-memory tier; never held during disk I/O
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        return cls(
+            path=os.getenv("LLM_CACHE_PATH", "artifacts/llm_cache.sqlite"),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000)),
+            memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", 256)),
+            evict_interval=int(os.getenv("LLM_CACHE_EVICT_INTERVAL", 100)),
+            enabled=os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        )
+
+    @staticmethod
+    def make_key(model_name: str, temperature: Optional[float], system_prompt: str, input_text: str) -> str:
+        payload = json.dumps([model_name, temperature, system_prompt, input_text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the agents never touches the disk.
+        if self._conn is None:
+            self._conn = connect_sqlite(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+        return self._conn
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        # Caller holds _memory_lock
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._touched[key] = now
+                self._stats["memory_hits"] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+        return None
+
+    def _flush_touched(self, conn: sqlite3.Connection) -> None:
+        # Caller holds _lock: keeps the disk LRU order in line with the entries served from memory
+        with self._memory_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany("UPDATE llm_cache SET last_access = ? WHERE key = ?", [(at, key) for key, at in touched.items()])
+
+    def _disk_get_many(self, keys: List[str], now: float) -> List[Optional[str]]:
+        values: List[Optional[str]] = []
+        with self._lock:
+            conn = self._connection()
+            self._flush_touched(conn)
+            for key in keys:
+                row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._stats["evictions"] += 1
+                    row = None
+                if row is None:
+                    self._stats["misses"] += 1
+                    values.append(None)
+                    continue
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._stats["disk_hits"] += 1
+                values.append(row[0])
+                with self._memory_lock:
+                    self._remember(key, row[0], row[1])
+            conn.commit()
+        return values
+
+    def _disk_set_many(self, items: Dict[str, str], now: float) -> None:
+        with self._lock:
+            conn = self._connection()
+            self._flush_touched(conn)
+            conn.executemany(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                [(key, value, now, now) for key, value in items.items()],
+            )
+            self._stats["writes"] += len(items)
+            self._writes_since_evict += len(items)
+            if self._writes_since_evict >= self.evict_interval:
+                self._evict(conn, now)
+                self._writes_since_evict = 0
+            conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for `key`, or None on a miss (or when bypassed)."""
+        if not self.enabled or is_cache_bypassed():
+            return None
+        now = time.time()
+        value = self._memory_get(key, now)
+        return value if value is not None else self._disk_get_many([key], now)[0]
+
+    def set(self, key: str, value: str) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, str]) -> None:
+        if not self.enabled or is_cache_bypassed() or not items:
+            return
+        now = time.time()
+        with self._memory_lock:
+            for key, value in items.items():
+                self._remember(key, value, now)
+        self._disk_set_many(items, now)
+
+    # Async variants for code on the event loop: the in-memory tier is used inline, while the
+    # SQLite tier runs in a worker thread, so a slow disk never stalls other runs
+
+    async def aget_many(self, keys: List[str]) -> List[Optional[str]]:
+        """`get` for several keys; the disk misses of the memory tier are looked up in one thread hop."""
+        if not self.enabled or is_cache_bypassed():
+            return [None] * len(keys)
+        now = time.time()
+        values = [self._memory_get(key, now) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            found = await asyncio.to_thread(self._disk_get_many, [keys[i] for i in missing], now)
+            for i, value in zip(missing, found):
+                values[i] = value
+        return values
+
+    async def aget(self, key: str) -> Optional[str]:
+        return (await self.aget_many([key]))[0]
+
+    async def aset_many(self, items: Dict[str, str]) -> None:
+        if not self.enabled or is_cache_bypassed() or not items:
+            return
+        now = time.time()
+        with self._memory_lock:
+            for key, value in items.items():
+                self._remember(key, value, now)
+        await asyncio.to_thread(self._disk_set_many, items, now)
+
+    async def aset(self, key: str, value: str) -> None:
+        await self.aset_many({key: value})
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+        self._stats["evictions"] += expired + max(overflow, 0)
+
+    def clear(self) -> None:
+        with self._memory_lock:
+            self._memory.clear()
+            self._touched.clear()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock, self._memory_lock:
+            stats = dict(self._stats)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        stats["memory_entries"] = len(self._memory)
+        return stats
+
+
+llm_cache = LLMResponseCache.from_env()
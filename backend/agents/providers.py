@@ -0,0 +1,114 @@
+import os
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Which backend the shared LLM uses: "vertex" (default) or "fake" for offline runs and benchmarks
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "vertex").lower()
+
+
+class FakeLLMError(RuntimeError):
+    """Injected failure; carries a 503 code so it is treated like a transient Vertex error."""
+    code = 503
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model. The reply depends only on the prompt, so repeated runs
+    produce identical outputs. Latency, output size and failure injection are configurable.
+    """
+
+    model_name: str = "fake-chat-model"
+    temperature: float = 0.0
+    latency_seconds: float = 0.0
+    output_chars: int = 800
+    failure_rate: float = 0.0
+    seed: int = 0
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+        self._rng_lock = threading.Lock()
+        self._calls = 0
+        self._busy_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "FakeChatModel":
+        return cls(
+            latency_seconds=float(os.getenv("LLM_FAKE_LATENCY_SECONDS", 0.0)),
+            output_chars=int(os.getenv("LLM_FAKE_OUTPUT_CHARS", 800)),
+            failure_rate=float(os.getenv("LLM_FAKE_FAILURE_RATE", 0.0)),
+            seed=int(os.getenv("LLM_FAKE_SEED", 0)),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Number of calls and total simulated latency, for separating LLM time from overhead."""
+        return {"calls": self._calls, "busy_seconds": self._busy_seconds}
+
+    def _should_fail(self) -> bool:
+        # Failures come from a seeded sequence, so a given call order always fails the same calls.
+        with self._rng_lock:
+            self._calls += 1
+            self._busy_seconds += self.latency_seconds
+            return self._rng.random() < self.failure_rate
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        header = "| Test ID | Description | Preconditions | Steps | Expected Result | Priority |\n|---|---|---|---|---|---|\n"
+        rows, index = [], 1
+        while len(header) + sum(len(row) for row in rows) < self.output_chars:
+            chunk = digest[(index * 7) % 56:(index * 7) % 56 + 8]
+            rows.append(f"| TC-{index:03d} | Fake case {chunk} | None | Step {chunk} | Result {chunk} | Medium |\n")
+            index += 1
+        content = (header + "".join(rows))[: max(self.output_chars, 0)]
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        failing = self._should_fail()
+        time.sleep(self.latency_seconds)
+        if failing:
+            raise FakeLLMError("Injected fake LLM failure")
+        return self._reply(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        failing = self._should_fail()
+        await asyncio.sleep(self.latency_seconds)
+        if failing:
+            raise FakeLLMError("Injected fake LLM failure")
+        return self._reply(messages)
+
+
+def create_llm(provider: str, model_name: str, temperature: float) -> BaseChatModel:
+    """Builds the chat model for `provider` ("vertex" or "fake")."""
+    if provider == "fake":
+        return FakeChatModel.from_env()
+    if provider == "vertex":
+        from langchain_google_vertexai import ChatVertexAI # Heavy import; only paid when Vertex is used
+        return ChatVertexAI(
+            model_name=model_name,
+            project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+            location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1"),
+            temperature=temperature,
+            max_retries=1 # Retries are handled by llm_throttle, which knows about the shared quota
+        )
+    raise ValueError(f"Unknown LLM provider: {provider!r} (expected 'vertex' or 'fake')")
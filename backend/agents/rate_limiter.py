@@ -0,0 +1,222 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# HTTP status codes worth retrying: quota exhaustion and transient server-side failures.
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True for errors that are expected to succeed on retry (429s, 5xx, timeouts, dropped connections)."""
+    try:
+        from google.api_core import exceptions as google_exceptions
+        transient_types = (
+            google_exceptions.TooManyRequests,
+            google_exceptions.ResourceExhausted,
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.InternalServerError,
+            google_exceptions.DeadlineExceeded,
+        )
+        if isinstance(error, transient_types):
+            return True
+    except ImportError:
+        pass
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return isinstance(code, int) and code in TRANSIENT_STATUS_CODES
+
+
+class TokenBucket:
+    """
+    Per-minute budget that refills continuously. `reserve` debits immediately (the balance may go
+    negative) and returns how long the caller must wait before its reservation is covered, so
+    concurrent callers queue up fairly instead of racing for the same refill.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self._available = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self._available -= min(amount, self.capacity)
+            return 0.0 if self._available >= 0 else -self._available / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Corrects an earlier reservation once the real amount is known (positive delta = used more)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._available -= delta
+
+
+class LLMThrottle:
+    """
+    Client-side quota guard around the shared LLM: request and token buckets (per minute), a
+    global cap on in-flight calls, and retries with jittered exponential backoff on transient errors.
+    Works from both threads (`call`) and coroutines (`acall`).
+    """
+
+    def __init__(self, requests_per_minute: float = 60, tokens_per_minute: float = 200000,
+                 max_concurrency: int = 8, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._slots = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._stats = {"calls": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls) -> "LLMThrottle":
+        return cls(
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", 60)),
+            tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", 200000)),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 8)),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", 5)),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", 1.0)),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", 30.0)),
+        )
+
+    # --- Concurrency slots ---
+
+    def _try_acquire_slot(self) -> bool:
+        with self._slots:
+            if self._in_flight < self.max_concurrency:
+                self._in_flight += 1
+                return True
+            return False
+
+    def _acquire_slot(self) -> None:
+        with self._slots:
+            while self._in_flight >= self.max_concurrency:
+                self._slots.wait()
+            self._in_flight += 1
+
+    async def _aacquire_slot(self) -> None:
+        # Polls instead of awaiting a loop-bound primitive, so one throttle can serve the
+        # event loop and worker threads (sync callers) at the same time.
+        delay = 0.005
+        while not self._try_acquire_slot():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    def _release_slot(self) -> None:
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify()
+
+    # --- Accounting ---
+
+    def _quota_delay(self, estimated_tokens: int, requests: int = 1) -> float:
+        return max(self.requests.reserve(requests), self.tokens.reserve(estimated_tokens))
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries of concurrent callers instead of synchronising them.
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _add_wait(self, delta: int) -> None:
+        with self._slots:
+            self._waiting += delta
+
+    def _record(self, key: str, amount: float = 1) -> None:
+        with self._slots:
+            self._stats[key] += amount
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Settles the token bucket with the real token count reported by the LLM."""
+        if actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    # --- Entry points ---
+    # `on_wait`, if given, is called with the seconds spent waiting for quota and a slot (per attempt).
+    # `requests` is the number of model requests `fn` makes; a batch takes one slot but reserves
+    # a request per prompt.
+
+    def call(self, fn: Callable[[], T], estimated_tokens: int,
+             on_wait: Optional[Callable[[float], None]] = None, requests: int = 1) -> T:
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            self._add_wait(1)
+            try:
+                time.sleep(self._quota_delay(estimated_tokens, requests))
+                self._acquire_slot()
+            finally:
+                self._add_wait(-1)
+            waited = time.monotonic() - started
+            self._record("throttled_seconds", waited)
+            if on_wait is not None:
+                on_wait(waited)
+            try:
+                self._record("calls")
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    self._record("failures")
+                    raise
+                print(f"Transient LLM error ({e}); retrying (attempt {attempt + 1}/{self.max_retries}).")
+                self._record("retries")
+            finally:
+                self._release_slot()
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], estimated_tokens: int,
+                   on_wait: Optional[Callable[[float], None]] = None, requests: int = 1) -> T:
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            self._add_wait(1)
+            try:
+                await asyncio.sleep(self._quota_delay(estimated_tokens, requests))
+                await self._aacquire_slot()
+            finally:
+                self._add_wait(-1)
+            waited = time.monotonic() - started
+            self._record("throttled_seconds", waited)
+            if on_wait is not None:
+                on_wait(waited)
+            try:
+                self._record("calls")
+                return await fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    self._record("failures")
+                    raise
+                print(f"Transient LLM error ({e}); retrying (attempt {attempt + 1}/{self.max_retries}).")
+                self._record("retries")
+            finally:
+                self._release_slot()
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._slots:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["queue_depth"] = self._waiting
+            stats["in_flight"] = self._in_flight
+        stats["max_concurrency"] = self.max_concurrency
+        return stats
+
+
+llm_throttle = LLMThrottle.from_env()
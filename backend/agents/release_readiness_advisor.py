@@ -8,46 +8,45 @@ class ReleaseReadinessAdvisorAgent(AIAgent):
             name="Release Readiness Advisor Agent",
             description="Evaluates test results and quality metrics to assess release readiness.",
             system_prompt=(
-                "You are a Release Readiness Advisor Agent. Based on aggregated test results, "
-                "bug reports (severity, status), code quality metrics, and predefined release "
-                "criteria, assess the overall release readiness of the software.\n\n"
-                "Provide a clear, actionable recommendation as one of the following:\n"
-                "- 'Ready for Release'\n"
-                "- 'Proceed with Caution'\n"
-                "- 'Not Ready'\n\n"
-                "Justify your recommendation using:\n"
+                "You are a Release Readiness Advisor Agent. The release verdict is decided by "
+                "configured release rules over the test results, bug reports and quality metrics; "
+                "you are given that verdict together with the rules it triggered. Explain it, never "
+                "decide or change it: do not propose a different recommendation, even if you would "
+                "weigh the inputs differently.\n\n"
+                "Justify the given verdict using:\n"
+                "- The triggered rules and the metrics behind them\n"
                 "- Test results (pass/fail rate, regressions)\n"
                 "- Bug status and severity\n"
-                "- Code quality metrics (coverage, linting, static analysis)\n"
                 "- Any known risks or gaps\n\n"
+                "Then list the follow-up actions that would improve the verdict. "
                 "Respond with a concise and well-formatted Markdown summary."
             ),
             tools=[]  # You can add file_writer_tool here if you want to persist the output
         )
  
-    def assess_readiness(self, test_summary: str, bug_summary: str, quality_metrics: str) -> str:
-        """
-        Assesses release readiness based on test summary, bug report summary, and quality metrics.
-        Returns a clear recommendation with justification.
-        """
-        input_text = (
-            "Please assess release readiness based on the following inputs:\n\n"
+    def _build_justification_input(self, verdict_report: str, test_summary: str, bug_summary: str) -> str:
+        return (
+            "The release recommendation below was decided by the release rules and is final. "
+            "Do not change or second-guess it. Write a short justification of it for stakeholders, "
+            "referring to the metrics and triggered rules, and list the follow-up actions that would "
+            "improve the verdict.\n\n"
+            "### Rule Evaluation:\n"
+            f"{verdict_report}\n\n"
             "### Test Summary:\n"
             f"{test_summary}\n\n"
             "### Bug Summary:\n"
             f"{bug_summary}\n\n"
-            "### Code Quality Metrics:\n"
-            f"{quality_metrics}\n\n"
-            "Provide a final recommendation and rationale in Markdown format."
+            "Respond with the justification only, in Markdown format."
         )
- 
-        response = self.get_runnable().invoke({"input": input_text})
-        recommendation_report = response.content if hasattr(response, "content") else str(response)
- 
-        # Optional: Save output to a file
-        # file_writer_tool.run({
-        #     "file_path": "artifacts/release_readiness_recommendation.md",
-        #     "content": recommendation_report
-        # })
- 
-        return recommendation_report
\ No newline at end of file
+
+    def justify_verdict(self, verdict_report: str, test_summary: str, bug_summary: str) -> str:
+        """
+        Narrative for a verdict already decided by `ReleaseRuleEngine` (see `format_verdict`).
+        """
+        return self.invoke(self._build_justification_input(verdict_report, test_summary, bug_summary))
+
+    async def ajustify_verdict(self, verdict_report: str, test_summary: str, bug_summary: str) -> str:
+        """
+        Async variant of `justify_verdict`.
+        """
+        return await self.ainvoke(self._build_justification_input(verdict_report, test_summary, bug_summary))
@@ -0,0 +1,168 @@
+import os
+import json
+import operator
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+READY = "Ready for Release"
+CAUTION = "Proceed with Caution"
+NOT_READY = "Not Ready"
+VERDICTS = (READY, CAUTION, NOT_READY)  # Least to most severe; the most severe triggered rule wins
+
+METRICS = {
+    "pass_rate": "Pass rate of the executed tests (0-1, skipped tests excluded)",
+    "tests_run": "Number of executed tests",
+    "critical_bugs": "Open bugs of Critical severity",
+    "major_bugs": "Open bugs of Major severity",
+    "minor_bugs": "Open bugs of Minor severity",
+    "open_bugs": "All open bugs",
+    "regressions": "Tests that passed in their previous run and fail now",
+    "new_failures": "Failing tests with no earlier result",
+    "flaky_tests": "Tests that flipped between passing and failing in the history window",
+    "coverage": "Code coverage of the build under test (0-1)",
+}
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq, "!=": operator.ne,
+}
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"metric": "critical_bugs", "operator": ">", "threshold": 0, "verdict": NOT_READY},
+    {"metric": "pass_rate", "operator": "<", "threshold": 0.8, "verdict": NOT_READY},
+    {"metric": "regressions", "operator": ">=", "threshold": 5, "verdict": NOT_READY},
+    {"metric": "tests_run", "operator": "==", "threshold": 0, "verdict": CAUTION},
+    {"metric": "pass_rate", "operator": "<", "threshold": 0.95, "verdict": CAUTION},
+    {"metric": "major_bugs", "operator": ">", "threshold": 0, "verdict": CAUTION},
+    {"metric": "regressions", "operator": ">", "threshold": 0, "verdict": CAUTION},
+    {"metric": "coverage", "operator": "<", "threshold": 0.7, "verdict": CAUTION},
+]
+
+# Metrics without which there is no test evidence: when one is missing the verdict is at least
+# Proceed with Caution, whatever the configured rules say
+EVIDENCE_METRICS = ("tests_run", "pass_rate")
+
+_CompiledRule = Tuple[str, Callable[[Any, Any], bool], float, int, Dict[str, Any]]
+
+
+def compile_rules(rules: Sequence[Dict[str, Any]]) -> List[_CompiledRule]:
+    """Validates rules ({"metric", "operator", "threshold", "verdict"}) once, so evaluation is a plain loop."""
+    compiled = []
+    for rule in rules:
+        if rule["metric"] not in METRICS:
+            raise ValueError(f"Unknown release metric '{rule['metric']}'; expected one of {', '.join(METRICS)}")
+        if rule["operator"] not in _OPERATORS:
+            raise ValueError(f"Unknown operator '{rule['operator']}' in the {rule['metric']} rule")
+        if rule["verdict"] not in VERDICTS:
+            raise ValueError(f"Unknown verdict '{rule['verdict']}' in the {rule['metric']} rule; expected one of {', '.join(VERDICTS)}")
+        compiled.append((rule["metric"], _OPERATORS[rule["operator"]], float(rule["threshold"]), VERDICTS.index(rule["verdict"]), dict(rule)))
+    return compiled
+
+
+class ReleaseRuleEngine:
+    """
+    Decides the release verdict from structured metrics. Each rule compares one metric with a
+    threshold; the verdict is the most severe one among the rules that hold, or Ready for
+    Release when none do. Rules on a metric without data are skipped and listed as such, but a
+    run without test evidence (see EVIDENCE_METRICS) is never ready. The same metrics and rules
+    always give the same verdict.
+    """
+
+    def __init__(self, rules: Optional[Sequence[Dict[str, Any]]] = None):
+        self.rules = compile_rules(DEFAULT_RULES if rules is None else rules)
+
+    @classmethod
+    def from_env(cls) -> "ReleaseRuleEngine":
+        path = os.getenv("STLC_RELEASE_RULES_PATH")
+        if not path:
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def evaluate(self, metrics: Dict[str, Any], rules: Optional[List[_CompiledRule]] = None) -> Dict[str, Any]:
+        """
+        Returns {"verdict", "metrics", "triggered": [<rule with its "value">], "not_evaluated": [<metric>]}.
+        `rules` (from `compile_rules`) replaces the engine's rules for this call.
+        """
+        rank = 0
+        triggered, not_evaluated = [], []
+        for metric in EVIDENCE_METRICS:
+            if metrics.get(metric) is None:
+                triggered.append({"metric": metric, "operator": "missing", "threshold": None, "verdict": CAUTION, "value": None})
+                rank = VERDICTS.index(CAUTION)
+        for metric, compare, threshold, verdict, rule in self.rules if rules is None else rules:
+            value = metrics.get(metric)
+            if value is None:
+                if metric not in not_evaluated:
+                    not_evaluated.append(metric)
+            elif compare(value, threshold):
+                triggered.append({**rule, "value": value})
+                rank = max(rank, verdict)
+        return {"verdict": VERDICTS[rank], "metrics": metrics, "triggered": triggered, "not_evaluated": not_evaluated}
+
+
+def collect_metrics(execution_report: Optional[Dict[str, Any]], imported_results: Optional[Dict[str, Any]],
+                    history: Optional[Dict[str, Any]], bug_records: Sequence[Dict[str, Any]],
+                    coverage: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Rule engine metrics from the run's structured outputs: the pytest report (or, without one,
+    imported JUnit results), the test history summary and the bug report records. Metrics
+    without a source are None.
+    """
+    counts = (execution_report or {}).get("counts")
+    if counts:
+        total = sum(counts.values())
+        executed = total - counts.get("skipped", 0)
+        pass_rate = round(counts.get("passed", 0) / executed, 4) if executed else None
+    elif imported_results:
+        total, pass_rate = imported_results.get("total"), imported_results.get("pass_rate")
+    else:
+        total = pass_rate = None
+
+    severities = {"critical": 0, "major": 0, "minor": 0}
+    for report in bug_records:
+        severity = (report.get("severity") or "").strip().lower()
+        for level in severities:
+            if severity.startswith(level):
+                severities[level] += 1
+                break
+
+    history = history or {}
+    recorded = bool(history.get("runs"))
+    return {
+        "pass_rate": pass_rate,
+        "tests_run": total,
+        "critical_bugs": severities["critical"],
+        "major_bugs": severities["major"],
+        "minor_bugs": severities["minor"],
+        "open_bugs": len(bug_records),
+        "regressions": len(history.get("regressed") or []) if recorded else None,
+        "new_failures": len(history.get("new_failures") or []) if recorded else None,
+        "flaky_tests": len(history.get("flaky") or []) if recorded else None,
+        "coverage": coverage,
+    }
+
+
+def _format_value(metric: str, value: Any) -> str:
+    if value is None:
+        return "n/a"
+    if metric in ("pass_rate", "coverage"):
+        return f"{value * 100:.1f}%"
+    return str(value)
+
+
+def format_verdict(result: Dict[str, Any]) -> str:
+    """Markdown of an `evaluate` result: the verdict, the metrics and the rules that decided it."""
+    lines = [f"**Recommendation: {result['verdict']}**", "", "| Metric | Value |", "|---|---|"]
+    lines.extend(f"| {metric.replace('_', ' ')} | {_format_value(metric, value)} |" for metric, value in result["metrics"].items())
+    if result["triggered"]:
+        lines.append("\nRules triggered:")
+        lines.extend(
+            f"- {rule['metric']} has no data: {rule['verdict']}" if rule["operator"] == "missing" else
+            f"- {rule['metric']} {rule['operator']} {_format_value(rule['metric'], rule['threshold'])} "
+            f"(is {_format_value(rule['metric'], rule['value'])}): {rule['verdict']}"
+            for rule in result["triggered"]
+        )
+    else:
+        lines.append("\nNo release rule was triggered.")
+    if result["not_evaluated"]:
+        lines.append(f"\nNot evaluated (no data): {', '.join(result['not_evaluated'])}.")
+    return "\n".join(lines)
@@ -0,0 +1,332 @@
+import re
+import ast
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Attributes scripts locate elements by; a value that disappears from one of them is a rename
+# candidate. Classes are left out: they are shared and restyled too often to match reliably.
+LOCATOR_ATTRIBUTES = ("id", "data-testid", "data-test", "name")
+# Attributes that identify "the same element" across snapshots, besides tag and visible text
+_SIGNATURE_ATTRIBUTES = ("type", "role", "aria-label", "placeholder", "href", "for")
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_HTTP_METHODS = {"get", "put", "post", "delete", "options", "head", "patch", "trace"}
+# Renames stated in prose, as the UI state tool reports them: "... from 'a' to 'b'", "'a' now 'b'"
+_TEXT_RENAME = re.compile(r"""from\s+['"]([^'"]+)['"]\s+to\s+['"]([^'"]+)['"]|['"]([^'"]+)['"]\s+(?:is\s+)?now\s+['"]([^'"]+)['"]""")
+# Characters that mark a string as a selector (CSS, XPath, URL) rather than plain text
+_SELECTOR_CHARS = set("#.[]=@>:/")
+
+
+class StateDiff(NamedTuple):
+    """Result of diffing two UI/API states: unambiguous renames, and changes no rename explains."""
+    renames: Dict[str, str]  # Old locator value or endpoint path -> new one
+    unresolved: Dict[str, str]  # Old locator value or endpoint path -> why it could not be renamed
+
+
+class _Element(NamedTuple):
+    tag: str
+    attributes: Dict[str, str]
+    text: str
+
+    def signature(self) -> Tuple:
+        return (self.tag, self.text, *(self.attributes.get(name, "") for name in _SIGNATURE_ATTRIBUTES))
+
+
+class _DomCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.elements: List[_Element] = []
+        self._open: List[Tuple[str, Dict[str, str], List[str]]] = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = {name: value or "" for name, value in attrs}
+        if tag in _VOID_TAGS:
+            self.elements.append(_Element(tag, attributes, ""))
+        else:
+            self._open.append((tag, attributes, []))
+
+    def handle_startendtag(self, tag, attrs):
+        self.elements.append(_Element(tag, {name: value or "" for name, value in attrs}, ""))
+
+    def handle_data(self, data):
+        for _, _, text in self._open:
+            text.append(data)
+
+    def handle_endtag(self, tag):
+        while self._open:
+            open_tag, attributes, text = self._open.pop()
+            self.elements.append(_Element(open_tag, attributes, " ".join("".join(text).split())))
+            if open_tag == tag:
+                break
+
+    def close(self):
+        super().close()
+        while self._open:
+            self.handle_endtag(self._open[-1][0])
+
+
+def _elements(html: str) -> List[_Element]:
+    collector = _DomCollector()
+    collector.feed(html)
+    collector.close()
+    return collector.elements
+
+
+def diff_dom(old_html: str, new_html: str) -> StateDiff:
+    """
+    Locator renames between two DOM snapshots. An element whose locator value (id, test id or
+    name) no longer exists is matched to the new elements with the same tag, visible text and
+    identifying attributes; a single match with a different value is a rename.
+    """
+    old_elements, new_elements = _elements(old_html), _elements(new_html)
+    renames: Dict[str, str] = {}
+    unresolved: Dict[str, str] = {}
+    for attribute in LOCATOR_ATTRIBUTES:
+        old_values = {element.attributes[attribute] for element in old_elements if element.attributes.get(attribute)}
+        new_values = {element.attributes[attribute] for element in new_elements if element.attributes.get(attribute)}
+        for element in old_elements:
+            value = element.attributes.get(attribute)
+            if not value or value in new_values:
+                continue
+            candidates = {
+                candidate.attributes[attribute] for candidate in new_elements
+                if candidate.signature() == element.signature()
+                and candidate.attributes.get(attribute) and candidate.attributes[attribute] not in old_values
+            }
+            if len(candidates) == 1:
+                renames[value] = candidates.pop()
+            else:
+                reason = "no matching element" if not candidates else f"{len(candidates)} candidates"
+                unresolved[value] = f"<{element.tag} {attribute}=\"{value}\"> removed ({reason})"
+    return StateDiff(renames, unresolved)
+
+
+def _operations(schema: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    # path -> {METHOD: operationId}, from an OpenAPI document or a plain {path: [methods]} mapping
+    paths = schema.get("paths", schema)
+    operations: Dict[str, Dict[str, str]] = {}
+    for path, spec in paths.items():
+        if isinstance(spec, dict):
+            operations[path] = {
+                method.upper(): (details or {}).get("operationId", "") if isinstance(details, dict) else ""
+                for method, details in spec.items() if method.lower() in _HTTP_METHODS
+            }
+        else:
+            operations[path] = {str(method).upper(): "" for method in spec or []}
+    return operations
+
+
+def _last_static_segment(path: str) -> str:
+    segments = [segment for segment in path.strip("/").split("/") if segment and not segment.startswith("{")]
+    return segments[-1] if segments else ""
+
+
+def _path_rename(old_path: str, new_path: str) -> Optional[Tuple[str, str]]:
+    # "/users/{id}" -> "/api/v1/users/{id}" renames the static prefix "/users" -> "/api/v1/users"
+    old_static, _, old_rest = old_path.partition("{")
+    new_static, _, new_rest = new_path.partition("{")
+    if old_rest != new_rest:
+        return None
+    old_static, new_static = old_static.rstrip("/") or "/", new_static.rstrip("/") or "/"
+    return (old_static, new_static) if old_static != new_static else None
+
+
+def diff_api(old_schema: Dict[str, Any], new_schema: Dict[str, Any]) -> StateDiff:
+    """
+    Endpoint renames between two API schemas. A removed path is matched to the added paths by
+    operationId, then by HTTP methods and last path segment; a single match is a rename.
+    """
+    old_operations, new_operations = _operations(old_schema), _operations(new_schema)
+    added = [path for path in new_operations if path not in old_operations]
+    renames: Dict[str, str] = {}
+    unresolved: Dict[str, str] = {}
+    for path, methods in old_operations.items():
+        if path in new_operations:
+            continue
+        operation_ids = {operation_id for operation_id in methods.values() if operation_id}
+        candidates = [candidate for candidate in added if operation_ids & set(new_operations[candidate].values())]
+        if not candidates:
+            candidates = [
+                candidate for candidate in added
+                if set(new_operations[candidate]) == set(methods)
+                and _last_static_segment(candidate) == _last_static_segment(path)
+            ]
+        rename = _path_rename(path, candidates[0]) if len(candidates) == 1 else None
+        if rename:
+            renames[rename[0]] = rename[1]
+        else:
+            reason = "no matching endpoint" if not candidates else f"{len(candidates)} candidates"
+            unresolved[path.partition("{")[0].rstrip("/") or path] = f"{'/'.join(sorted(methods)) or 'endpoint'} {path} removed ({reason})"
+    return StateDiff(renames, unresolved)
+
+
+def parse_state_text(text: str) -> StateDiff:
+    """Renames stated in a prose description of UI/API changes, e.g. "changed from 'a' to 'b'"."""
+    renames = {}
+    for match in _TEXT_RENAME.finditer(text):
+        old, new = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        renames[old] = new
+    return StateDiff(renames, {})
+
+
+def diff_states(old_state: Dict[str, Any], new_state: Dict[str, Any]) -> StateDiff:
+    """
+    Diffs two UI/API states of the form {"dom": "<html>...", "api": <OpenAPI document>}; either
+    part may be missing. Renames claimed by both parts with different targets are ambiguous and
+    reported as unresolved.
+    """
+    parts = []
+    if old_state.get("dom") and new_state.get("dom"):
+        parts.append(diff_dom(old_state["dom"], new_state["dom"]))
+    if old_state.get("api") and new_state.get("api"):
+        parts.append(diff_api(old_state["api"], new_state["api"]))
+    renames: Dict[str, str] = {}
+    unresolved: Dict[str, str] = {}
+    conflicting: Set[str] = set()
+    for part in parts:
+        unresolved.update(part.unresolved)
+        for old, new in part.renames.items():
+            if renames.get(old, new) != new:
+                conflicting.add(old)
+            renames[old] = new
+    for old in sorted(conflicting):
+        unresolved[old] = f"'{old}' renamed inconsistently"
+        del renames[old]
+    return StateDiff(renames, unresolved)
+
+
+# --- Applying renames to scripts ---
+
+def _rename_pattern(old: str) -> "re.Pattern[str]":
+    if old.startswith("/"):
+        # A URL path: "/users" matches "/users", "/users/42", "https://host/users?x=1", not "/users2"
+        # and not "/api/v1/users" (the match must start the path)
+        return re.compile(r"(?:^|(?<=['\"])|(?<=://)[^/'\"\s]*)" + re.escape(old) + r"(?=$|[/?#'\"\s])")
+    return re.compile(r"(?<![\w-])" + re.escape(old) + r"(?![\w-])")
+
+
+def _is_locator_like(value: str, old: str) -> bool:
+    # Plain prose that happens to contain a locator word (e.g. a fill value) is not rewritten
+    return value == old or bool(_SELECTOR_CHARS.intersection(value))
+
+
+def _substitute(text: str, patterns: List[Tuple[str, str, "re.Pattern[str]"]]) -> Tuple[str, int]:
+    count = 0
+    for old, new, pattern in patterns:
+        if old in text and _is_locator_like(text, old):
+            if old.startswith("/"):
+                text, n = pattern.subn(lambda match: match.group(0)[: len(match.group(0)) - len(old)] + new, text)
+            else:
+                text, n = pattern.subn(new, text)
+            count += n
+    return text, count
+
+
+def _literal_parts(segment: str) -> List[Tuple[int, int]]:
+    # (start, end) offsets of the literal text of an f-string source segment, outside {...}
+    body_start = segment.find(segment.lstrip("rRbBfFuU")[0]) if segment.lstrip("rRbBfFuU") else 0
+    quote = segment[body_start:body_start + 3] if segment[body_start:body_start + 3] in ('"""', "'''") else segment[body_start]
+    start, end = body_start + len(quote), len(segment) - len(quote)
+    parts, depth, literal_start, i = [], 0, start, start
+    while i < end:
+        char = segment[i]
+        if depth == 0 and char in "{}" and segment[i:i + 2] in ("{{", "}}"):
+            i += 2
+            continue
+        if char == "{":
+            if depth == 0:
+                parts.append((literal_start, i))
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                literal_start = i + 1
+        i += 1
+    if depth == 0:
+        parts.append((literal_start, end))
+    return parts
+
+
+def apply_renames(source: str, renames: Dict[str, str]) -> Tuple[str, int]:
+    """
+    Applies locator and endpoint renames to the string literals (including f-string text) of a
+    Python script, located through its AST, so code, comments and names are never touched.
+    Returns the rewritten source and the number of replacements made.
+    """
+    if not renames:
+        return source, 0
+    tree = ast.parse(source)
+    # Longest first, so "/users/admin" wins over "/users"
+    patterns = [(old, new, _rename_pattern(old)) for old, new in sorted(renames.items(), key=lambda item: -len(item[0]))]
+    inside_fstring = {id(child) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr) for child in ast.walk(node) if child is not node}
+
+    lines = source.splitlines(keepends=True)
+    line_offsets = [0]
+    for line in lines:
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    def offset(lineno: int, col_offset: int) -> int:
+        # AST columns count UTF-8 bytes
+        return line_offsets[lineno - 1] + len(lines[lineno - 1].encode("utf-8")[:col_offset].decode("utf-8"))
+
+    edits: List[Tuple[int, int, str]] = []
+    total = 0
+    for node in ast.walk(tree):
+        if id(node) in inside_fstring:
+            continue
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            new_value, count = _substitute(node.value, patterns)
+        elif isinstance(node, ast.JoinedStr):
+            count = 1  # Decided per literal part below
+        else:
+            continue
+        if not count:
+            continue
+        start, end = offset(node.lineno, node.col_offset), offset(node.end_lineno, node.end_col_offset)
+        segment = source[start:end]
+        if isinstance(node, ast.JoinedStr):
+            rewritten, count, cursor = [], 0, 0
+            for part_start, part_end in _literal_parts(segment):
+                text, n = _substitute(segment[part_start:part_end], patterns)
+                rewritten.append(segment[cursor:part_start] + text)
+                cursor, count = part_end, count + n
+            new_segment = "".join(rewritten) + segment[cursor:]
+        else:
+            new_segment, _ = _substitute(segment, patterns)
+            try:
+                if ast.literal_eval(new_segment) != new_value:
+                    continue  # Escapes or concatenation make the raw text differ from the value; leave it
+            except (ValueError, SyntaxError):
+                continue
+        if count and new_segment != segment:
+            edits.append((start, end, new_segment))
+            total += count
+
+    for start, end, new_segment in sorted(edits, reverse=True):
+        source = source[:start] + new_segment + source[end:]
+    ast.parse(source)  # The rewrite only touches literal text; fail loudly if that ever breaks the script
+    return source, total
+
+
+def _referenced_tokens(node: ast.AST) -> Set[str]:
+    return {child.value for child in ast.walk(node) if isinstance(child, ast.Constant) and isinstance(child.value, str)}
+
+
+def unresolved_fragments(source: str, unresolved: Iterable[str], failing_tests: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """
+    (function name, source) of the top-level functions and test methods that still need the
+    agent: those whose string literals mention an unresolved locator or endpoint, and the
+    failing tests (by function name) among `failing_tests`.
+    """
+    patterns = [_rename_pattern(token) for token in unresolved]
+    failing = set(failing_tests)
+    tree = ast.parse(source)
+    functions = [node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            functions.extend(item for item in node.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)))
+    fragments = []
+    for node in functions:
+        literals = _referenced_tokens(node)
+        if node.name in failing or any(pattern.search(literal) for pattern in patterns for literal in literals):
+            fragments.append((node.name, ast.get_source_segment(source, node)))
+    return fragments
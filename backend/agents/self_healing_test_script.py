@@ -1,6 +1,40 @@
-from backend.agents.base import AIAgent, file_writer_tool
-from langchain_core.tools import StructuredTool
-from typing import List
+import re
+import ast
+from backend.agents.base import AIAgent
+from backend.agents.script_healing import StateDiff, apply_renames, parse_state_text, unresolved_fragments
+from backend.execution.pytest_runner import extract_code_blocks, map_code_blocks
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+_TEST_NAME = re.compile(r"\b(test_\w+)")
+
+
+def _replace_function(source: str, name: str, replacement: str) -> str:
+    # Swaps the named function's source for `replacement`, re-indented to the original's level
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name:
+            lines = source.splitlines(keepends=True)
+            start = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+            indent = re.match(r"\s*", lines[start - 1]).group(0)
+            body = "".join(indent + line if line.strip() else line for line in replacement.strip("\n").splitlines(keepends=True))
+            return "".join(lines[:start - 1]) + body.rstrip("\n") + "\n" + "".join(lines[node.end_lineno:])
+    return source
+
+
+def _function_source(reply: str, name: str) -> str:
+    # The function `name` from the agent's reply, or "" if the reply holds no valid definition of it
+    for block in extract_code_blocks(reply) or [reply]:
+        try:
+            tree = ast.parse(block)
+        except SyntaxError:
+            continue
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name:
+                start = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+                lines = block.splitlines(keepends=True)[start - 1:node.end_lineno]
+                indent = len(lines[0]) - len(lines[0].lstrip())
+                return "".join(line[indent:] if line[:indent].isspace() else line for line in lines)
+    return ""
+
 
 class SelfHealingTestScriptAgent(AIAgent):
     def __init__(self):
@@ -15,6 +49,102 @@ class SelfHealingTestScriptAgent(AIAgent):
             ),
             # tools=[ui_state_fetcher_tool, file_writer_tool]
         )
-    def heal_script(self, original_script: str, failure_log: str, ui_api_state_diff: str) -> str:
-        # ... logic ...
-        pass
\ No newline at end of file
+
+    def _rewrite(self, original_script: str, diff: StateDiff, failing_tests: Iterable[str]) -> Dict[str, Any]:
+        """
+        Fast path: applies the diff's renames to every Python block of the script by AST rewrite,
+        then collects the functions that still need the agent (see `unresolved_fragments`).
+        """
+        failing = set(failing_tests)
+        blocks: List[str] = []
+        fragments: List[Tuple[int, str, str]] = []
+        replacements = 0
+
+        def heal_block(code: str) -> str:
+            nonlocal replacements
+            try:
+                healed, count = apply_renames(code, diff.renames)
+                before = dict(unresolved_fragments(code, [], failing))
+            except SyntaxError:
+                blocks.append(code)
+                return code
+            replacements += count
+            # A failing test the renames changed is considered healed
+            untouched = {name for name, source in unresolved_fragments(healed, [], failing) if before.get(name) == source}
+            index = len(blocks)
+            blocks.append(healed)
+            fragments.extend((index, name, source) for name, source in unresolved_fragments(healed, diff.unresolved, untouched))
+            return healed
+
+        if extract_code_blocks(original_script):
+            script = map_code_blocks(original_script, heal_block)
+        else:
+            script = heal_block(original_script)
+        return {"script": script, "blocks": blocks, "fragments": fragments, "replacements": replacements}
+
+    def _build_input(self, fragment: str, failure_log: str, diff: StateDiff) -> str:
+        applied = "\n".join(f"- '{old}' -> '{new}'" for old, new in diff.renames.items()) or "- none"
+        unresolved = "\n".join(f"- {reason}" for reason in diff.unresolved.values()) or "- none"
+        return (
+            "The test function below fails after UI/API changes. The renames listed have already been "
+            "applied to it; fix what remains. Return only the corrected function in a single Python "
+            "code block, keeping its name and signature.\n\n"
+            f"Renames Applied:\n{applied}\n\n"
+            f"Unresolved UI/API Changes:\n{unresolved}\n\n"
+            f"Failure Log:\n{failure_log}\n\n"
+            f"Test Function:\n```python\n{fragment}\n```"
+        )
+
+    def _merge(self, original_script: str, rewrite: Dict[str, Any], replies: List[str]) -> Dict[str, Any]:
+        blocks = list(rewrite["blocks"])
+        healed_fragments = 0
+        for (index, name, _), reply in zip(rewrite["fragments"], replies):
+            function = _function_source(reply, name)
+            if function:
+                blocks[index] = _replace_function(blocks[index], name, function)
+                healed_fragments += 1
+        if extract_code_blocks(original_script):
+            remaining = iter(blocks)
+            script = map_code_blocks(original_script, lambda code: next(remaining))
+        else:
+            script = blocks[0] if blocks else original_script
+        return {
+            "script": script,
+            "replacements": rewrite["replacements"],
+            "fragments": len(rewrite["fragments"]),
+            "healed_fragments": healed_fragments,
+        }
+
+    def heal(self, original_script: str, failure_log: str, diff: StateDiff, failing_tests: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Heals a script against a structured UI/API diff. Renames are applied deterministically;
+        only the functions that still reference unresolved changes, or failing tests no rename
+        touched, are sent to the LLM, one prompt each.
+        Returns {"script", "replacements", "fragments", "healed_fragments"}.
+        """
+        rewrite = self._rewrite(original_script, diff, failing_tests)
+        replies = [self.invoke(self._build_input(source, failure_log, diff)) for _, _, source in rewrite["fragments"]]
+        return self._merge(original_script, rewrite, replies)
+
+    async def aheal(self, original_script: str, failure_log: str, diff: StateDiff, failing_tests: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Async variant of `heal`; the fragments are sent to the LLM concurrently.
+        """
+        rewrite = self._rewrite(original_script, diff, failing_tests)
+        replies = await self.abatch([self._build_input(source, failure_log, diff) for _, _, source in rewrite["fragments"]])
+        return self._merge(original_script, rewrite, replies)
+
+    def heal_script(self, original_script: str, failure_log: str, ui_api_state_diff: Union[str, StateDiff]) -> str:
+        """
+        Returns the healed script. `ui_api_state_diff` is a `StateDiff` (see `diff_states`) or a
+        prose description of the changes, from which stated renames are taken.
+        """
+        diff = ui_api_state_diff if isinstance(ui_api_state_diff, StateDiff) else parse_state_text(ui_api_state_diff)
+        return self.heal(original_script, failure_log, diff, _TEST_NAME.findall(failure_log))["script"]
+
+    async def aheal_script(self, original_script: str, failure_log: str, ui_api_state_diff: Union[str, StateDiff]) -> str:
+        """
+        Async variant of `heal_script`.
+        """
+        diff = ui_api_state_diff if isinstance(ui_api_state_diff, StateDiff) else parse_state_text(ui_api_state_diff)
+        return (await self.aheal(original_script, failure_log, diff, _TEST_NAME.findall(failure_log)))["script"]
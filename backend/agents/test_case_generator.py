@@ -1,6 +1,168 @@
+import os
+import re
+import asyncio
 from backend.agents.base import AIAgent, file_writer_tool
+from backend.models import TestCase
 from langchain_core.tools import StructuredTool
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Requirement documents longer than this (in characters, with the user stories) are split into
+# shards whose test cases are generated concurrently
+MAX_SHARD_CHARS = int(os.getenv("STLC_REQUIREMENT_SHARD_CHARS", 8000))
+# Shards of one document in flight at once; they start in document order, so early shards finish first
+SHARD_CONCURRENCY = int(os.getenv("STLC_REQUIREMENT_SHARD_CONCURRENCY", 8))
+
+TABLE_HEADER = (
+    "| Test ID | Description | Preconditions | Steps | Expected Result | Priority |\n"
+    "|---|---|---|---|---|---|\n"
+)
+_HEADER_CELLS = {"test id", "id", "test case id"}
+# TestCase field -> table column, in table order
+COLUMNS = {
+    "id": "Test ID", "description": "Description", "preconditions": "Preconditions",
+    "steps": "Steps", "expected_result": "Expected Result", "priority": "Priority",
+}
+_ID_NUMBER = re.compile(r"(\d+)")
+# Lines that start a new section or user story: Markdown headings, "User Story 4:" / "US-12:"
+# labels and "As a ..." stories
+_SECTION_START = re.compile(r"^(#{1,6}\s|(user\s+story|story|us)[-\s]?\d*\s*[:.-]|[-*]?\s*as\s+an?\s)", re.IGNORECASE)
+# Numbered headings ("3.2 Login"), used only in documents without the headings above
+_NUMBERED_START = re.compile(r"^\d+(\.\d+)*[.)]?\s+\S")
+
+
+def _sections(text: str) -> List[str]:
+    lines = text.splitlines()
+    # In a document with Markdown headings or story labels, numbered lines are steps or list items.
+    # Otherwise an unindented numbered line starts a section only after a blank line that does not
+    # follow a "Steps:"-style lead-in, so the numbered steps inside a requirement stay together.
+    numbered = not any(_SECTION_START.match(line.strip()) for line in lines)
+    sections: List[str] = []
+    current: List[str] = []
+    previous = ""
+    for i, line in enumerate(lines):
+        starts = _SECTION_START.match(line.strip()) or (
+            numbered and _NUMBERED_START.match(line) and i > 0 and not lines[i - 1].strip() and not previous.endswith(":")
+        )
+        if current and starts and any(item.strip() for item in current):
+            sections.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+        if line.strip():
+            previous = line.strip()
+    if any(item.strip() for item in current):
+        sections.append("\n".join(current).strip())
+    return sections
+
+
+def _split_oversized(section: str, max_chars: int) -> List[str]:
+    # A section that alone exceeds the limit is split at paragraphs, then lines, then hard cuts
+    if len(section) <= max_chars:
+        return [section]
+    parts = [part.strip() for part in re.split(r"\n\s*\n", section) if part.strip()]
+    if len(parts) == 1:
+        parts = [line for line in section.splitlines() if line.strip()]
+    if len(parts) == 1:
+        return [section[i:i + max_chars] for i in range(0, len(section), max_chars)]
+    return _pack([piece for part in parts for piece in _split_oversized(part, max_chars)], max_chars)
+
+
+def _pack(parts: List[str], max_chars: int) -> List[str]:
+    # Greedily joins consecutive parts into shards of at most max_chars
+    shards: List[str] = []
+    current: List[str] = []
+    size = 0
+    for part in parts:
+        if current and size + len(part) + 2 > max_chars:
+            shards.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(part)
+        size += len(part) + 2
+    if current:
+        shards.append("\n\n".join(current))
+    return shards
+
+
+def shard_requirements(requirements: str, user_stories: str, max_chars: int = MAX_SHARD_CHARS) -> List[Tuple[str, str]]:
+    """
+    Splits requirements and user stories at section and story boundaries into
+    (requirements, user stories) shards of at most `max_chars` each. Inputs within the limit
+    stay a single shard.
+    """
+    if len(requirements) + len(user_stories or "") <= max_chars:
+        return [(requirements, user_stories)]
+    shards = [(text, "") for text in _pack([piece for section in _sections(requirements) for piece in _split_oversized(section, max_chars)], max_chars)]
+    shards += [("", text) for text in _pack([piece for section in _sections(user_stories or "") for piece in _split_oversized(section, max_chars)], max_chars)]
+    return shards or [(requirements, user_stories)]
+
+
+def test_case_rows(markdown: str) -> List[List[str]]:
+    """Cells of each test case row of the Markdown tables in `markdown` (header and separator rows skipped)."""
+    rows = []
+    for line in markdown.splitlines():
+        line = line.strip()
+        if not line.startswith("|"):
+            continue
+        cells = [cell.strip() for cell in line.strip("|").split("|")]
+        if set(cells[0]) <= set("-: ") or cells[0].lower() in _HEADER_CELLS:
+            continue
+        rows.append(cells)
+    return rows
+
+
+def parse_test_cases(markdown: str) -> List[TestCase]:
+    """Test case records of the tables in `markdown`; rows with fewer columns get empty fields."""
+    cases = []
+    for cells in test_case_rows(markdown):
+        if len(cells) < 2:
+            continue
+        values = (cells + [""] * len(COLUMNS))[:len(COLUMNS)]
+        cases.append(TestCase(**dict(zip(COLUMNS, values))))
+    return cases
+
+
+def format_test_cases(cases: Sequence[Dict[str, Any]], fields: Sequence[str]) -> str:
+    """Markdown table of just `fields` of the given test case records, for downstream prompts."""
+    header = "| " + " | ".join(COLUMNS[field] for field in fields) + " |\n|" + "---|" * len(fields) + "\n"
+    rows = ["| " + " | ".join(str(case.get(field, "")) for field in fields) + " |" for case in cases]
+    return header + "\n".join(rows) + "\n"
+
+
+def _case_key(cells: List[str]) -> str:
+    # Two rows describe the same case when their description matches, whatever their IDs
+    text = cells[1] if len(cells) > 1 else cells[0]
+    return " ".join(text.lower().split())
+
+
+def merge_test_cases(existing: str, new: str) -> Tuple[str, str]:
+    """
+    Merges the test case rows of `new` into the `existing` table. Existing rows and their IDs
+    are kept as they are; new rows that repeat an existing case are dropped, and the rest get
+    the next free IDs. Returns (merged table, table of just the added rows, or "").
+    """
+    existing_rows = test_case_rows(existing)
+    seen = {_case_key(cells) for cells in existing_rows}
+    numbers = [int(match.group(1)) for match in (_ID_NUMBER.search(cells[0]) for cells in existing_rows) if match]
+    next_number = max(numbers, default=0) + 1
+
+    added = []
+    for cells in test_case_rows(new):
+        key = _case_key(cells)
+        if key in seen:
+            continue
+        seen.add(key)
+        added.append("| " + " | ".join([f"TC-{next_number:03d}"] + cells[1:]) + " |")
+        next_number += 1
+    if not added:
+        return existing, ""
+
+    lines = existing.splitlines()
+    last_row = max((i for i, line in enumerate(lines) if line.strip().startswith("|")), default=None)
+    if last_row is None:
+        merged = existing.rstrip("\n") + ("\n\n" if existing.strip() else "") + TABLE_HEADER + "\n".join(added) + "\n"
+    else:
+        merged = "\n".join(lines[:last_row + 1] + added + lines[last_row + 1:]) + "\n"
+    return merged, TABLE_HEADER + "\n".join(added) + "\n"
+
 
 class TestCaseGenerationAgent(AIAgent):
     def __init__(self):
@@ -37,29 +199,92 @@ class TestCaseGenerationAgent(AIAgent):
         
     #     return generated_content
 
+    def _build_input(self, requirements: str, user_stories: str) -> str:
+        # input_text = f"Requirements:\n{requirements}\n\nUser Stories:\n{user_stories}"
+        return (
+            "Below are software requirements and user stories. "
+            "Generate structured test cases in a Markdown table with the following columns: "
+            "Test ID, Description, Preconditions, Steps, Expected Result, Priority.\n\n"
+            f"Software Requirements:\n{requirements}\n\nUser Stories:\n{user_stories}"
+        )
+
     def generate_test_cases(self, requirements: str, user_stories: str) -> str:
         """
         Generates structured test cases based on requirements and user stories.
-        Calls the underlying LLM with the formulated prompt.
+        Calls the underlying LLM with the formulated prompt. Large documents are split with
+        `shard_requirements` and the per-shard tables merged into one with unique Test IDs.
         """
-        # input_text = f"Requirements:\n{requirements}\n\nUser Stories:\n{user_stories}"
-        input_text = (
-                "Below are software requirements and user stories. "
-                "Generate structured test cases in a Markdown table with the following columns: "
-                "Test ID, Description, Preconditions, Steps, Expected Result, Priority.\n\n"
-                f"Software Requirements:\n{requirements}\n\nUser Stories:\n{user_stories}"
-            )
-        
-        # Invoke the runnable
-        response = self.get_runnable().invoke({"input": input_text})
-    
-        # Extract content from HumanMessage or AIMessage
-        if hasattr(response, "content"):
-            generated_content = response.content
-        elif isinstance(response, dict) and "content" in response:
-            generated_content = response["content"]
-        else:
-            generated_content = str(response)
-    
-        return generated_content
-    
\ No newline at end of file
+        shards = shard_requirements(requirements, user_stories)
+        if len(shards) == 1:
+            return self.invoke(self._build_input(*shards[0]))
+        merged = ""
+        for shard_requirements_text, shard_user_stories in shards:
+            merged, _ = merge_test_cases(merged, self.invoke(self._build_input(shard_requirements_text, shard_user_stories)))
+        return merged
+
+    async def agenerate_test_cases(self, requirements: str, user_stories: str,
+                                   on_shard: Optional[Callable[[int, int, str], None]] = None) -> str:
+        """
+        Async variant of `generate_test_cases`; the shards are generated concurrently.
+        `on_shard(index, shard_count, added_rows)` is called for each shard, in shard order, as soon
+        as it and every shard before it have finished, so the Test IDs it reports are final.
+        """
+        shards = shard_requirements(requirements, user_stories)
+        if len(shards) == 1:
+            test_cases = await self.ainvoke(self._build_input(*shards[0]))
+            if on_shard:
+                on_shard(0, 1, test_cases)
+            return test_cases
+
+        semaphore = asyncio.Semaphore(SHARD_CONCURRENCY)
+
+        async def generate(index: int, shard: Tuple[str, str]) -> Tuple[int, str]:
+            async with semaphore:
+                return index, await self.ainvoke(self._build_input(*shard))
+
+        tasks = [asyncio.ensure_future(generate(i, shard)) for i, shard in enumerate(shards)]
+        finished: Dict[int, str] = {}
+        merged, next_index = "", 0
+        try:
+            for task in asyncio.as_completed(tasks):
+                index, output = await task
+                finished[index] = output
+                # Merge in shard order, so IDs do not depend on which shard finished first
+                while next_index in finished:
+                    merged, added = merge_test_cases(merged, finished.pop(next_index))
+                    if on_shard:
+                        on_shard(next_index, len(shards), added)
+                    next_index += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+        return merged
+
+    def _build_delta_input(self, requirements: str, affected_areas: List[str], recommendations: List[str],
+                           existing_test_cases: str) -> str:
+        existing = "\n".join(f"- {case.id}: {case.description}" for case in parse_test_cases(existing_test_cases))
+        return (
+            "A code change affects the areas listed below. Test cases for the application already exist. "
+            "Generate test cases only for behaviour in these areas that the existing test cases do not cover. "
+            "Do not repeat existing test cases. Use a Markdown table with the following columns: "
+            "Test ID, Description, Preconditions, Steps, Expected Result, Priority.\n\n"
+            "Affected Areas:\n" + "\n".join(f"- {area}" for area in affected_areas) + "\n\n"
+            "Change Impact Recommendations:\n" + "\n".join(f"- {item}" for item in recommendations) + "\n\n"
+            f"Software Requirements:\n{requirements}\n\n"
+            f"Existing Test Cases:\n{existing}"
+        )
+
+    def generate_delta_test_cases(self, requirements: str, affected_areas: List[str], recommendations: List[str],
+                                  existing_test_cases: str) -> str:
+        """
+        Generates test cases for just the areas a code change affects, given the existing test
+        cases (sent as IDs and descriptions only). Merge the result with `merge_test_cases`.
+        """
+        return self.invoke(self._build_delta_input(requirements, affected_areas, recommendations, existing_test_cases))
+
+    async def agenerate_delta_test_cases(self, requirements: str, affected_areas: List[str], recommendations: List[str],
+                                         existing_test_cases: str) -> str:
+        """
+        Async variant of `generate_delta_test_cases`.
+        """
+        return await self.ainvoke(self._build_delta_input(requirements, affected_areas, recommendations, existing_test_cases))
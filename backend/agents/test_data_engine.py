@@ -0,0 +1,389 @@
+import os
+import re
+import json
+import math
+import random
+import string
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+; the public sre_parse alias is deprecated there
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+from backend.models import FieldConstraint, TestDataSet
+
+# Step used for the just-outside values of non-integer ranges
+NUMBER_STEP = 0.01
+# Unbounded regex repeats (*, +, {n,}) are expanded at most this many times past their minimum
+MAX_REGEX_REPEAT = 8
+_FILLER = string.ascii_lowercase
+_PRINTABLE = string.ascii_letters + string.digits + string.punctuation + " "
+
+_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+_URL = re.compile(r"https?://[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*(?::\d+)?(?:[/?#]\S*)?")
+_VALID_EMAILS = ["user@example.com", "first.last+tag@mail.example.co.uk", "a@b.co", "user_01@example-domain.org"]
+_INVALID_EMAILS = ["plainaddress", "@example.com", "user@", "user@@example.com", "user@example", "user name@example.com"]
+_VALID_URLS = ["https://example.com", "http://example.com:8080/path?q=1#top", "https://sub.example.co.uk/a/b", "http://a.io"]
+_INVALID_URLS = ["example.com", "http://", "ftp//example.com", "https://exa mple.com", "://missing-scheme.com"]
+
+_CATEGORIES = {
+    sre_parse.CATEGORY_DIGIT: string.digits,
+    sre_parse.CATEGORY_NOT_DIGIT: string.ascii_letters + "_-",
+    sre_parse.CATEGORY_WORD: string.ascii_letters + string.digits + "_",
+    sre_parse.CATEGORY_NOT_WORD: " -.!@#",
+    sre_parse.CATEGORY_SPACE: " ",
+    sre_parse.CATEGORY_NOT_SPACE: string.ascii_letters + string.digits,
+}
+
+
+# --- Regex-driven strings ---
+
+def _class_chars(items: List[Tuple[Any, Any]]) -> str:
+    chars, negate = [], False
+    for op, av in items:
+        if op is sre_parse.NEGATE:
+            negate = True
+        elif op is sre_parse.LITERAL:
+            chars.append(chr(av))
+        elif op is sre_parse.RANGE:
+            chars.extend(chr(code) for code in range(av[0], min(av[1], av[0] + 94) + 1))
+        elif op is sre_parse.CATEGORY:
+            chars.extend(_CATEGORIES.get(av, ""))
+    if negate:
+        excluded = set(chars)
+        return "".join(char for char in _PRINTABLE if char not in excluded)
+    return "".join(dict.fromkeys(chars))
+
+
+def _compile(pattern: Any, strategy: str, rng: random.Random) -> Callable[[Dict[int, str]], str]:
+    """
+    Turns a parsed pattern into a function producing one string per call. Character classes and
+    repeat bounds are resolved once here, so generating many values costs only the random draws.
+    strategy: "min" (fewest repeats, first choices), "max" (most repeats, last choices) or "random".
+    """
+    def pick(options):
+        if strategy == "min":
+            return lambda: options[0]
+        if strategy == "max":
+            return lambda: options[-1]
+        return lambda: rng.choice(options)
+
+    parts: List[Callable[[Dict[int, str]], str]] = []
+    for op, av in pattern:
+        if op is sre_parse.LITERAL:
+            parts.append(lambda groups, char=chr(av): char)
+        elif op in (sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN):
+            if op is sre_parse.NOT_LITERAL:
+                options = "".join(char for char in _PRINTABLE if char != chr(av))
+            elif op is sre_parse.ANY:
+                options = string.ascii_letters + string.digits
+            else:
+                options = _class_chars(av) or "x"
+            parts.append(lambda groups, choose=pick(options): choose())
+        elif op is sre_parse.BRANCH:
+            branches = [_compile(branch, strategy, rng) for branch in av[1]]
+            parts.append(lambda groups, choose=pick(branches): choose()(groups))
+        elif op is sre_parse.SUBPATTERN or op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            group = av[0] if op is sre_parse.SUBPATTERN else None
+            inner = _compile(av[-1] if op is sre_parse.SUBPATTERN else av, strategy, rng)
+
+            def subpattern(groups, inner=inner, group=group):
+                text = inner(groups)
+                if group:
+                    groups[group] = text
+                return text
+            parts.append(subpattern)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) or op is getattr(sre_parse, "POSSESSIVE_REPEAT", None):
+            low, high, item = av
+            high = low + MAX_REGEX_REPEAT if high == sre_parse.MAXREPEAT else min(high, low + MAX_REGEX_REPEAT)
+            inner = _compile(item, strategy, rng)
+            if strategy == "random":
+                parts.append(lambda groups, inner=inner, low=low, high=high: "".join(inner(groups) for _ in range(rng.randint(low, high))))
+            else:
+                count = low if strategy == "min" else high
+                parts.append(lambda groups, inner=inner, count=count: "".join(inner(groups) for _ in range(count)))
+        elif op is sre_parse.GROUPREF:
+            parts.append(lambda groups, group=av: groups.get(group, ""))
+        # AT (anchors) and lookaround assertions emit nothing; results are checked with fullmatch
+    return lambda groups: "".join(part(groups) for part in parts)
+
+
+def regex_examples(pattern: str, count: int = 3, seed: int = 0) -> List[str]:
+    """
+    Strings that fully match `pattern`: the shortest, the longest (unbounded repeats capped at
+    MAX_REGEX_REPEAT) and seeded random ones, up to `count` distinct values.
+    """
+    parsed = sre_parse.parse(pattern)
+    compiled = re.compile(pattern)
+    rng = random.Random(seed)
+    generators = [_compile(parsed, "min", rng), _compile(parsed, "max", rng)] + [_compile(parsed, "random", rng)] * (count * 4)
+    examples: List[str] = []
+    for generate in generators:
+        if len(examples) >= count:
+            break
+        candidate = generate({})
+        if compiled.fullmatch(candidate) and candidate not in examples:
+            examples.append(candidate)
+    return examples
+
+
+def _regex_violations(pattern: str, valid: List[str]) -> List[str]:
+    compiled = re.compile(pattern)
+    candidates = [""] + [value[:-1] for value in valid[:1] if value] + [value + "!" for value in valid[:1]] + ["!@#", " "]
+    return [value for value in dict.fromkeys(candidates) if not compiled.fullmatch(value)]
+
+
+# --- Boundary values ---
+
+def _unique(values: Iterable[Any]) -> List[Any]:
+    # Order-preserving; keyed by type too, so 1, 1.0 and True stay distinct
+    seen, result = set(), []
+    for value in values:
+        key = (type(value).__name__, json.dumps(value, default=str))
+        if key not in seen:
+            seen.add(key)
+            result.append(value)
+    return result
+
+
+def _text(length: int) -> str:
+    return (_FILLER * (length // len(_FILLER) + 1))[:length]
+
+
+def _length_values(constraint: FieldConstraint, nominal: int) -> Tuple[List[int], List[int]]:
+    low = constraint.min_length or 0
+    high = constraint.max_length
+    if high is None:
+        valid = [low, low + 1, max(nominal, low)]
+        invalid = [low - 1] if low > 0 else []
+    else:
+        valid = [low, low + 1, (low + high) // 2, high - 1, high]
+        invalid = ([low - 1] if low > 0 else []) + [high + 1]
+    top = high if high is not None else float("inf")
+    return [length for length in dict.fromkeys(valid) if low <= length <= top], invalid
+
+
+def _sized(base: str, length: int, kind: str) -> str:
+    # `base` padded to `length`: the local part of an email grows, a URL gets a longer path
+    padding = _text(length - len(base))
+    if kind == "email":
+        at = base.index("@")
+        return base[:at] + padding + base[at:]
+    return base + "/" + padding[1:] if padding else base
+
+
+def boundary_values(constraint: FieldConstraint, seed: int = 0) -> Dict[str, List[Any]]:
+    """
+    Valid and invalid values of one field: range and length boundaries (min, min+1, mid,
+    max-1, max and just outside), format samples and violations, and wrong types.
+    """
+    kind = constraint.type.lower()
+    valid: List[Any] = []
+    invalid: List[Any] = []
+    if kind in ("integer", "int", "number", "float"):
+        integer = kind in ("integer", "int")
+        step = 1 if integer else NUMBER_STEP
+        low, high = constraint.minimum, constraint.maximum
+        if integer:
+            # Fractional bounds of an integer field: the nearest integers inside the range
+            low = math.ceil(low) if low is not None else None
+            high = math.floor(high) if high is not None else None
+        cast = int if integer else float
+        if low is not None and high is not None:
+            valid = [cast(low), cast(low) + step, cast((low + high) / 2), cast(high) - step, cast(high)]
+        elif low is not None:
+            valid = [cast(low), cast(low) + step, cast(low) + 100 * step]
+        elif high is not None:
+            valid = [cast(high) - 100 * step, cast(high) - step, cast(high)]
+        else:
+            valid = [cast(0), cast(1), cast(-1)]
+        if low is not None:
+            invalid.append(round(cast(low) - step, 10))
+        if high is not None:
+            invalid.append(round(cast(high) + step, 10))
+        invalid.append("abc")
+        if integer:
+            invalid.append(1.5)
+        valid = [round(value, 10) if isinstance(value, float) else value for value in valid]
+        if low is not None and high is not None:
+            valid = [value for value in valid if low <= value <= high]
+    elif kind == "boolean" or kind == "bool":
+        valid, invalid = [True, False], ["yes", 2]
+    elif kind == "enum":
+        allowed = list(constraint.values or [])
+        valid = allowed
+        invalid = [value for value in ["", "INVALID_OPTION"] if value not in allowed]
+    elif kind in ("email", "url"):
+        samples, violations, pattern = (_VALID_EMAILS, _INVALID_EMAILS, _EMAIL) if kind == "email" else (_VALID_URLS, _INVALID_URLS, _URL)
+        valid = list(samples)
+        invalid = list(violations)
+        if constraint.min_length is not None or constraint.max_length is not None:
+            low = constraint.min_length or 0
+            high = constraint.max_length if constraint.max_length is not None else float("inf")
+            base = min(samples, key=len)
+            lengths, outside = _length_values(constraint, len(base))
+            sized = [_sized(base, length, kind) for length in lengths if length >= len(base)]
+            valid = [value for value in valid + sized if low <= len(value) <= high and pattern.fullmatch(value)]
+            invalid += [_sized(base, length, kind) for length in outside if length >= len(base)]
+    else:  # string
+        if constraint.pattern:
+            valid = regex_examples(constraint.pattern, count=4, seed=seed)
+            low = constraint.min_length or 0
+            high = constraint.max_length if constraint.max_length is not None else float("inf")
+            valid = [value for value in valid if low <= len(value) <= high]
+            invalid = _regex_violations(constraint.pattern, valid)
+        else:
+            lengths, outside = _length_values(constraint, 10)
+            valid = [_text(length) for length in lengths]
+            invalid = [_text(length) for length in outside]
+        invalid.append(12345)
+    if constraint.required:
+        invalid.append(None)
+    return {"valid": _unique(valid), "invalid": _unique(invalid)}
+
+
+# --- Combinations ---
+
+def pairwise(parameters: Dict[str, List[Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Rows covering every pair of values of every two parameters (all-pairs), built greedily and
+    deterministically: each row starts from the first uncovered pair and fills the remaining
+    parameters with the value covering the most uncovered pairs.
+    """
+    names = [name for name, values in parameters.items() if values]
+    options = [parameters[name] for name in names]
+    if len(names) < 2:
+        for name, values in zip(names, options):
+            for value in values:
+                yield {name: value}
+        return
+    uncovered = {
+        (i, a, j, b)
+        for i in range(len(names)) for j in range(i + 1, len(names))
+        for a in range(len(options[i])) for b in range(len(options[j]))
+    }
+    pending = sorted(uncovered)
+    cursor = 0
+    while uncovered:
+        while pending[cursor] not in uncovered:
+            cursor += 1
+        i, a, j, b = pending[cursor]
+        row = {i: a, j: b}
+        for k in range(len(names)):
+            if k in row:
+                continue
+            best, best_score = 0, -1
+            for c in range(len(options[k])):
+                score = sum(
+                    1 for m, v in row.items()
+                    if ((m, v, k, c) if m < k else (k, c, m, v)) in uncovered
+                )
+                if score > best_score:
+                    best, best_score = c, score
+            row[k] = best
+        indices = sorted(row)
+        for x in range(len(indices)):
+            for y in range(x + 1, len(indices)):
+                p, q = indices[x], indices[y]
+                uncovered.discard((p, row[p], q, row[q]))
+        yield {names[k]: options[k][row[k]] for k in range(len(names))}
+
+
+def generate_rows(constraints: List[FieldConstraint], seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Deterministic records for the constraints: pairwise combinations of every field's valid
+    values ({"kind": "valid"}), then one record per invalid value of each field, with the other
+    fields at a nominal valid value ({"kind": "invalid", "field": <name>}).
+    """
+    values = {constraint.name: boundary_values(constraint, seed) for constraint in constraints}
+    nominal = {name: v["valid"][len(v["valid"]) // 2] if v["valid"] else None for name, v in values.items()}
+    for row in pairwise({name: v["valid"] for name, v in values.items()}):
+        yield {"kind": "valid", "data": {**nominal, **row}}
+    for name, v in values.items():
+        for value in v["invalid"]:
+            yield {"kind": "invalid", "field": name, "data": {**nominal, name: value}}
+
+
+def _random_generator(constraint: FieldConstraint, rng: random.Random, seed: int) -> Callable[[], Any]:
+    # Set up once per field, so each row costs only the random draws
+    kind = constraint.type.lower()
+    low, high = constraint.minimum, constraint.maximum
+    if kind in ("integer", "int") and low is not None and high is not None and math.ceil(low) <= math.floor(high):
+        return lambda: rng.randint(math.ceil(low), math.floor(high))
+    if kind in ("number", "float") and low is not None and high is not None:
+        return lambda: round(rng.uniform(low, high), 2)
+    if kind == "string" and not constraint.pattern:
+        shortest = constraint.min_length or 0
+        longest = constraint.max_length if constraint.max_length is not None else shortest + 32
+        alphabet = string.ascii_letters + string.digits
+        return lambda: "".join(rng.choices(alphabet, k=rng.randint(shortest, longest)))
+    valid = boundary_values(constraint, seed)["valid"] or [None]
+    if kind == "string" and constraint.pattern:
+        generate, compiled = _compile(sre_parse.parse(constraint.pattern), "random", rng), re.compile(constraint.pattern)
+
+        def from_pattern():
+            candidate = generate({})
+            return candidate if compiled.fullmatch(candidate) else rng.choice(valid)
+        return from_pattern
+    return lambda: rng.choice(valid)
+
+
+def random_rows(constraints: List[FieldConstraint], count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """`count` seeded random valid records ({"kind": "random"}), generated lazily."""
+    rng = random.Random(seed)
+    generators = [(constraint.name, _random_generator(constraint, rng, seed)) for constraint in constraints]
+    for _ in range(count):
+        yield {"kind": "random", "data": {name: generate() for name, generate in generators}}
+
+
+def stream_jsonl(rows: Iterable[Dict[str, Any]], path: str) -> int:
+    """Writes records to `path` as JSON lines, one at a time; returns the number written."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    written = 0
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str))
+            f.write("\n")
+            written += 1
+    return written
+
+
+def build_dataset(constraints: List[FieldConstraint], path: str, extra_rows: int = 0, seed: int = 0) -> int:
+    """Streams `generate_rows` followed by `extra_rows` random valid records to a JSONL file."""
+    def rows():
+        yield from generate_rows(constraints, seed)
+        yield from random_rows(constraints, extra_rows, seed)
+    return stream_jsonl(rows(), path)
+
+
+def constraint_data(constraints: List[FieldConstraint], seed: int = 0) -> TestDataSet:
+    """Valid and invalid values per field plus the deterministic records, as a test data record."""
+    fields = {}
+    for constraint in constraints:
+        values = boundary_values(constraint, seed)
+        fields[constraint.name] = values["valid"] + values["invalid"]
+    return TestDataSet(fields=fields, rows=list(generate_rows(constraints, seed)))
+
+
+def describe_constraints(constraints: List[FieldConstraint]) -> str:
+    """One line per field, for prompts, e.g. "- email: email, length 5-254, required"."""
+    lines = []
+    for constraint in constraints:
+        parts = [constraint.type]
+        if constraint.min_length is not None or constraint.max_length is not None:
+            parts.append(f"length {constraint.min_length or 0}-{constraint.max_length if constraint.max_length is not None else 'any'}")
+        if constraint.minimum is not None or constraint.maximum is not None:
+            parts.append(f"range {constraint.minimum if constraint.minimum is not None else '-inf'}-{constraint.maximum if constraint.maximum is not None else 'inf'}")
+        if constraint.pattern:
+            parts.append(f"pattern {constraint.pattern}")
+        if constraint.values:
+            parts.append("one of " + ", ".join(str(value) for value in constraint.values))
+        parts.append("required" if constraint.required else "optional")
+        lines.append(f"- {constraint.name}: " + ", ".join(parts))
+    return "\n".join(lines)
+
+
+def parse_constraints(items: Optional[List[Any]]) -> List[FieldConstraint]:
+    """Constraints from request input (dicts or models); an empty list when none were given."""
+    return [item if isinstance(item, FieldConstraint) else FieldConstraint(**item) for item in items or []]
@@ -1,10 +1,30 @@
+import re
+import json
 from backend.agents.base import AIAgent, file_writer_tool
+from backend.models import TestDataSet
 from langchain_core.tools import StructuredTool
 from typing import List
 
-from backend.agents.base import AIAgent, file_writer_tool
-from langchain_core.tools import StructuredTool
-from typing import List
+_JSON_BLOCK = re.compile(r"```[ \t]*(?:json)?[^\n]*\n(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+def parse_test_data(text: str) -> TestDataSet:
+    """
+    Test data record of a generated reply: the first JSON object found (fenced or bare), with
+    single values wrapped in lists. Empty when the reply holds no JSON object.
+    """
+    candidates = _JSON_BLOCK.findall(text)
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return TestDataSet(fields={str(key): value if isinstance(value, list) else [value] for key, value in data.items()})
+    return TestDataSet()
  
  
 class TestDataGenerationAgent(AIAgent):
@@ -21,12 +41,18 @@ class TestDataGenerationAgent(AIAgent):
             tools=[file_writer_tool]
         )
  
-    def generate_test_data(self, test_cases_summary: str, constraints: str) -> str:
-        """
-        Generates diverse test data based on test case summaries and constraints.
-        Returns data in JSON-like string format.
-        """
-        input_text = (
+    def _build_input(self, test_cases_summary: str, constraints: str, examples_only: bool = False) -> str:
+        if examples_only:
+            return (
+                "Boundary, invalid and combinatorial values for the fields below are generated separately "
+                "from their constraints. Based on the test case summary, provide only realistic, "
+                "domain-meaningful valid examples for each field (e.g. plausible names, addresses, product "
+                "terms) that a rule-based generator could not invent.\n\n"
+                "Output format: JSON with field names as keys and arrays of values.\n\n"
+                f"Test Case Summary:\n{test_cases_summary}\n\n"
+                f"Fields:\n{constraints}"
+            )
+        return (
             "Based on the test case summary and data constraints below, generate test data covering:\n"
             "- Valid values\n"
             "- Invalid values\n"
@@ -37,9 +63,12 @@ class TestDataGenerationAgent(AIAgent):
             f"Constraints:\n{constraints}"
         )
  
-        response = self.get_runnable().invoke({"input": input_text})
- 
-        generated_content = response.content if hasattr(response, "content") else str(response)
+    def generate_test_data(self, test_cases_summary: str, constraints: str, examples_only: bool = False) -> str:
+        """
+        Generates diverse test data based on test case summaries and constraints.
+        Returns data in JSON-like string format.
+        """
+        generated_content = self.invoke(self._build_input(test_cases_summary, constraints, examples_only))
  
         # Optional: write to file (uncomment if needed)
         # file_writer_tool.run({
@@ -47,4 +76,11 @@ class TestDataGenerationAgent(AIAgent):
         #     "content": generated_content
         # })
  
-        return generated_content
\ No newline at end of file
+        return generated_content
+
+    async def agenerate_test_data(self, test_cases_summary: str, constraints: str, examples_only: bool = False) -> str:
+        """
+        Async variant of `generate_test_data`. With `examples_only`, asks only for semantically
+        meaningful examples, for merging with locally generated data (see test_data_engine).
+        """
+        return await self.ainvoke(self._build_input(test_cases_summary, constraints, examples_only))
\ No newline at end of file
@@ -1,6 +1,29 @@
 from backend.agents.base import AIAgent, file_writer_tool, code_execution_tool
+from backend.agents.dependency_index import find_test_case_ids
+from backend.agents.test_case_generator import format_test_cases
+from backend.execution.pytest_runner import extract_test_modules
+from backend.models import TestScript
 
 from langchain_core.tools import StructuredTool
+from typing import Any, Dict, List
+
+# Test case fields a script is generated from (priority doesn't change the script)
+SCRIPT_FIELDS = ["id", "description", "preconditions", "steps", "expected_result"]
+
+
+def parse_scripts(scripts: str) -> List[TestScript]:
+    """
+    Script records of generated Python scripts, named as the test runner names their modules
+    (test_generated_<n>.py), each with the test case IDs it mentions.
+    """
+    return [
+        TestScript(
+            name=f"test_generated_{i}.py",
+            code=source,
+            test_case_ids=find_test_case_ids(source),
+        )
+        for i, source in enumerate(extract_test_modules(scripts))
+    ]
  
  
 class TestScriptAutomationAgent(AIAgent):
@@ -33,15 +56,9 @@ class TestScriptAutomationAgent(AIAgent):
 
         )
  
-    def automate_script(self, test_cases: str, framework: str = "Python Playwright") -> str:
-
-        """
+    def _build_input(self, test_cases: str, framework: str) -> str:
 
-        Generates automated test scripts based on structured test cases and the specified framework.
-
-        """
-
-        input_text = (
+        return (
 
             f"Transform the following structured test cases into automated test scripts using the framework: {framework}.\n\n"
 
@@ -51,9 +68,15 @@ class TestScriptAutomationAgent(AIAgent):
 
         )
  
-        response = self.get_runnable().invoke({"input": input_text})
+    def automate_script(self, test_cases: str, framework: str = "Python Playwright") -> str:
+
+        """
+
+        Generates automated test scripts based on structured test cases and the specified framework.
 
-        generated_script = response.content if hasattr(response, "content") else str(response)
+        """
+
+        generated_script = self.invoke(self._build_input(test_cases, framework))
  
         # Optional: write to file
 
@@ -66,4 +89,32 @@ class TestScriptAutomationAgent(AIAgent):
         # })
  
         return generated_script
+ 
+    async def aautomate_script(self, test_cases: str, framework: str = "Python Playwright") -> str:
+
+        """
+
+        Async variant of `automate_script`.
+
+        """
+
+        return await self.ainvoke(self._build_input(test_cases, framework))
+
+    async def aautomate_scripts(self, test_cases: List[Dict[str, Any]], frameworks: List[str]) -> Dict[str, Any]:
+        """
+        Generates one script per test case record and framework, all concurrently (bounded by the
+        LLM throttle). Each prompt holds a single test case, so the scripts of unchanged test
+        cases come from the LLM response cache. Returns {"scripts": {framework: scripts in test
+        case order}, "generated": n}.
+        """
+        jobs = [(framework, case) for framework in frameworks for case in test_cases]
+        replies = await self.abatch([self._build_input(format_test_cases([case], SCRIPT_FIELDS), framework) for framework, case in jobs])
+        scripts: Dict[str, List[str]] = {framework: [] for framework in frameworks}
+        for (framework, _), script in zip(jobs, replies):
+            if script.strip():
+                scripts[framework].append(script.strip())
+        return {
+            "scripts": {framework: "\n\n".join(parts) for framework, parts in scripts.items()},
+            "generated": len(jobs),
+        }
  
\ No newline at end of file
@@ -41,15 +41,9 @@ class TestSummaryReportAgent(AIAgent):
 
         )
  
-    def generate_report(self, execution_data: str, bug_reports: str, test_coverage: str) -> str:
-
-        """
+    def _build_input(self, execution_data: str, bug_reports: str, test_coverage: str) -> str:
 
-        Generates a structured test summary report from execution logs, bug reports, and test coverage input.
-
-        """
-
-        input_text = (
+        return (
 
             "Based on the following data, generate a professional and concise test summary report:\n\n"
 
@@ -67,9 +61,15 @@ class TestSummaryReportAgent(AIAgent):
 
         )
  
-        response = self.get_runnable().invoke({"input": input_text})
+    def generate_report(self, execution_data: str, bug_reports: str, test_coverage: str) -> str:
 
-        summary_report = response.content if hasattr(response, "content") else str(response)
+        """
+
+        Generates a structured test summary report from execution logs, bug reports, and test coverage input.
+
+        """
+
+        summary_report = self.invoke(self._build_input(execution_data, bug_reports, test_coverage))
  
         # Optional: Save to file
 
@@ -82,4 +82,14 @@ class TestSummaryReportAgent(AIAgent):
         # })
  
         return summary_report
+ 
+    async def agenerate_report(self, execution_data: str, bug_reports: str, test_coverage: str) -> str:
+
+        """
+
+        Async variant of `generate_report`.
+
+        """
+
+        return await self.ainvoke(self._build_input(execution_data, bug_reports, test_coverage))
  
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Offline micro-benchmark of the STLC orchestrator, driven by the deterministic fake LLM.
+
+Every scenario exercises one branch of the graph:
+- no_diffs:            straight path, no change impact analysis
+- change_impact:       low-impact diff, one pass through change impact analysis
+- change_impact_loop:  new-feature diff, loops back to test case generation
+- self_healing:        execution failure that triggers self-healing
+- bugs_present:        execution failures that produce bug reports
+
+For each scenario the report has the median wall time with the configured fake latency,
+per-node latency, graph overhead (wall time with a zero-latency LLM, i.e. everything that is
+not the model), peak traced memory, and the LLM call count. A throughput section runs many
+pipelines concurrently. Output is JSON. Pass `--compare baseline.json` to fail (exit 1) when a
+metric regresses by more than `--tolerance`.
+
+Usage:
+    python -m backend.benchmarks.orchestrator --repeats 5 --latency 0.05 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+import contextlib
+import io
+from typing import Any, Dict, List, Optional
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "no_diffs": {"requirements": "Users log in with username and password and land on the dashboard."},
+    "change_impact": {
+        "requirements": "Users log in with username and password and land on the dashboard.",
+        "code_diffs": "--- a/static/login.css\n+++ b/static/login.css\n-.ui-button { color: blue; }\n+.ui-button { color: navy; }\n",
+    },
+    "change_impact_loop": {
+        "requirements": "Users log in with username and password and land on the dashboard.",
+        "code_diffs": "--- a/app/export.py\n+++ b/app/export.py\n+# new_feature: CSV export of the dashboard\n+def export_csv(rows): ...\n",
+    },
+    "self_healing": {"requirements": "Users log in and call the users API. simulated_self_healing_needed"},
+    "bugs_present": {"requirements": "Users search products and check out. simulated_bug_present"},
+}
+
+# Metrics compared against a baseline (lower is better for all of them)
+COMPARED_METRICS = ["wall_seconds", "overhead_seconds", "peak_memory_kb"]
+
+
+def _configure_environment(workdir: str) -> None:
+    # Must run before any backend module is imported: they read their configuration at import.
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["STLC_TEST_CACHE_ENABLED"] = "false"
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"  # 0 disables the quota buckets
+    os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+    os.environ["LLM_MAX_CONCURRENCY"] = "100000"
+    os.environ["STLC_RUN_STORE_PATH"] = os.path.join(workdir, "stlc_runs.sqlite")
+    os.chdir(workdir)  # artifacts/ is written relative to the working directory
+
+
+class _NodeTimer:
+    """Callback handler recording start/end times of graph nodes."""
+
+    def __init__(self):
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        timer = self
+
+        class Handler(BaseCallbackHandler):
+            def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+                node = (metadata or {}).get("langgraph_node")
+                if node and kwargs.get("name") == node:
+                    timer.started[run_id] = (node, time.perf_counter())
+
+            def on_chain_end(self, outputs, *, run_id, **kwargs):
+                if run_id in timer.started:
+                    node, started = timer.started.pop(run_id)
+                    timer.durations.setdefault(node, []).append(time.perf_counter() - started)
+
+        self.started: Dict[Any, Any] = {}
+        self.durations: Dict[str, List[float]] = {}
+        self.handler = Handler()
+
+
+def _run_once(orchestrator, initial_state: Dict[str, Any], trace_memory: bool = True) -> Dict[str, Any]:
+    timer = _NodeTimer()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  # nodes print progress; keep the JSON clean
+            orchestrator.run_stlc(initial_state, config={"callbacks": [timer.handler]})
+    except Exception as e:
+        status = f"error: {type(e).__name__}: {e}"
+    wall = time.perf_counter() - started
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "status": status,
+        "wall": wall,
+        "peak_kb": peak / 1024,
+        "nodes": {node: sum(values) for node, values in timer.durations.items()},
+    }
+
+
+def _make_orchestrator(latency: float, output_chars: int, failure_rate: float, seed: int):
+    from backend.agents.base import set_llm
+    from backend.agents.providers import FakeChatModel
+    from backend.orchestrator.stlc_orchestrator import Orchestrator
+
+    model = FakeChatModel(latency_seconds=latency, output_chars=output_chars, failure_rate=failure_rate, seed=seed)
+    set_llm(model)
+    return Orchestrator(), model
+
+
+def run_scenarios(repeats: int, latency: float, output_chars: int, failure_rate: float, seed: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, initial_state in SCENARIOS.items():
+        orchestrator, model = _make_orchestrator(latency, output_chars, failure_rate, seed)
+        runs = [_run_once(orchestrator, initial_state, trace_memory=False) for _ in range(repeats)]
+        # Memory is traced in a separate run: tracemalloc slows everything down considerably.
+        peak_kb = _run_once(orchestrator, initial_state)["peak_kb"]
+        calls_per_run = model.stats["calls"] / (repeats + 1)
+
+        bare, _ = _make_orchestrator(0.0, output_chars, 0.0, seed)
+        overhead = [_run_once(bare, initial_state, trace_memory=False)["wall"] for _ in range(repeats)]
+
+        node_names = sorted({node for run in runs for node in run["nodes"]})
+        results[name] = {
+            "status": runs[-1]["status"],
+            "wall_seconds": round(statistics.median(run["wall"] for run in runs), 5),
+            "overhead_seconds": round(statistics.median(overhead), 5),
+            "peak_memory_kb": round(peak_kb, 1),
+            "llm_calls_per_run": calls_per_run,
+            "nodes": {
+                node: round(statistics.median(run["nodes"].get(node, 0.0) for run in runs), 5)
+                for node in node_names
+            },
+        }
+    return results
+
+
+def run_throughput(runs: int, concurrency: int, latency: float, output_chars: int, seed: int) -> Dict[str, Any]:
+    orchestrator, _ = _make_orchestrator(latency, output_chars, 0.0, seed)
+    initial_states = [{"requirements": f"Requirement document {i}: users log in."} for i in range(runs)]
+
+    async def drive() -> float:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            async for _ in orchestrator.abatch_stlc(initial_states, max_concurrency=concurrency):
+                pass
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(drive())
+    return {
+        "runs": runs,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 4),
+        "runs_per_second": round(runs / elapsed, 3),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Returns a description of every metric that is worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for name, metrics in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for metric in COMPARED_METRICS:
+            if base.get(metric) and metrics[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {base[metric]} -> {metrics[metric]}")
+    base_throughput = baseline.get("throughput", {}).get("runs_per_second")
+    if base_throughput and report["throughput"]["runs_per_second"] < base_throughput * (1 - tolerance):
+        regressions.append(f"throughput.runs_per_second: {base_throughput} -> {report['throughput']['runs_per_second']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency per call, in seconds.")
+    parser.add_argument("--output-chars", type=int, default=2000, help="Size of each fake LLM reply.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--throughput-runs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    parser.add_argument("--compare", help="Baseline report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    with tempfile.TemporaryDirectory(prefix="stlc-bench-") as workdir:
+        _configure_environment(workdir)
+        report = {
+            "config": vars(args),
+            "scenarios": run_scenarios(args.repeats, args.latency, args.output_chars, args.failure_rate, args.seed),
+            "throughput": run_throughput(args.throughput_runs, args.concurrency, args.latency, args.output_chars, args.seed),
+        }
+
+    exit_code = 0
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
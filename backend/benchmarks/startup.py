@@ -0,0 +1,121 @@
+"""
+Cold-start benchmark for the backend.
+
+Measures, in fresh interpreter processes:
+- import time of `backend.main` (what every new Cloud Run instance pays before serving), and
+- time to first response: from launching uvicorn until the first successful HTTP response.
+
+Results are printed as JSON. With budgets set (flags or STARTUP_*_BUDGET_SECONDS env vars) the
+script exits non-zero when the median exceeds the budget, so it can gate CI.
+
+Usage:
+    python -m backend.benchmarks.startup --runs 5 --import-budget 1.5 --first-response-budget 3
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import backend.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_CLOUD_PROJECT", "startup-benchmark")
+    env.setdefault("GOOGLE_CLOUD_REGION", "us-central1")
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=REPO_ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_response(path: str, timeout: float) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited before serving a response")
+                time.sleep(0.01)
+        raise TimeoutError(f"No response from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _summary(samples: List[float], budget: Optional[float]) -> Dict:
+    median = statistics.median(samples)
+    return {
+        "samples": [round(sample, 4) for sample in samples],
+        "median": round(median, 4),
+        "max": round(max(samples), 4),
+        "budget": budget,
+        "within_budget": budget is None or median <= budget,
+    }
+
+
+def _env_budget(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--path", default="/", help="Endpoint polled for the first response.")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--import-budget", type=float, default=_env_budget("STARTUP_IMPORT_BUDGET_SECONDS"))
+    parser.add_argument("--first-response-budget", type=float, default=_env_budget("STARTUP_FIRST_RESPONSE_BUDGET_SECONDS"))
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args(argv)
+
+    report = {
+        "import_seconds": _summary([measure_import() for _ in range(args.runs)], args.import_budget),
+        "first_response_seconds": _summary(
+            [measure_first_response(args.path, args.timeout) for _ in range(args.runs)], args.first_response_budget
+        ),
+    }
+    report["within_budget"] = all(section["within_budget"] for section in report.values())
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    return 0 if report["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import os
+import gzip
+import heapq
+import hashlib
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, Iterable, List, Optional, Union
+
+from backend.agents.issue_clustering import normalize
+
+# Size limits of the aggregate, so memory stays bounded however large the results are
+SLOWEST_TESTS = 20
+MAX_FAILURE_SIGNATURES = 500
+MAX_SUITES = 2000
+_OTHER = "(other)"
+
+# Reports read from the server's file system (`?path=`, `test_results_path`) must lie under this
+# directory; client-supplied paths are resolved against it
+RESULTS_ROOT = os.getenv("STLC_RESULTS_ROOT", "results")
+
+_OUTCOMES = {"failure": "failed", "error": "error", "skipped": "skipped"}
+
+
+class ResultAggregator:
+    """
+    Running totals over test results: counts per outcome, per-suite stats, the slowest tests and
+    failures grouped by signature (exception type and normalized first message line). Memory
+    depends on the limits above, not on the number of tests added.
+    """
+
+    def __init__(self, slowest: int = SLOWEST_TESTS):
+        self.counts = {"passed": 0, "failed": 0, "error": 0, "skipped": 0}
+        self.duration = 0.0
+        self.suites: Dict[str, Dict[str, Any]] = {}
+        self.signatures: Dict[str, Dict[str, Any]] = {}
+        self._slowest: List[tuple] = []
+        self._slowest_size = slowest
+        self._sequence = 0
+
+    def add(self, test_id: str, suite: str, outcome: str, duration: float, message: str = "", kind: str = "") -> None:
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        self.duration += duration
+        if suite not in self.suites and len(self.suites) >= MAX_SUITES:
+            suite = _OTHER
+        stats = self.suites.setdefault(suite, {"tests": 0, "passed": 0, "failed": 0, "error": 0, "skipped": 0, "duration": 0.0})
+        stats["tests"] += 1
+        stats[outcome] = stats.get(outcome, 0) + 1
+        stats["duration"] += duration
+
+        # Min-heap of the N slowest; the sequence number keeps ties from comparing IDs
+        self._sequence += 1
+        entry = (duration, self._sequence, test_id)
+        if len(self._slowest) < self._slowest_size:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+        if outcome in ("failed", "error"):
+            first_line = message.strip().splitlines()[0] if message.strip() else ""
+            text = f"{kind or outcome}: {normalize(first_line)}"
+            key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            if key not in self.signatures and len(self.signatures) >= MAX_FAILURE_SIGNATURES:
+                key = _OTHER
+            group = self.signatures.setdefault(key, {
+                "signature": text if key != _OTHER else _OTHER, "type": kind or outcome,
+                "example_message": first_line[:300], "example_test": test_id, "count": 0,
+            })
+            group["count"] += 1
+
+    def add_results(self, results: Iterable[Dict[str, Any]]) -> "ResultAggregator":
+        """Adds results in the form of `parse_junit_xml` / `arun_pytest` ({"id", "outcome", "duration", "message"})."""
+        for result in results:
+            suite = result["id"].split("::")[0]
+            self.add(result["id"], suite, result["outcome"], float(result.get("duration") or 0.0), result.get("message", ""))
+        return self
+
+    def aggregate(self) -> Dict[str, Any]:
+        total = sum(self.counts.values())
+        return {
+            "total": total,
+            "counts": dict(self.counts),
+            "pass_rate": round(self.counts["passed"] / (total - self.counts["skipped"]), 4) if total > self.counts["skipped"] else None,
+            "duration": round(self.duration, 3),
+            "slowest": [{"id": test_id, "duration": round(duration, 3)} for duration, _, test_id in sorted(self._slowest, reverse=True)],
+            "failure_signatures": sorted(self.signatures.values(), key=lambda group: -group["count"]),
+            "suites": {
+                name: {**stats, "duration": round(stats["duration"], 3)}
+                for name, stats in sorted(self.suites.items(), key=lambda item: (-(item[1]["failed"] + item[1]["error"]), item[0]))
+            },
+        }
+
+
+def _open(source: Union[str, IO[bytes]]) -> IO[bytes]:
+    if isinstance(source, str):
+        return gzip.open(source, "rb") if source.endswith(".gz") else open(source, "rb")
+    if hasattr(source, "peek"):
+        head = source.peek(2)[:2]
+    elif source.seekable():
+        head = source.read(2)
+        source.seek(0)
+    else:
+        head = b""
+    return gzip.GzipFile(fileobj=source) if head == b"\x1f\x8b" else source
+
+
+def ingest_junit(source: Union[str, IO[bytes]], aggregator: Optional[ResultAggregator] = None) -> ResultAggregator:
+    """
+    Streams a JUnit XML report (a path, optionally .gz, or a binary file object) into
+    `aggregator`. Elements are dropped as soon as they are counted, so memory stays constant
+    however many test cases the file holds.
+    """
+    aggregator = aggregator or ResultAggregator()
+    stream = _open(source)
+    try:
+        stack: List[ET.Element] = []
+        suites: List[str] = []
+        for event, element in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                if element.tag == "testsuite":
+                    suites.append(element.get("name") or "")
+                continue
+            stack.pop()
+            if element.tag == "testcase":
+                outcome, message, kind = "passed", "", ""
+                for child in element:
+                    if child.tag in _OUTCOMES:
+                        outcome = _OUTCOMES[child.tag]
+                        message = child.get("message") or child.text or ""
+                        kind = child.get("type") or ""
+                        break
+                classname = element.get("classname") or ""
+                name = element.get("name") or ""
+                aggregator.add(
+                    f"{classname}::{name}" if classname else name,
+                    classname or (suites[-1] if suites else ""),
+                    outcome, float(element.get("time") or 0.0), message, kind,
+                )
+            elif element.tag == "testsuite":
+                suites.pop()
+            # Drop finished test cases and suite-level elements; the children of a test case stay
+            # until the test case itself has been counted
+            if stack and stack[-1].tag in ("testsuite", "testsuites"):
+                stack[-1].remove(element)
+                element.clear()
+    finally:
+        if isinstance(source, str) or stream is not source:
+            stream.close()
+    return aggregator
+
+
+def _report_files(path: str) -> List[str]:
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith((".xml", ".xml.gz"))]
+    return [path]
+
+
+def source_stamp(path: str) -> Optional[str]:
+    """Size and mtime of the report file(s) at `path`, so a replaced nightly report is seen as a new input."""
+    try:
+        stats = [os.stat(name) for name in _report_files(path)]
+    except OSError:
+        return None
+    return ",".join(f"{stat.st_size}:{stat.st_mtime_ns}" for stat in stats)
+
+
+def aggregate_junit(sources: Union[str, IO[bytes], List[Union[str, IO[bytes]]]]) -> Dict[str, Any]:
+    """Aggregate of one or more JUnit XML reports; a directory path means every *.xml(.gz) in it."""
+    if not isinstance(sources, list):
+        sources = [sources]
+    aggregator = ResultAggregator()
+    for source in sources:
+        if isinstance(source, str):
+            for name in _report_files(source):
+                ingest_junit(name, aggregator)
+        else:
+            ingest_junit(source, aggregator)
+    return aggregator.aggregate()
+
+
+def format_aggregate(aggregate: Dict[str, Any], top: int = 10) -> str:
+    """Compact Markdown of an aggregate for the summary agent: totals, top failures, slowest tests, worst suites."""
+    counts = aggregate["counts"]
+    if not aggregate["total"]:
+        return "No test results."
+    pass_rate = f"{aggregate['pass_rate'] * 100:.1f}%" if aggregate["pass_rate"] is not None else "n/a"
+    lines = [
+        f"Total: {aggregate['total']} tests in {aggregate['duration']}s; {counts['passed']} passed, {counts['failed']} failed, "
+        f"{counts['error']} errors, {counts['skipped']} skipped (pass rate {pass_rate})."
+    ]
+    if aggregate["failure_signatures"]:
+        lines.append(f"\nTop failure signatures ({len(aggregate['failure_signatures'])} distinct):")
+        for group in aggregate["failure_signatures"][:top]:
+            message = group["example_message"]
+            label = message if message.startswith(group["type"]) else f"{group['type']}: {message or '(no message)'}"
+            lines.append(f"- {group['count']}x {label} (e.g. {group['example_test']})")
+    failing_suites = [(name, stats) for name, stats in aggregate["suites"].items() if stats["failed"] or stats["error"]]
+    if failing_suites:
+        lines.append(f"\nSuites with failures ({len(failing_suites)} of {len(aggregate['suites'])}):")
+        lines.extend(
+            f"- {name}: {stats['failed'] + stats['error']}/{stats['tests']} failing, {stats['duration']}s"
+            for name, stats in failing_suites[:top]
+        )
+    if aggregate["slowest"]:
+        lines.append("\nSlowest tests:")
+        lines.extend(f"- {test['id']}: {test['duration']}s" for test in aggregate["slowest"][:top])
+    return "\n".join(lines)
@@ -0,0 +1,366 @@
+import os
+import re
+import ast
+import sys
+import time
+import shutil
+import asyncio
+import tempfile
+import importlib.util
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+from backend.agents.dependency_index import find_test_case_ids
+from backend.execution.result_cache import TestResultCache
+
+try:
+    import resource  # POSIX only; memory limits are skipped elsewhere
+except ImportError:
+    resource = None
+
+# Execution limits; every shard is a separate pytest process
+TEST_TIMEOUT_SECONDS = float(os.getenv("STLC_TEST_TIMEOUT_SECONDS", 30))
+TEST_MEMORY_LIMIT_MB = int(os.getenv("STLC_TEST_MEMORY_LIMIT_MB", 1024))
+EXECUTION_WORKERS = int(os.getenv("STLC_EXECUTION_WORKERS", 0)) or os.cpu_count() or 1
+
+_CODE_BLOCK = re.compile(r"```[ \t]*([^\n]*)\n(.*?)```", re.DOTALL)
+_PYTHON_LANGUAGES = {"", "python", "python3", "py"}
+
+# Selects the shard's tests and enforces the per-test timeout inside each pytest process
+# (pytest-timeout is not a dependency). Tests are selected here rather than passed as node IDs,
+# because pytest aborts the whole session when a node ID's module fails to import.
+_CONFTEST = '''
+import os
+import signal
+import pytest
+
+_TIMEOUT = float(os.environ.get("STLC_TEST_TIMEOUT_SECONDS", "30"))
+
+
+def pytest_collection_modifyitems(config, items):
+    with open(os.environ["STLC_SHARD_FILE"], encoding="utf-8") as f:
+        selected = set(f.read().splitlines())
+    keep = [item for item in items if item.nodeid.split("[")[0] in selected]
+    config.hook.pytest_deselected(items=[item for item in items if item not in keep])
+    items[:] = keep
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    if not hasattr(signal, "SIGALRM") or _TIMEOUT <= 0:
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        pytest.fail(f"Timeout: test ran longer than {_TIMEOUT:g}s", pytrace=False)
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, _TIMEOUT)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+'''
+
+
+def extract_code_blocks(text: str) -> List[str]:
+    """The code of every fenced block in `text`, whatever its language tag."""
+    return [code for _, code in _CODE_BLOCK.findall(text)]
+
+
+def map_code_blocks(text: str, transform: Callable[[str], str]) -> str:
+    """`text` with the code of each fenced block replaced by `transform(code)`; fences and prose are kept."""
+    return _CODE_BLOCK.sub(lambda match: match.group(0)[:match.start(2) - match.start()] + transform(match.group(2)) + "```", text)
+
+
+def _python_blocks(scripts: str) -> List[str]:
+    # Fenced blocks tagged as Python (or untagged), or the whole text when it has no fences
+    blocks = _CODE_BLOCK.findall(scripts)
+    if not blocks:
+        return [scripts]
+    return [code for language, code in blocks if (language.split() or [""])[0].lower() in _PYTHON_LANGUAGES]
+
+
+def _parse_blocks(scripts: str) -> List[Tuple[str, Optional[SyntaxError]]]:
+    parsed = []
+    for block in _python_blocks(scripts):
+        try:
+            ast.parse(block)
+        except SyntaxError as error:
+            parsed.append((block, error))
+            continue
+        parsed.append((block, None))
+    return parsed
+
+
+def extract_test_modules(scripts: str) -> List[str]:
+    """
+    Returns the Python sources found in generated scripts: each Python (or untagged) fenced code
+    block that parses, or the whole text when it is plain Python without fences.
+    """
+    return [block for block, error in _parse_blocks(scripts) if error is None]
+
+
+def invalid_test_modules(scripts: str) -> List[Dict[str, Any]]:
+    """
+    An "error" result for each Python block of `scripts` that does not parse, named after the
+    test case IDs it mentions (or its position when it names none), so a broken script shows
+    up in the report instead of being dropped.
+    """
+    results = []
+    for position, (block, error) in enumerate(_parse_blocks(scripts), 1):
+        if error is None:
+            continue
+        test_case_ids = find_test_case_ids(block)
+        results.append({
+            "id": ", ".join(test_case_ids) if test_case_ids else f"script block {position}",
+            "outcome": "error",
+            "duration": 0.0,
+            "message": f"Generated script is not valid Python: {error.msg} (line {error.lineno})",
+        })
+    return results
+
+
+def pytest_available() -> bool:
+    """Whether pytest can be imported by the interpreter the tests would run under."""
+    return importlib.util.find_spec("pytest") is not None
+
+
+def _is_test_function(node: ast.AST) -> bool:
+    return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test")
+
+
+def _is_test_class(node: ast.AST) -> bool:
+    return isinstance(node, ast.ClassDef) and node.name.startswith("Test")
+
+
+def collect_tests(module_name: str, source: str) -> Dict[str, str]:
+    """
+    Maps the pytest node ID of every test function and `Test*` class method in `source` to the
+    code its outcome depends on: the test itself (with decorators) plus the module's and class's
+    non-test code, i.e. imports, fixtures and helpers.
+    """
+    def code(node: ast.AST) -> str:
+        decorators = [ast.get_source_segment(source, d) or "" for d in getattr(node, "decorator_list", [])]
+        return "\n".join(["@" + d for d in decorators] + [ast.get_source_segment(source, node) or ""])
+
+    tree = ast.parse(source)
+    shared = "\n".join(code(node) for node in tree.body if not (_is_test_function(node) or _is_test_class(node)))
+    tests = {}
+    for node in tree.body:
+        if _is_test_function(node):
+            tests[f"{module_name}::{node.name}"] = f"{shared}\n{code(node)}"
+        elif _is_test_class(node):
+            class_shared = "\n".join(code(item) for item in node.body if not _is_test_function(item))
+            for item in node.body:
+                if _is_test_function(item):
+                    tests[f"{module_name}::{node.name}::{item.name}"] = f"{shared}\nclass {node.name}:\n{class_shared}\n{code(item)}"
+    return tests
+
+
+def shard(items: List[str], shards: int) -> List[List[str]]:
+    """Splits `items` round-robin into at most `shards` non-empty groups."""
+    groups = [items[i::shards] for i in range(max(1, min(shards, len(items))))]
+    return [group for group in groups if group]
+
+
+def parse_junit_xml(path: str) -> List[Dict[str, Any]]:
+    """Reads one JUnit XML report into [{"id", "outcome", "duration", "message"}]."""
+    results = []
+    for case in ET.parse(path).getroot().iter("testcase"):
+        # classname is "module.Class" (dotted); turn it back into a node ID "module.py::Class::name"
+        classname = case.get("classname", "")
+        if classname:
+            module, *classes = classname.split(".")
+            test_id = "::".join([f"{module}.py", *classes, case.get("name", "")])
+        else:
+            test_id = case.get("name", "")
+        outcome, message = "passed", ""
+        for child in case:
+            if child.tag in ("failure", "error", "skipped"):
+                outcome = {"failure": "failed", "error": "error", "skipped": "skipped"}[child.tag]
+                message = (child.get("message") or child.text or "").strip()
+                break
+        results.append({
+            "id": test_id,
+            "outcome": outcome,
+            "duration": float(case.get("time") or 0.0),
+            "message": message,
+        })
+    return results
+
+
+def _limit_memory(memory_limit_mb: int) -> None:
+    # Runs in the child just before exec: caps its address space.
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+async def _run_shard(workdir: str, index: int, test_ids: List[str], timeout: float, memory_limit_mb: int,
+                     python_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    report_path = os.path.join(workdir, f"junit-{index}.xml")
+    shard_file = os.path.join(workdir, f"shard-{index}.txt")
+    with open(shard_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(test_ids))
+    modules = sorted({test_id.split("::")[0] for test_id in test_ids})
+    env = {
+        "PATH": os.environ.get("PATH", ""),
+        "HOME": workdir,
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "STLC_TEST_TIMEOUT_SECONDS": str(timeout),
+        "STLC_SHARD_FILE": shard_file,
+    }
+    if python_path:
+        env["PYTHONPATH"] = python_path
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "--continue-on-collection-errors", f"--junitxml={report_path}", *modules,
+        cwd=workdir,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        preexec_fn=(lambda: _limit_memory(memory_limit_mb)) if resource is not None and memory_limit_mb > 0 else None,
+    )
+    # Hard limit for the whole shard (hangs during import/collection, or a test ignoring SIGALRM).
+    shard_timeout = timeout * len(test_ids) + 30
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout=shard_timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return [{"id": test_id, "outcome": "error", "duration": 0.0,
+                 "message": f"Timeout: shard killed after {shard_timeout:g}s"} for test_id in test_ids]
+
+    if not os.path.exists(report_path):
+        tail = output.decode("utf-8", errors="replace")[-2000:]
+        return [{"id": test_id, "outcome": "error", "duration": 0.0,
+                 "message": f"pytest exited with code {process.returncode}: {tail}"} for test_id in test_ids]
+    return parse_junit_xml(report_path)
+
+
+def _base_id(test_id: str) -> str:
+    # "module.py::test_x[param]" -> "module.py::test_x"
+    return test_id.split("[")[0]
+
+
+async def arun_pytest(scripts: str, workers: Optional[int] = None, timeout: Optional[float] = None,
+                      memory_limit_mb: Optional[int] = None, cache: Optional[TestResultCache] = None,
+                      build_fingerprint: Optional[str] = None, select: Optional[Collection[str]] = None,
+                      python_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Writes the Python test modules found in `scripts` to a temporary directory and runs them with
+    pytest, sharded across `workers` subprocesses. Each test is limited to `timeout` seconds and
+    each process to `memory_limit_mb` of address space. These limits are not isolation: the tests
+    run as the server's user, with its filesystem and network access.
+
+    With a `cache` and a `build_fingerprint`, tests whose code and build are unchanged are not
+    run again; their earlier outcomes are merged into the results (marked `"cached": True`).
+    With `select`, only the tests with those IDs are considered (e.g. the ones a change can reach).
+    `python_path` (e.g. the checkout of the code under test) is importable from the tests.
+    Python blocks that do not parse are reported as "error" results (see `invalid_test_modules`).
+    Returns {"results": [...], "counts": {...}, "cached": n, "deselected": n, "shards": n, "duration": seconds, "errors": [...]}.
+    """
+    workers = workers or EXECUTION_WORKERS
+    timeout = TEST_TIMEOUT_SECONDS if timeout is None else timeout
+    memory_limit_mb = TEST_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+    started = time.perf_counter()
+
+    workdir = tempfile.mkdtemp(prefix="stlc-tests-")
+    try:
+        tests: Dict[str, str] = {}
+        errors = []
+        for i, source in enumerate(extract_test_modules(scripts)):
+            module_name = f"test_generated_{i}.py"
+            module_tests = collect_tests(module_name, source)
+            if not module_tests:
+                errors.append(f"{module_name}: no test functions found")
+                continue
+            with open(os.path.join(workdir, module_name), "w", encoding="utf-8") as f:
+                f.write(source)
+            tests.update(module_tests)
+        with open(os.path.join(workdir, "conftest.py"), "w", encoding="utf-8") as f:
+            f.write(_CONFTEST)
+        deselected = 0
+        if select is not None:
+            selected = set(select)
+            deselected = sum(1 for test_id in tests if test_id not in selected)
+            tests = {test_id: code for test_id, code in tests.items() if test_id in selected}
+
+        use_cache = cache is not None and build_fingerprint is not None
+        keys = {test_id: TestResultCache.make_key(code, build_fingerprint) for test_id, code in tests.items()} if use_cache else {}
+        cached = await asyncio.to_thread(cache.get_many, list(keys.values())) if use_cache else {}
+        to_run = [test_id for test_id in tests if keys.get(test_id) not in cached]
+
+        shards = shard(to_run, workers)
+        shard_results = await asyncio.gather(*[
+            _run_shard(workdir, i, ids, timeout, memory_limit_mb, python_path) for i, ids in enumerate(shards)
+        ]) if shards else []
+    finally:
+        await asyncio.to_thread(shutil.rmtree, workdir, True)
+
+    # A module that fails to import is reported by every shard that selected tests from it.
+    results = list({result["id"]: result for group in shard_results for result in group}.values())
+    results.extend(invalid_test_modules(scripts))
+    if use_cache:
+        # Results are stored relative to their test (e.g. the parametrize suffix), since the same
+        # test may live in a differently numbered module next time.
+        fresh: Dict[str, List[Dict[str, Any]]] = {}
+        for result in results:
+            base = _base_id(result["id"])
+            if base in keys:
+                fresh.setdefault(keys[base], []).append({**result, "id": result["id"][len(base):]})
+        await asyncio.to_thread(cache.set_many, fresh, build_fingerprint)
+        for test_id, key in keys.items():
+            for result in cached.get(key, []):
+                results.append({**result, "id": test_id + result["id"], "cached": True})
+        order = {test_id: i for i, test_id in enumerate(tests)}
+        results.sort(key=lambda result: (order.get(_base_id(result["id"]), len(order)), result["id"]))
+
+    counts = {outcome: 0 for outcome in ("passed", "failed", "error", "skipped")}
+    for result in results:
+        counts[result["outcome"]] += 1
+    return {
+        "results": results,
+        "counts": counts,
+        "cached": sum(1 for result in results if result.get("cached")),
+        "deselected": deselected,
+        "shards": len(shards),
+        "duration": round(time.perf_counter() - started, 3),
+        "errors": errors,
+    }
+
+
+def format_execution_log(report: Dict[str, Any]) -> str:
+    """Human-readable execution log: totals first, then one line per failing test."""
+    counts = report["counts"]
+    total = sum(counts.values())
+    if total == 0:
+        if report.get("deselected"):
+            return f"None of the {report['deselected']} generated tests can reach the change; nothing was run."
+        return "No executable Python tests were found in the generated scripts; nothing was run."
+    # Only non-zero counts: routing looks for words like "error" in this log.
+    totals = ", ".join(f"{counts[key]} {label}" for key, label in
+                       (("passed", "passed"), ("failed", "failed"), ("error", "errored"), ("skipped", "skipped")) if counts[key])
+    reused = f", {report['cached']} reused from earlier runs of the same build" if report.get("cached") else ""
+    reused += f", {report['deselected']} not reachable from the change" if report.get("deselected") else ""
+    lines = [f"Executed {total} tests in {report['shards']} parallel shard(s) ({report['duration']}s{reused}): {totals}."]
+    for result in report["results"]:
+        if result["outcome"] in ("failed", "error"):
+            label = "FAILURE" if result["outcome"] == "failed" else "ERROR"
+            lines.append(f"{label}: {result['id']}: {result['message'].splitlines()[0] if result['message'] else ''}")
+    for error in report["errors"]:
+        lines.append(f"Skipped module {error}")
+    if counts["failed"] == counts["error"] == 0:
+        lines.append("All tests passed successfully.")
+    return "\n".join(lines)
+
+
+def format_issue_log(report: Dict[str, Any]) -> str:
+    """Raw issue log for the bug report agent: the full message of every failing test."""
+    issues = [
+        f"{result['id']} ({result['outcome']}):\n{result['message']}"
+        for result in report["results"] if result["outcome"] in ("failed", "error")
+    ]
+    if not issues:
+        return "No major issues logged from this test run."
+    return "\n\n".join(issues)
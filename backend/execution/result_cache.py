@@ -0,0 +1,125 @@
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from backend.storage import connect_sqlite
+
+# Outcomes that are a property of the test and the build. Errors (timeouts, import failures,
+# killed shards) usually come from the environment, so those tests always run again.
+CACHEABLE_OUTCOMES = {"passed", "failed", "skipped"}
+
+
+class TestResultCache:
+    """
+    Outcomes of generated tests, keyed by the hash of the test's source (plus the module code it
+    can depend on) and the build fingerprint of the system under test. A changed test or a new
+    build yields a new key; entries also expire after `ttl_seconds`, and at most `max_entries`
+    are kept, least recently used evicted first.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 24 * 3600, max_entries: int = 50000, enabled: bool = True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    @classmethod
+    def from_env(cls) -> "TestResultCache":
+        return cls(
+            path=os.getenv("STLC_TEST_CACHE_PATH", "artifacts/test_results.sqlite"),
+            ttl_seconds=float(os.getenv("STLC_TEST_CACHE_TTL_SECONDS", 24 * 3600)),
+            max_entries=int(os.getenv("STLC_TEST_CACHE_MAX_ENTRIES", 50000)),
+            enabled=os.getenv("STLC_TEST_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        )
+
+    @staticmethod
+    def make_key(test_source: str, build_fingerprint: str) -> str:
+        payload = json.dumps([test_source, build_fingerprint], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect_sqlite(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS test_results ("
+                " key TEXT PRIMARY KEY, build_fingerprint TEXT NOT NULL, results TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_test_results_last_access ON test_results(last_access)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_test_results_build ON test_results(build_fingerprint)")
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Returns the cached results (one test function may have several, e.g. parametrized) for the keys found."""
+        if not self.enabled or not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), 500):  # Stay below SQLite's bound-parameter limit
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, results FROM test_results WHERE created_at >= ? AND key IN ({','.join('?' * len(chunk))})",
+                    (now - self.ttl_seconds, *chunk),
+                ).fetchall()
+                found.update((key, json.loads(results)) for key, results in rows)
+            if found:
+                conn.executemany("UPDATE test_results SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+                conn.commit()
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(set(keys) - set(found))
+        return found
+
+    def set_many(self, entries: Dict[str, List[Dict[str, Any]]], build_fingerprint: str) -> None:
+        """Stores results per key; keys with any non-cacheable outcome are skipped."""
+        if not self.enabled:
+            return
+        rows = [
+            (key, build_fingerprint, json.dumps(results), time.time(), time.time())
+            for key, results in entries.items()
+            if results and all(result["outcome"] in CACHEABLE_OUTCOMES for result in results)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO test_results (key, build_fingerprint, results, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._stats["writes"] += len(rows)
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM test_results WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM test_results").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM test_results WHERE key IN (SELECT key FROM test_results ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def invalidate(self, build_fingerprint: Optional[str] = None) -> int:
+        """Drops the results of one build (or everything); returns the number of entries removed."""
+        with self._lock:
+            conn = self._connection()
+            if build_fingerprint is None:
+                removed = conn.execute("DELETE FROM test_results").rowcount
+            else:
+                removed = conn.execute("DELETE FROM test_results WHERE build_fingerprint = ?", (build_fingerprint,)).rowcount
+            conn.commit()
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,261 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.storage import connect_sqlite
+
+FAILING_OUTCOMES = ("failed", "error")
+# When one run has the same test twice, the outcome listed first is the one kept
+_OUTCOME_PRECEDENCE = ("error", "failed", "passed", "skipped")
+
+# Runner-assigned module of a generated script ("test_generated_3.py::"), numbered by position
+_GENERATED_MODULE = re.compile(r"^test_generated_\d+\.py::")
+
+
+def history_test_id(test_id: str) -> str:
+    """
+    Identity of a test across runs: "test_generated_3.py::TestLogin::test_tc_001[chrome]" ->
+    "TestLogin::test_tc_001[chrome]". Generated modules are numbered by their position in the
+    scripts, which shifts whenever test cases are regenerated or reordered; the test's own name
+    (the identity the result cache uses too) does not.
+    """
+    return _GENERATED_MODULE.sub("", test_id)
+
+
+def _changed(outcome: str, previous: Optional[str]) -> bool:
+    # A pass/fail flip against the previous run (skips count as neither), or a first-seen failure
+    if previous is None:
+        return outcome in FAILING_OUTCOMES
+    if "skipped" in (outcome, previous):
+        return False
+    return (outcome in FAILING_OUTCOMES) != (previous in FAILING_OUTCOMES)
+
+
+class TestHistoryStore:
+    """
+    Per-test outcomes of every executed run, grouped by project. Each result row also stores the
+    test's outcome in its previous recorded run and whether it changed (a pass/fail flip, or a
+    first-seen failure); a partial index over changed rows keeps regression and flakiness queries
+    to the few rows that matter. Flakiness and trends are computed over the last `window`
+    runs of a project, which bounds query cost however long the history grows. At most
+    `max_runs` runs are kept per project, oldest dropped first.
+    """
+
+    def __init__(self, path: str, window: int = 20, max_runs: int = 1000, enabled: bool = True):
+        self.path = path
+        self.window = window
+        self.max_runs = max_runs
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TestHistoryStore":
+        return cls(
+            path=os.getenv("STLC_TEST_HISTORY_PATH", "artifacts/test_history.sqlite"),
+            window=int(os.getenv("STLC_TEST_HISTORY_WINDOW", 20)),
+            max_runs=int(os.getenv("STLC_TEST_HISTORY_MAX_RUNS", 1000)),
+            enabled=os.getenv("STLC_TEST_HISTORY_ENABLED", "true").lower() in ("1", "true", "yes"),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect_sqlite(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " run_seq INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL UNIQUE, project TEXT NOT NULL,"
+                " build_fingerprint TEXT, recorded_at REAL NOT NULL, total INTEGER NOT NULL, passed INTEGER NOT NULL,"
+                " failed INTEGER NOT NULL, error INTEGER NOT NULL, skipped INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_project ON runs(project, run_seq)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_recorded_at ON runs(recorded_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " project TEXT NOT NULL, test_id TEXT NOT NULL, run_seq INTEGER NOT NULL, outcome TEXT NOT NULL,"
+                " previous_outcome TEXT, changed INTEGER NOT NULL, duration REAL NOT NULL, recorded_at REAL NOT NULL,"
+                " PRIMARY KEY (project, test_id, run_seq)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_seq)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_changed ON results(run_seq) WHERE changed = 1")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_recorded_at ON results(recorded_at)")
+        return self._conn
+
+    # --- Writing ---
+
+    def record_run(self, run_id: str, project: str, results: Iterable[Dict[str, Any]],
+                   build_fingerprint: Optional[str] = None, recorded_at: Optional[float] = None) -> int:
+        """
+        Stores the outcomes of one run ({"id", "outcome", "duration"} per test, as from
+        `arun_pytest`), keyed by `history_test_id`. Recording the same run again (e.g. after the
+        impact loop re-executes) replaces the outcomes of the tests it covers. Returns the number
+        of results stored.
+        """
+        if not self.enabled:
+            return 0
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        for result in results:
+            test_id = history_test_id(result["id"])
+            current = outcomes.get(test_id)
+            if current is None or _OUTCOME_PRECEDENCE.index(result["outcome"]) < _OUTCOME_PRECEDENCE.index(current["outcome"]):
+                outcomes[test_id] = {**result, "id": test_id}
+        results = list(outcomes.values())
+        recorded_at = recorded_at or time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT run_seq FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row:
+                run_seq = row[0]
+            else:
+                run_seq = conn.execute(
+                    "INSERT INTO runs (run_id, project, build_fingerprint, recorded_at, total, passed, failed, error, skipped)"
+                    " VALUES (?, ?, ?, ?, 0, 0, 0, 0, 0)",
+                    (run_id, project, build_fingerprint, recorded_at),
+                ).lastrowid
+            rows = []
+            for result in results:
+                (previous,) = conn.execute(
+                    "SELECT outcome FROM results WHERE project = ? AND test_id = ? AND run_seq < ? ORDER BY run_seq DESC LIMIT 1",
+                    (project, result["id"], run_seq),
+                ).fetchone() or (None,)
+                rows.append((
+                    project, result["id"], run_seq, result["outcome"], previous, int(_changed(result["outcome"], previous)),
+                    float(result.get("duration") or 0.0), recorded_at,
+                ))
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (project, test_id, run_seq, outcome, previous_outcome, changed, duration, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            counts = dict(conn.execute("SELECT outcome, COUNT(*) FROM results WHERE run_seq = ? GROUP BY outcome", (run_seq,)).fetchall())
+            conn.execute(
+                "UPDATE runs SET total = ?, passed = ?, failed = ?, error = ?, skipped = ? WHERE run_seq = ?",
+                (sum(counts.values()), counts.get("passed", 0), counts.get("failed", 0), counts.get("error", 0), counts.get("skipped", 0), run_seq),
+            )
+            self._evict(conn, project)
+            conn.commit()
+        return len(rows)
+
+    def _evict(self, conn: sqlite3.Connection, project: str) -> None:
+        stale = [seq for (seq,) in conn.execute(
+            "SELECT run_seq FROM runs WHERE project = ? ORDER BY run_seq DESC LIMIT -1 OFFSET ?", (project, self.max_runs)
+        )]
+        if stale:
+            placeholders = ",".join("?" * len(stale))
+            conn.execute(f"DELETE FROM results WHERE run_seq IN ({placeholders})", stale)
+            conn.execute(f"DELETE FROM runs WHERE run_seq IN ({placeholders})", stale)
+
+    # --- Queries ---
+
+    def _window(self, conn: sqlite3.Connection, project: str, window: int) -> List[int]:
+        return [seq for (seq,) in conn.execute(
+            "SELECT run_seq FROM runs WHERE project = ? ORDER BY run_seq DESC LIMIT ?", (project, window)
+        )]
+
+    def trend(self, project: str, window: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Pass rate of each of the last `window` runs, oldest first (skipped tests excluded)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT run_id, recorded_at, total, passed, failed, error, skipped FROM runs"
+                " WHERE project = ? ORDER BY run_seq DESC LIMIT ?",
+                (project, window or self.window),
+            ).fetchall()
+        return [
+            {
+                "run_id": run_id, "recorded_at": recorded_at, "total": total,
+                "pass_rate": round(passed / (total - skipped), 4) if total > skipped else None,
+                "failed": failed + error,
+            }
+            for run_id, recorded_at, total, passed, failed, error, skipped in reversed(rows)
+        ]
+
+    def flaky_tests(self, project: str, window: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Tests that flipped between passing and failing within the last `window` runs, most
+        unstable first. `flip_rate` is flips per consecutive pair of runs the test was in.
+        """
+        with self._lock:
+            conn = self._connection()
+            seqs = self._window(conn, project, window or self.window)
+            if len(seqs) < 2:
+                return []
+            # Flips into the oldest run of the window compare with a run outside it, so they are left out
+            later = seqs[:-1]
+            flips = conn.execute(
+                # Without statistics the planner prefers the (project, ...) primary key, which scans every run
+                "SELECT test_id, COUNT(*) FROM results INDEXED BY idx_results_changed"
+                f" WHERE changed = 1 AND run_seq IN ({','.join('?' * len(later))}) AND project = ? AND previous_outcome IS NOT NULL"
+                " GROUP BY test_id",
+                (*later, project),
+            ).fetchall()
+            flaky = []
+            for test_id, count in flips:
+                runs, failures = conn.execute(
+                    "SELECT COUNT(*), SUM(outcome IN ('failed', 'error')) FROM results"
+                    " WHERE project = ? AND test_id = ? AND run_seq >= ?",
+                    (project, test_id, seqs[-1]),
+                ).fetchone()
+                flaky.append({"id": test_id, "runs": runs, "failures": failures, "flips": count, "flip_rate": round(count / max(runs - 1, 1), 3)})
+        flaky.sort(key=lambda test: (-test["flip_rate"], -test["failures"], test["id"]))
+        return flaky[:limit]
+
+    def regressions(self, run_id: str) -> Dict[str, List[str]]:
+        """
+        Compared with each test's previous recorded run: `regressed` (passed before, fails now),
+        `fixed` (failed before, passes now) and `new_failures` (no earlier result, fails now).
+        """
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT run_seq FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if not row:
+                return {"regressed": [], "fixed": [], "new_failures": []}
+            rows = conn.execute(
+                "SELECT test_id, outcome, previous_outcome FROM results INDEXED BY idx_results_changed WHERE changed = 1 AND run_seq = ? ORDER BY test_id", (row[0],)
+            ).fetchall()
+        changes = {"regressed": [], "fixed": [], "new_failures": []}
+        for test_id, outcome, previous in rows:
+            if outcome not in FAILING_OUTCOMES:
+                changes["fixed"].append(test_id)
+            elif previous is None:
+                changes["new_failures"].append(test_id)
+            else:
+                changes["regressed"].append(test_id)
+        return changes
+
+    def summary(self, project: str, run_id: str, window: Optional[int] = None) -> Dict[str, Any]:
+        """Trend, flaky tests and regressions of a run in one call, for the summary and readiness agents."""
+        trend = self.trend(project, window)
+        return {
+            "project": project,
+            "runs": len(trend),
+            "trend": trend,
+            "flaky": self.flaky_tests(project, window),
+            **self.regressions(run_id),
+        }
+
+
+def format_history(history: Dict[str, Any], top: int = 10) -> str:
+    """Compact Markdown of `TestHistoryStore.summary` for agent prompts."""
+    if not history or not history.get("runs"):
+        return "No test history recorded yet."
+    rates = [run["pass_rate"] for run in history["trend"] if run["pass_rate"] is not None]
+    lines = [f"History of project '{history['project']}' over the last {history['runs']} run(s)."]
+    if rates:
+        average = sum(rates) / len(rates)
+        direction = "improving" if rates[-1] > average + 0.01 else "declining" if rates[-1] < average - 0.01 else "stable"
+        lines.append(
+            f"Pass rate: latest {rates[-1] * 100:.1f}%, average {average * 100:.1f}%, "
+            f"range {min(rates) * 100:.1f}-{max(rates) * 100:.1f}% ({direction})."
+        )
+    for key, label in (("regressed", "Regressions (passed in the previous run)"), ("new_failures", "New failures (no earlier result)"), ("fixed", "Fixed since the previous run")):
+        tests = history.get(key) or []
+        if tests:
+            lines.append(f"{label}: {len(tests)}" + "".join(f"\n- {test}" for test in tests[:top]))
+    if history.get("flaky"):
+        lines.append(f"Flaky tests: {len(history['flaky'])}" + "".join(
+            f"\n- {test['id']}: {test['flips']} flip(s) in {test['runs']} runs (flip rate {test['flip_rate']:.0%}, {test['failures']} failure(s))"
+            for test in history["flaky"][:top]
+        ))
+    return "\n".join(lines)
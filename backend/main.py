@@ -1,44 +1,109 @@
 import os
-import vertexai
+import json
+import uuid
+import asyncio
+import threading
+import xml.etree.ElementTree as ET
+from contextlib import asynccontextmanager
 
 from typing import Optional
 from dotenv import load_dotenv
 
-from fastapi import FastAPI, HTTPException
+# Load .env before importing modules that read their configuration from the environment
+load_dotenv()
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 # Import the Orchestrator
 from backend.orchestrator.stlc_orchestrator import Orchestrator, STLCGraphState
-from backend.models import STLCInput 
-
-load_dotenv()
+from backend.models import STLCInput, STLCBatchInput
+from backend.execution.junit_ingest import RESULTS_ROOT, aggregate_junit
+from backend.storage import PathOutsideRoot, resolve_under
+from backend.agents.llm_cache import llm_cache
+from backend.agents.rate_limiter import llm_throttle, is_transient_error
+from backend.agents.providers import LLM_PROVIDER
+from backend.telemetry import bind_throttle_gauges, render_metrics
 
 # Initialize Vertex AI
 PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
 REGION = os.getenv("GOOGLE_CLOUD_REGION")
 
-if not PROJECT_ID or not REGION:
+if LLM_PROVIDER == "vertex" and (not PROJECT_ID or not REGION):
     # Changed from exit(1) to raising an exception, which FastAPI will catch and handle appropriately
     # (e.g., return a 500 error if it happens during handler execution, or prevent startup)
     raise RuntimeError("GOOGLE_CLOUD_PROJECT and GOOGLE_CLOUD_REGION must be set. Ensure they are configured as environment variables in Cloud Run.")
 
-# Vertex AI initialization. Rely on Cloud Run's assigned service account for authentication.
-# No need for GOOGLE_APPLICATION_CREDENTIALS env var if service account is properly configured.
-try:
-    vertexai.init(project=PROJECT_ID, location=REGION)
-    print(f"Vertex AI initialized for project: {PROJECT_ID}, region: {REGION}")
-except Exception as e:
-    # Log the error but don't exit the process immediately.
-    # If this fails, subsequent calls to Vertex AI will likely fail and raise errors.
-    print(f"Warning: Error initializing Vertex AI: {e}")
-    print("Ensure your Cloud Run service account has the necessary permissions (e.g., Vertex AI User).")
+# Set STLC_WARMUP=true to build the LLM client, agents and graph in the background at startup
+WARMUP_ON_STARTUP = os.getenv("STLC_WARMUP", "false").lower() in ("1", "true", "yes")
+
+# Expose the throttle's in-flight and queue-depth counts as Prometheus gauges
+bind_throttle_gauges(llm_throttle.stats)
+
+_orchestrator: Optional[Orchestrator] = None
+_orchestrator_lock = threading.Lock()
+
+
+def init_vertex_ai() -> None:
+    # Vertex AI initialization. Rely on Cloud Run's assigned service account for authentication.
+    # No need for GOOGLE_APPLICATION_CREDENTIALS env var if service account is properly configured.
+    try:
+        import vertexai # Heavy import; deferred so it does not count against cold-start time
+        vertexai.init(project=PROJECT_ID, location=REGION)
+        print(f"Vertex AI initialized for project: {PROJECT_ID}, region: {REGION}")
+    except Exception as e:
+        # Log the error but don't exit the process immediately.
+        # If this fails, subsequent calls to Vertex AI will likely fail and raise errors.
+        print(f"Warning: Error initializing Vertex AI: {e}")
+        print("Ensure your Cloud Run service account has the necessary permissions (e.g., Vertex AI User).")
+
+
+def get_orchestrator() -> Orchestrator:
+    """Returns the process-wide Orchestrator, initializing Vertex AI and creating it on first use."""
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                if LLM_PROVIDER == "vertex":
+                    init_vertex_ai()
+                _orchestrator = Orchestrator()
+    return _orchestrator
+
+
+async def aget_orchestrator() -> Orchestrator:
+    # The first call may import the Vertex SDK; do that in a worker thread, not on the event loop.
+    if _orchestrator is not None:
+        return _orchestrator
+    return await asyncio.to_thread(get_orchestrator)
+
+
+def warm_up() -> None:
+    """Builds the Vertex AI client, all agents and the compiled graph ahead of the first request."""
+    try:
+        get_orchestrator().warm_up()
+        print("Warm-up complete.")
+    except Exception as e:
+        print(f"Warning: warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ON_STARTUP:
+        # Run in the background so the server starts accepting requests (and health checks) immediately.
+        threading.Thread(target=warm_up, name="stlc-warmup", daemon=True).start()
+    yield
+    if _orchestrator is not None:
+        # Don't lose artifacts still queued for the background writer.
+        await asyncio.to_thread(_orchestrator.artifact_store.flush)
 
 
 app = FastAPI(
     title="Risk & Compliance AI Agent System",
     description="Backend for STLC AI Agents with intelligent routing.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware to allow frontend to communicate with backend
@@ -51,9 +116,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the Orchestrator instance, passing the LLM
-orchestrator_instance = Orchestrator()
-
 
 # class ChatRequest(BaseModel):
 #     requirements: str
@@ -69,16 +131,135 @@ async def chat_endpoint(request: STLCInput):
         # STLCGraphState state
         # Pass all relevant parameters to the workflow
         # not necessarily the Vertex AI authentication (which relies on GCP ADC).
-        response_content = orchestrator_instance.run_stlc(request.model_dump()
-                                                                
-        )
+        run_id = uuid.uuid4().hex
+        # Awaiting the async run keeps the event loop free for other requests.
+        orchestrator = await aget_orchestrator()
+        response_content = await orchestrator.arun_stlc({**request.model_dump(), "run_id": run_id})
         print("\n--- Final results ---\n")
         print(response_content)
-        return {"response": response_content}
+        return {"run_id": run_id, "response": response_content}
+    except PathOutsideRoot as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error processing chat request: {e}")
+        if is_transient_error(e):
+            # LLM quota or availability problem that outlived our retries: tell the client to back off.
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: dict) -> str:
+    """Formats one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: STLCInput):
+    """
+    Streams the STLC run as Server-Sent Events: a `node` event with each node's update as soon
+    as it completes, `token` events with LLM output as it is generated, then `done` (or `error`).
+    """
+    async def event_stream():
+        try:
+            orchestrator = await aget_orchestrator()
+            async for event in orchestrator.astream_stlc(request.model_dump()):
+                yield _sse(event["event"], event)
+            yield _sse("done", {"event": "done"})
+        except Exception as e:
+            print(f"Error processing streaming chat request: {e}")
+            yield _sse("error", {"event": "error", "detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Default number of pipelines a /chat/batch request runs at once
+BATCH_CONCURRENCY = int(os.getenv("STLC_BATCH_CONCURRENCY", "4"))
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(request: STLCBatchInput):
+    """
+    Runs a batch of STLC inputs with bounded concurrency. Results are streamed back as
+    newline-delimited JSON, one line per item in completion order, keyed by `index` and `run_id`.
+    """
+    max_concurrency = request.max_concurrency or BATCH_CONCURRENCY
+
+    async def result_stream():
+        initial_states = [item.model_dump() for item in request.items]
+        orchestrator = await aget_orchestrator()
+        async for result in orchestrator.abatch_stlc(initial_states, max_concurrency=max_concurrency):
+            yield json.dumps(result, default=str) + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+@app.post("/results/junit")
+async def junit_results_endpoint(file: Optional[UploadFile] = File(None), path: Optional[str] = None):
+    """
+    Aggregates JUnit XML results (pass/fail/skip counts, failure signatures, per-suite stats,
+    slowest tests) from an uploaded report (optionally gzipped) or a report file or directory
+    under STLC_RESULTS_ROOT on the server (`?path=`). The file is parsed as a stream; pass the
+    returned aggregate as `test_results` of a chat request.
+    """
+    if file is None and not path:
+        raise HTTPException(status_code=400, detail="Upload a JUnit XML file or pass ?path=")
+    try:
+        source = file.file if file is not None else resolve_under(RESULTS_ROOT, path)
+        return await asyncio.to_thread(aggregate_junit, source)
+    except PathOutsideRoot:
+        raise HTTPException(status_code=400, detail="path must be inside the test results directory (STLC_RESULTS_ROOT)")
+    # OS and parser messages are not echoed: they would tell clients about the server's files
+    except OSError:
+        raise HTTPException(status_code=404, detail="No readable JUnit report at this path")
+    except ET.ParseError:
+        raise HTTPException(status_code=400, detail="Invalid JUnit XML")
+
+@app.get("/runs/{run_id}")
+async def run_outputs_endpoint(run_id: str):
+    """Returns the node outputs stored for a run (used for incremental re-runs)."""
+    outputs = await asyncio.to_thread((await aget_orchestrator()).run_store.node_outputs, run_id)
+    if not outputs:
+        raise HTTPException(status_code=404, detail=f"No stored outputs for run {run_id}")
+    return {"run_id": run_id, "nodes": outputs}
+
+@app.get("/runs/{run_id}/artifacts")
+async def run_artifacts_endpoint(run_id: str):
+    """Lists the files a run produced (name, content hash, size)."""
+    manifest = await asyncio.to_thread((await aget_orchestrator()).artifact_store.manifest, run_id)
+    if not manifest:
+        raise HTTPException(status_code=404, detail=f"No artifacts stored for run {run_id}")
+    return {"run_id": run_id, "artifacts": manifest}
+
+@app.get("/runs/{run_id}/artifacts/{name}")
+async def run_artifact_endpoint(run_id: str, name: str):
+    """Returns the content of one artifact of a run."""
+    content = await asyncio.to_thread((await aget_orchestrator()).artifact_store.get, run_id, name)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} has no artifact {name}")
+    return PlainTextResponse(content)
+
+@app.get("/llm/stats")
+async def llm_stats_endpoint():
+    """Reports LLM throttle (queue depth, in-flight calls, throttle time, retries) and cache counters."""
+    return {"throttle": llm_throttle.stats(), "cache": llm_cache.stats()}
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Prometheus metrics: node durations, LLM queue wait and latency, tokens, prompt/response
+    sizes, cache lookups and errors, labelled by node or agent.
+    """
+    rendered = render_metrics()
+    if rendered is None:
+        raise HTTPException(status_code=501, detail="prometheus_client is not installed")
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
+
+@app.post("/warmup")
+async def warmup_endpoint():
+    """Warm-up hook (e.g. for a Cloud Run startup probe): returns once everything is initialized."""
+    await asyncio.to_thread(warm_up)
+    return {"status": "warm"}
+
 @app.get("/")
 async def root():
     return {"message": "STLC AI Agent System Backend is running!"}
\ No newline at end of file
@@ -1,15 +1,114 @@
-from pydantic import BaseModel, Field
+import re
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import List, Dict, Optional, Any
 
+class FieldConstraint(BaseModel):
+    name: str = Field(..., description="Input field the constraint applies to.")
+    type: str = Field("string", description="string, integer, number, boolean, email, url or enum.")
+    min_length: Optional[int] = Field(None, ge=0, description="Minimum length (string, email, url).")
+    max_length: Optional[int] = Field(None, ge=0, description="Maximum length (string, email, url).")
+    minimum: Optional[float] = Field(None, description="Smallest allowed value (integer, number).")
+    maximum: Optional[float] = Field(None, description="Largest allowed value (integer, number).")
+    pattern: Optional[str] = Field(None, description="Regular expression a string must fully match.")
+    values: Optional[List[Any]] = Field(None, description="Allowed values (enum).")
+    required: bool = Field(True, description="Whether a missing (null) value is invalid.")
+
+    @field_validator("pattern")
+    @classmethod
+    def _check_pattern(cls, pattern: Optional[str]) -> Optional[str]:
+        if pattern is not None:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"invalid regular expression: {e}")
+        return pattern
+
+    @model_validator(mode="after")
+    def _check_bounds(self) -> "FieldConstraint":
+        if self.min_length is not None and self.max_length is not None and self.min_length > self.max_length:
+            raise ValueError("min_length must not be greater than max_length")
+        if self.minimum is not None and self.maximum is not None and self.minimum > self.maximum:
+            raise ValueError("minimum must not be greater than maximum")
+        return self
+
+class ReleaseRule(BaseModel):
+    metric: str = Field(..., description="pass_rate, tests_run, critical_bugs, major_bugs, minor_bugs, open_bugs, regressions, new_failures, flaky_tests or coverage.")
+    operator: str = Field(..., description="<, <=, >, >=, == or !=.")
+    threshold: float = Field(..., description="Value the metric is compared with; rates and coverage are fractions (0-1).")
+    verdict: str = Field(..., description="Ready for Release, Proceed with Caution or Not Ready; applies when the comparison holds.")
+
 class STLCInput(BaseModel):
     requirements: str = Field(..., description="Software requirements or user stories.")
     user_stories: Optional[str] = Field(None, description="Detailed user stories.")
     code_diffs: Optional[str] = Field(None, description="Code changes in diff format (e.g., from Git).")
     previous_test_results: Optional[str] = Field(None, description="Previous test execution logs or summaries.")
+    parent_run_id: Optional[str] = Field(None, description="Earlier run to refine; nodes whose inputs are unchanged reuse its outputs.")
+    bypass_cache: bool = Field(False, description="Skip the LLM response and test result caches.")
+    repository_path: Optional[str] = Field(None, description="Checkout of the repository under test, under STLC_REPOSITORIES_ROOT on the server; its import graph selects the tests a diff can reach.")
+    build_fingerprint: Optional[str] = Field(None, description="Identifies the build under test (e.g. commit SHA or image digest); test outcomes are reused for the same build.")
+    frameworks: Optional[List[str]] = Field(None, description="Script frameworks to generate (e.g. Python Playwright, Pytest API, Postman); the first one's scripts are executed.")
+    previous_ui_state: Optional[Dict[str, Any]] = Field(None, description="UI/API state the scripts were written against: {\"dom\": <HTML snapshot>, \"api\": <OpenAPI document>}.")
+    current_ui_state: Optional[Dict[str, Any]] = Field(None, description="UI/API state of the build under test, in the same form; diffed to heal scripts.")
+    data_constraints: Optional[List[FieldConstraint]] = Field(None, description="Typed input field constraints; boundary, pairwise and negative test data are generated from them locally.")
+    test_data_rows: Optional[int] = Field(None, ge=0, description="Additional random valid rows streamed to the run's JSONL test data file.")
+    test_results_path: Optional[str] = Field(None, description="JUnit XML report (optionally .gz) or directory of reports under STLC_RESULTS_ROOT on the server, e.g. nightly results; aggregated for the summary report.")
+    test_results: Optional[Dict[str, Any]] = Field(None, description="Aggregate returned by POST /results/junit, used instead of test_results_path.")
+    project: Optional[str] = Field(None, description="Name the run's test outcomes are kept under in the test history; trends, flakiness and regressions are computed per project.")
+    coverage: Optional[float] = Field(None, ge=0, le=1, description="Code coverage of the build under test (0-1), checked by the release rules.")
+    release_rules: Optional[List[ReleaseRule]] = Field(None, description="Release rules replacing the configured ones for this request; the most severe verdict among the rules that hold wins.")
+
+class STLCBatchInput(BaseModel):
+    items: List[STLCInput] = Field(..., description="Requirement documents to run through the STLC pipeline.")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Maximum number of pipelines running at once.")
 
 class STLCResponse(BaseModel):
     run_id: str = Field(..., description="Unique ID for the STLC run.")
     status: str = Field(..., description="Current status of the STLC process.")
     output: Dict[str, Any] = Field({}, description="Outputs from various agents or current state.")
     messages: List[str] = Field([], description="Log messages or status updates.")
-    error: Optional[str] = Field(None, description="Any error message, if applicable.")
\ No newline at end of file
+    error: Optional[str] = Field(None, description="Any error message, if applicable.")
+
+# --- Structured agent outputs ---
+# Parsed from each agent's Markdown/JSON reply and kept in the graph state (as plain dicts), so
+# downstream prompts can include only the fields and records they need.
+
+class TestCase(BaseModel):
+    id: str = Field(..., description="Test ID, e.g. TC-001; unique within a run.")
+    description: str = Field("", description="What the test case verifies.")
+    preconditions: str = Field("", description="State required before the steps.")
+    steps: str = Field("", description="Steps to perform.")
+    expected_result: str = Field("", description="Expected outcome.")
+    priority: str = Field("", description="Priority, e.g. High, Medium, Low.")
+
+class TestDataSet(BaseModel):
+    fields: Dict[str, List[Any]] = Field({}, description="Example values per input field (valid, invalid, boundary, edge cases).")
+    rows: List[Dict[str, Any]] = Field([], description="Generated records: pairwise combinations of valid values and single-field negative cases.")
+
+class TestScript(BaseModel):
+    name: str = Field(..., description="Module name the script runs as, e.g. test_generated_0.py.")
+    language: str = Field("python", description="Language of the script.")
+    code: str = Field(..., description="Source code of the script.")
+    test_case_ids: List[str] = Field([], description="Test case IDs the script refers to.")
+
+class BugReport(BaseModel):
+    title: str = Field(..., description="Short summary of the defect.")
+    description: str = Field("", description="Details of the defect.")
+    steps_to_reproduce: str = Field("", description="Steps that reproduce the defect.")
+    expected_vs_actual: str = Field("", description="Expected vs. actual results.")
+    environment: str = Field("", description="Environment the defect was seen in.")
+    severity: str = Field("", description="Critical, Major or Minor.")
+    priority: str = Field("", description="High, Medium or Low.")
+
+class ImpactResult(BaseModel):
+    impact_level: str = Field("none", description="none, low, medium or high.")
+    affected_areas: List[str] = Field([], description="Changed files, most impacted first.")
+    recommendations: List[str] = Field([], description="Suggested follow-up actions.")
+    changed_modules: List[str] = Field([], description="Python modules the diff changes.")
+    affected_modules: List[str] = Field([], description="Modules the change can reach through the import graph.")
+    affected_tests: Optional[List[str]] = Field(None, description="Generated tests to run; None runs every test.")
+    affected_repository_tests: List[str] = Field([], description="Repository tests the change can reach.")
+    affected_test_cases: List[str] = Field([], description="Test case IDs of the affected generated tests.")
+    unindexed_files: List[str] = Field([], description="Changed files outside the import graph.")
+    unlinked_tests: List[str] = Field([], description="Generated tests that import nothing from the repository.")
+    files: Dict[str, Any] = Field({}, description="Per-file verdicts of the diff analysis.")
+    stats: Dict[str, Any] = Field({}, description="Diff size statistics.")
@@ -0,0 +1,155 @@
+import os
+import time
+import queue
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.storage import connect_sqlite
+
+
+class ArtifactStore:
+    """
+    Stores the files each run produces (test cases, scripts, reports). Contents are
+    content-addressed under `objects/`, so identical outputs are kept once however many runs
+    produce them; a per-run manifest maps artifact names to content hashes.
+
+    `put` only hashes and enqueues: a background thread writes objects and manifest rows in
+    batches, keeping disk I/O off the request path. Reads see pending writes immediately.
+    """
+
+    def __init__(self, root: str, batch_size: int = 64):
+        self.root = root
+        self.batch_size = batch_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[int, str, str, str, str]]" = queue.Queue()
+        # (run_id, name) -> (sequence, digest, content) for writes the background thread has not committed yet
+        self._pending: Dict[Tuple[str, str], Tuple[int, str, str]] = {}
+        self._sequence = 0
+        self._writer: Optional[threading.Thread] = None
+        self._stats = {"puts": 0, "objects_written": 0, "deduplicated": 0, "batches": 0}
+
+    @classmethod
+    def from_env(cls) -> "ArtifactStore":
+        return cls(os.getenv("STLC_ARTIFACTS_DIR", "artifacts"))
+
+    @staticmethod
+    def digest(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect_sqlite(os.path.join(self.root, "artifacts.sqlite"))
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                " run_id TEXT NOT NULL, name TEXT NOT NULL, digest TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (run_id, name))"
+            )
+        return self._conn
+
+    # --- Writes ---
+
+    def put(self, run_id: str, name: str, content: str) -> str:
+        """Queues `content` as artifact `name` of `run_id` and returns its content hash."""
+        digest = self.digest(content)
+        with self._lock:
+            self._sequence += 1
+            self._pending[(run_id, name)] = (self._sequence, digest, content)
+            self._stats["puts"] += 1
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="artifact-writer", daemon=True)
+                self._writer.start()
+            self._queue.put((self._sequence, run_id, name, digest, content))
+        return digest
+
+    def flush(self) -> None:
+        """Blocks until every queued artifact is on disk."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"Warning: failed to write {len(batch)} artifacts: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[int, str, str, str, str]]) -> None:
+        written = deduplicated = 0
+        for _, _, _, digest, content in {item[3]: item for item in batch}.values():
+            path = self._object_path(digest)
+            if os.path.exists(path):
+                deduplicated += 1
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(temp_path, path)  # Atomic: readers never see a partially written object
+            written += 1
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (run_id, name, digest, size, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, name, digest, len(content.encode("utf-8")), now) for _, run_id, name, digest, content in batch],
+            )
+            conn.commit()
+            for sequence, run_id, name, _, _ in batch:
+                # A newer put of the same name may still be queued; only drop the entry we wrote.
+                if self._pending.get((run_id, name), (None,))[0] == sequence:
+                    del self._pending[(run_id, name)]
+            self._stats["objects_written"] += written
+            self._stats["deduplicated"] += deduplicated + len(batch) - len({item[3] for item in batch})
+            self._stats["batches"] += 1
+
+    # --- Reads ---
+
+    def manifest(self, run_id: str) -> List[Dict[str, Any]]:
+        """Lists the artifacts of a run (name, digest, size), including writes still queued."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT name, digest, size FROM artifacts WHERE run_id = ? ORDER BY created_at, name",
+                (run_id,),
+            ).fetchall()
+            entries = {name: {"name": name, "digest": digest, "size": size} for name, digest, size in rows}
+            for (pending_run, name), (_, digest, content) in self._pending.items():
+                if pending_run == run_id:
+                    entries[name] = {"name": name, "digest": digest, "size": len(content.encode("utf-8"))}
+        return list(entries.values())
+
+    def get(self, run_id: str, name: str) -> Optional[str]:
+        """Returns the content of artifact `name` of `run_id`, or None if the run has no such artifact."""
+        with self._lock:
+            pending = self._pending.get((run_id, name))
+            if pending is not None:
+                return pending[2]
+            row = self._connection().execute(
+                "SELECT digest FROM artifacts WHERE run_id = ? AND name = ?", (run_id, name)
+            ).fetchone()
+        if row is None:
+            return None
+        with open(self._object_path(row[0]), encoding="utf-8") as f:
+            return f.read()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        return stats
@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from backend.storage import connect_sqlite
+
+
+def fingerprint_inputs(node: str, inputs: Dict[str, Any]) -> str:
+    """Content hash of the state values a node reads; equal fingerprints mean equal inputs."""
+    payload = json.dumps({"node": node, "inputs": inputs}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunStore:
+    """
+    Persists each node's output per run, keyed by the fingerprint of the node's inputs, so a
+    follow-up run can reuse outputs whose inputs have not changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RunStore":
+        return cls(os.getenv("STLC_RUN_STORE_PATH", "artifacts/stlc_runs.sqlite"))
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect_sqlite(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " run_id TEXT PRIMARY KEY, parent_run_id TEXT, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS node_outputs ("
+                " run_id TEXT NOT NULL, node TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+                " output TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (run_id, node, fingerprint))"
+            )
+        return self._conn
+
+    def start_run(self, run_id: str, parent_run_id: Optional[str] = None) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, parent_run_id, created_at) VALUES (?, ?, ?)",
+                (run_id, parent_run_id, time.time()),
+            )
+            conn.commit()
+
+    def record(self, run_id: str, node: str, fingerprint: str, output: Dict[str, Any]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO node_outputs (run_id, node, fingerprint, output, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (run_id, node, fingerprint, json.dumps(output, default=str), time.time()),
+            )
+            conn.commit()
+
+    def lookup(self, run_id: str, node: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Returns the output `node` produced in `run_id` for the same inputs, if any."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT output FROM node_outputs WHERE run_id = ? AND node = ? AND fingerprint = ?",
+                (run_id, node, fingerprint),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def node_outputs(self, run_id: str) -> List[Dict[str, Any]]:
+        """Lists the stored node outputs of a run, oldest first."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT node, fingerprint, output FROM node_outputs WHERE run_id = ? ORDER BY created_at",
+                (run_id,),
+            ).fetchall()
+        return [{"node": node, "fingerprint": fp, "output": json.loads(output)} for node, fp, output in rows]
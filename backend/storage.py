@@ -0,0 +1,32 @@
+import os
+import sqlite3
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite database shared by threads of this process (callers serialize access with
+    their own lock), creating the parent directory if needed.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class PathOutsideRoot(ValueError):
+    """A client-supplied path resolves outside the directory it is confined to."""
+
+
+def resolve_under(root: str, path: str) -> str:
+    """
+    Absolute path of `path` (relative to `root`, or absolute) once symlinks and ".." are
+    resolved. Raises PathOutsideRoot unless it lies inside `root`.
+    """
+    base = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(base, path))
+    if os.path.commonpath([base, resolved]) != base:
+        raise PathOutsideRoot(f"{path} is outside the allowed directory")
+    return resolved
@@ -0,0 +1,204 @@
+import os
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger("stlc.telemetry")
+
+# Run the current coroutine/thread is working for; set once per STLC run and inherited by its nodes.
+_current_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("stlc_run_id", default=None)
+
+
+@contextmanager
+def run_context(run_id: Optional[str]) -> Iterator[None]:
+    """Tags every node, LLM call and span started inside the `with` block with `run_id`."""
+    token = _current_run_id.set(run_id)
+    try:
+        yield
+    finally:
+        _current_run_id.reset(token)
+
+
+def current_run_id() -> Optional[str]:
+    return _current_run_id.get()
+
+
+# --- Prometheus metrics (optional: only recorded when prometheus_client is installed) ---
+# Labels stay low-cardinality (node, agent, outcome); the run_id goes to spans and logs instead.
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:
+    prometheus_client = None
+
+if prometheus_client is not None:
+    _LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+    NODE_DURATION = Histogram(
+        "stlc_node_duration_seconds", "Wall time of an STLC graph node.",
+        ["node", "outcome"], buckets=_LATENCY_BUCKETS,
+    )
+    LLM_QUEUE_WAIT = Histogram(
+        "stlc_llm_queue_wait_seconds", "Time an LLM call waited for quota and a concurrency slot.",
+        ["agent"], buckets=(0, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60),
+    )
+    LLM_LATENCY = Histogram(
+        "stlc_llm_latency_seconds", "Time spent waiting for the LLM to answer (all attempts).",
+        ["agent"], buckets=_LATENCY_BUCKETS,
+    )
+    LLM_TOKENS = Counter("stlc_llm_tokens_total", "Tokens reported by the LLM.", ["agent", "kind"])
+    LLM_CHARACTERS = Counter("stlc_llm_characters_total", "Prompt and response sizes in characters.", ["agent", "direction"])
+    LLM_CACHE_LOOKUPS = Counter("stlc_llm_cache_lookups_total", "LLM response cache lookups.", ["agent", "result"])
+    LLM_ERRORS = Counter("stlc_llm_errors_total", "LLM calls that failed after all retries.", ["agent", "error"])
+    LLM_IN_FLIGHT = Gauge("stlc_llm_in_flight", "LLM calls currently in flight.")
+    LLM_QUEUE_DEPTH = Gauge("stlc_llm_queue_depth", "LLM calls waiting for quota or a concurrency slot.")
+
+
+def bind_throttle_gauges(stats: Callable[[], Dict[str, Any]]) -> None:
+    """Reads the in-flight and queue-depth gauges from the throttle at scrape time."""
+    if prometheus_client is None:
+        return
+    LLM_IN_FLIGHT.set_function(lambda: stats()["in_flight"])
+    LLM_QUEUE_DEPTH.set_function(lambda: stats()["queue_depth"])
+
+
+def render_metrics() -> Optional[Tuple[bytes, str]]:
+    """Prometheus text exposition of all metrics, with its content type; None without prometheus_client."""
+    if prometheus_client is None:
+        return None
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+
+# --- OpenTelemetry spans (optional: STLC_TRACING=true and opentelemetry-api installed) ---
+# The exporter is whatever SDK the deployment configures (e.g. via opentelemetry-instrument).
+
+TRACING_ENABLED = os.getenv("STLC_TRACING", "false").lower() in ("1", "true", "yes")
+
+_tracer = None
+if TRACING_ENABLED:
+    try:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("backend.stlc")
+    except ImportError:
+        logger.warning("STLC_TRACING is set but opentelemetry-api is not installed; spans are disabled.")
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Starts an OpenTelemetry span tagged with the current run_id; yields None when tracing is off."""
+    if _tracer is None:
+        yield None
+        return
+    run_id = current_run_id()
+    if run_id:
+        attributes["stlc.run_id"] = run_id
+    with _tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}) as current:
+        yield current
+
+
+# --- Recording helpers ---
+
+@contextmanager
+def observe_node(node: str) -> Iterator[Dict[str, str]]:
+    """
+    Times one graph node. The caller may set `outcome` on the yielded dict (e.g. "reused");
+    it defaults to "ok", or "error" when the node raises.
+    """
+    result = {"outcome": "ok"}
+    started = time.perf_counter()
+    with span(f"stlc.node.{node}", **{"stlc.node": node}) as current:
+        try:
+            yield result
+        except BaseException:
+            result["outcome"] = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if prometheus_client is not None:
+                NODE_DURATION.labels(node, result["outcome"]).observe(elapsed)
+            if current is not None:
+                current.set_attribute("stlc.outcome", result["outcome"])
+            logger.info("node=%s run_id=%s outcome=%s seconds=%.3f", node, current_run_id(), result["outcome"], elapsed)
+
+
+def record_cache_lookup(agent: str, hit: bool) -> None:
+    if prometheus_client is not None:
+        LLM_CACHE_LOOKUPS.labels(agent, "hit" if hit else "miss").inc()
+
+
+class LLMCallObservation:
+    """Collects the timings of one LLM call; see `observe_llm_call`."""
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self.queue_wait = 0.0
+        self.latency = 0.0
+        self.response: Any = None
+
+    def add_queue_wait(self, seconds: float) -> None:
+        self.queue_wait += seconds
+
+    def timed(self, fn: Callable[[], T]) -> Callable[[], T]:
+        def call() -> T:
+            started = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                self.latency += time.perf_counter() - started
+        return call
+
+    def atimed(self, fn: Callable[[], Awaitable[T]]) -> Callable[[], Awaitable[T]]:
+        async def call() -> T:
+            started = time.perf_counter()
+            try:
+                return await fn()
+            finally:
+                self.latency += time.perf_counter() - started
+        return call
+
+
+@contextmanager
+def observe_llm_call(agent: str, prompt_chars: int) -> Iterator[LLMCallObservation]:
+    """
+    Records queue wait, latency, token usage, prompt/response sizes and failures of one LLM call.
+    Wrap the model call with `timed`/`atimed`, pass `add_queue_wait` to the throttle and assign
+    the model's reply to `response`.
+    """
+    observation = LLMCallObservation(agent)
+    with span("stlc.llm.call", **{"stlc.agent": agent, "stlc.prompt_chars": prompt_chars}) as current:
+        try:
+            yield observation
+        except Exception as e:
+            if prometheus_client is not None:
+                LLM_ERRORS.labels(agent, type(e).__name__).inc()
+            logger.warning("llm_error agent=%s run_id=%s error=%s", agent, current_run_id(), type(e).__name__)
+            raise
+
+        usage = getattr(observation.response, "usage_metadata", None) or {}
+        content = getattr(observation.response, "content", "")
+        response_chars = len(content) if isinstance(content, str) else len(str(content))
+        if prometheus_client is not None:
+            LLM_QUEUE_WAIT.labels(agent).observe(observation.queue_wait)
+            LLM_LATENCY.labels(agent).observe(observation.latency)
+            LLM_CHARACTERS.labels(agent, "input").inc(prompt_chars)
+            LLM_CHARACTERS.labels(agent, "output").inc(response_chars)
+            if usage.get("input_tokens") is not None:
+                LLM_TOKENS.labels(agent, "prompt").inc(usage["input_tokens"])
+            if usage.get("output_tokens") is not None:
+                LLM_TOKENS.labels(agent, "completion").inc(usage["output_tokens"])
+        if current is not None:
+            current.set_attribute("stlc.queue_wait_seconds", observation.queue_wait)
+            current.set_attribute("stlc.response_chars", response_chars)
+            for key in ("input_tokens", "output_tokens"):
+                if usage.get(key) is not None:
+                    current.set_attribute(f"stlc.{key}", usage[key])
+        logger.info(
+            "llm_call agent=%s run_id=%s queue_wait=%.3f latency=%.3f prompt_tokens=%s completion_tokens=%s",
+            agent, current_run_id(), observation.queue_wait, observation.latency,
+            usage.get("input_tokens"), usage.get("output_tokens"),
+        )
@@ -0,0 +1,25 @@
+import asyncio
+
+from backend.agents import base
+from backend.agents.base import AIAgent
+from backend.agents.llm_cache import LLMResponseCache
+from backend.agents.providers import FakeChatModel
+from backend.agents.rate_limiter import LLMThrottle
+
+
+def test_abatch_submits_cache_misses_in_throttled_batches(tmp_path, monkeypatch):
+    throttle = LLMThrottle(requests_per_minute=0, tokens_per_minute=0)
+    monkeypatch.setattr(base, "llm_throttle", throttle)
+    monkeypatch.setattr(base, "llm_cache", LLMResponseCache(str(tmp_path / "llm_cache.sqlite")))
+    model = FakeChatModel()
+    agent = AIAgent("Agent", "", "Answer briefly.", llm=model)
+    prompts = [f"prompt {i}" for i in range(5)]
+
+    replies = asyncio.run(agent.abatch(prompts, batch_size=2))
+    assert replies == [agent.invoke(prompt) for prompt in prompts]  # Served from the cache, in input order
+    # One throttled call (one slot) per batch; the model still answers every prompt
+    assert throttle.stats()["calls"] == 3
+    assert model.stats["calls"] == 5
+
+    assert asyncio.run(agent.abatch(prompts + ["prompt 5"])) == replies + [agent.invoke("prompt 5")]
+    assert throttle.stats()["calls"] == 4
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from backend.agents.test_case_generator import TABLE_HEADER, parse_test_cases
+from backend.orchestrator.stlc_orchestrator import MAX_IMPACT_ITERATIONS, Orchestrator
+
+EXISTING = TABLE_HEADER + (
+    "| TC-001 | Add an item to the cart | | | | High |\n"
+    "| TC-002 | Pay with a saved card | | | | High |\n"
+)
+
+
+class DeltaAgent:
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    async def agenerate_delta_test_cases(self, requirements, affected_areas, recommendations, existing_test_cases):
+        self.calls.append(affected_areas)
+        return self.reply
+
+
+class ScriptAgent:
+    async def aautomate_scripts(self, test_cases, frameworks):
+        return {"scripts": {framework: f"# {framework}: " + ", ".join(case["id"] for case in test_cases) for framework in frameworks}, "generated": len(test_cases)}
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return Orchestrator()
+
+
+def test_delta_pass_asks_for_uncovered_areas_and_appends_new_cases(orchestrator):
+    agent = DeltaAgent(TABLE_HEADER + (
+        "| TC-001 | Pay with a saved card | | | | High |\n"
+        "| TC-002 | Empty cart shows a hint | | | | Medium |\n"
+    ))
+    orchestrator.__dict__["_test_case_gen_agent"] = agent
+    state = {
+        "test_cases": EXISTING,
+        "change_impact_analysis": {"affected_areas": ["shop.cart", "shop.db"], "recommendations": []},
+        "impact_covered_areas": ["shop.db"],
+    }
+    update = asyncio.run(orchestrator._test_case_generation(state))
+
+    assert agent.calls == [["shop.cart"]]
+    assert [(case.id, case.description) for case in parse_test_cases(update["test_cases"])] == [
+        ("TC-001", "Add an item to the cart"), ("TC-002", "Pay with a saved card"), ("TC-003", "Empty cart shows a hint"),
+    ]
+    assert [case.id for case in parse_test_cases(update["test_case_delta"])] == ["TC-003"]
+    assert update["impact_iterations"] == 1
+    assert update["impact_covered_areas"] == ["shop.cart", "shop.db"]
+
+
+def test_delta_pass_scripts_only_the_added_cases(orchestrator):
+    orchestrator.__dict__["_test_script_auto_agent"] = ScriptAgent()
+    state = {
+        "frameworks": ["Pytest"],
+        "impact_iterations": 1,
+        "scripts_by_framework": {"Pytest": "# Pytest: TC-001, TC-002"},
+        "test_case_delta": TABLE_HEADER + "| TC-003 | Empty cart shows a hint | | | | Medium |\n",
+    }
+    update = asyncio.run(orchestrator._test_script_automation(state))
+    assert update["automated_scripts"] == "# Pytest: TC-001, TC-002\n\n# Pytest: TC-003"
+
+    # The run's final state keeps only a node's last update, so an empty pass repeats the scripts
+    previous = {**state, **update, "test_case_delta": ""}
+    unchanged = asyncio.run(orchestrator._test_script_automation(previous))
+    assert unchanged["automated_scripts"] == update["automated_scripts"]
+    assert unchanged["scripts_by_framework"] == update["scripts_by_framework"]
+    assert unchanged["script_records"] == update["script_records"]
+
+
+def test_empty_delta_pass_keeps_the_test_data(orchestrator):
+    state = {
+        "impact_iterations": 1,
+        "test_case_delta": "",
+        "test_data": "email: a@example.com",
+        "test_data_records": {"fields": [{"name": "email", "values": ["a@example.com"]}]},
+        "test_data_file": "test_data/run.jsonl",
+    }
+    update = asyncio.run(orchestrator._test_data_generation(state))
+    assert {key: update[key] for key in ("test_data", "test_data_records", "test_data_file")} == {
+        key: state[key] for key in ("test_data", "test_data_records", "test_data_file")
+    }
+
+
+def test_impact_loop_stops_once_areas_are_covered(orchestrator):
+    analysis = {"impact_level": "high", "affected_areas": ["shop.cart"], "recommendations": []}
+    decide = orchestrator._decide_after_impact_analysis
+    assert decide({"change_impact_analysis": analysis}) == "re_run_test_case_gen"
+    assert decide({"change_impact_analysis": analysis, "impact_iterations": 1, "impact_covered_areas": ["shop.cart"]}) == "simulate_test_execution"
+    more = {**analysis, "affected_areas": ["shop.cart", "shop.search"]}
+    assert decide({"change_impact_analysis": more, "impact_iterations": 1, "impact_covered_areas": ["shop.cart"]}) == "re_run_test_case_gen"
+    assert decide({"change_impact_analysis": more, "impact_iterations": MAX_IMPACT_ITERATIONS}) == "simulate_test_execution"
+    assert decide({"change_impact_analysis": {**analysis, "impact_level": "low"}}) == "simulate_test_execution"
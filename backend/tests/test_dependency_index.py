@@ -0,0 +1,103 @@
+import ast
+import os
+
+from backend.agents.change_impact_analysis import ChangeImpactAnalysisAgent
+from backend.agents.dependency_index import DependencyIndex, find_test_case_ids, imported_names, module_name_for, resolve_module
+
+FILES = {
+    "shop/__init__.py": "",
+    "shop/db.py": "import sqlite3\n",
+    "shop/cart.py": "from . import db\n",
+    "shop/checkout.py": "from shop.cart import add\n",
+    "shop/search.py": "import re\n",
+    "tests/test_checkout.py": "from shop import checkout\n\ndef test_pay():\n    pass\n\nclass TestRefund:\n    def test_refund(self):\n        pass\n",
+    "tests/test_search.py": "import shop.search\n\ndef test_query():\n    pass\n",
+}
+
+
+def write_repository(root, files=FILES):
+    for relative_path, source in files.items():
+        path = os.path.join(root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+    return str(root)
+
+
+def test_module_names_and_imports():
+    assert module_name_for("shop/cart.py") == "shop.cart"
+    assert module_name_for("shop/__init__.py") == "shop"
+    assert module_name_for("shop/style.css") is None
+    tree = ast.parse("from . import db\nfrom ..core import models\nimport json")
+    assert imported_names(tree, "shop.sub.cart", False) == {"shop.sub", "shop.sub.db", "shop.core", "shop.core.models", "json"}
+    assert resolve_module("shop.cart.add", {"shop", "shop.cart"}) == "shop.cart"
+    assert resolve_module("json", {"shop"}) is None
+
+
+def test_test_case_ids_are_normalized():
+    assert find_test_case_ids("test_tc_7 covers TC-012 and tc 7") == ["TC-007", "TC-012"]
+
+
+def test_reverse_dependencies_are_transitive(tmp_path):
+    repository = write_repository(tmp_path / "repo")
+    index = DependencyIndex(str(tmp_path / "index.sqlite"))
+    assert index.refresh(repository) == {"modules": 7, "parsed": 7, "removed": 0}
+    assert index.modules(repository)["tests.test_checkout"] == ["test_pay", "TestRefund::test_refund"]
+    assert index.reverse_dependencies(repository, {"shop.db"}) == {"shop.db", "shop.cart", "shop.checkout", "tests.test_checkout"}
+    assert index.reverse_dependencies(repository, {"shop.search"}) == {"shop.search", "tests.test_search"}
+
+
+def test_refresh_parses_only_changed_files(tmp_path):
+    repository = write_repository(tmp_path / "repo")
+    index = DependencyIndex(str(tmp_path / "index.sqlite"))
+    index.refresh(repository)
+    assert index.refresh(repository)["parsed"] == 0
+
+    write_repository(repository, {"shop/search.py": "from shop import db\nimport re\n", "tests/test_cart.py": "from shop.cart import add\n\ndef test_add():\n    pass\n"})
+    os.remove(os.path.join(repository, "shop/checkout.py"))
+    assert index.refresh(repository) == {"modules": 7, "parsed": 2, "removed": 1}
+    assert index.reverse_dependencies(repository, {"shop.db"}) == {
+        "shop.db", "shop.cart", "shop.search", "tests.test_cart", "tests.test_search",
+    }
+
+
+def test_impact_selects_generated_tests_that_reach_the_change(tmp_path, monkeypatch):
+    repository = write_repository(tmp_path / "repo")
+    agent = ChangeImpactAnalysisAgent()
+    monkeypatch.setattr(agent, "dependency_index", DependencyIndex(str(tmp_path / "index.sqlite")))
+    scripts = (
+        "```python\nfrom shop.checkout import pay\n\ndef test_tc_001_pay():\n    pass\n```\n"
+        "```python\nimport shop.search\n\ndef test_tc_002_search():\n    pass\n```\n"
+        "```python\ndef test_tc_003_standalone():\n    pass\n```\n"
+    )
+    diff = "--- a/shop/db.py\n+++ b/shop/db.py\n@@ -1 +1 @@\n+import sqlite3 as sql\n"
+
+    result = agent.analyze_impact(diff, scripts, repository)
+    assert result["affected_tests"] == ["test_generated_0.py::test_tc_001_pay", "test_generated_2.py::test_tc_003_standalone"]
+    assert result["affected_test_cases"] == ["TC-001", "TC-003"]
+    assert result["affected_repository_tests"] == ["tests.test_checkout::TestRefund::test_refund", "tests.test_checkout::test_pay"]
+    assert result["impact_level"] == "high"
+
+    css = agent.analyze_impact("--- a/web/site.css\n+++ b/web/site.css\n@@ -1 +1 @@\n+a {}\n", scripts, repository)
+    assert css["affected_tests"] is None
+    assert css["unindexed_files"] == ["web/site.css"]
+
+
+def test_tests_importing_nothing_from_the_repository_do_not_raise_the_impact(tmp_path, monkeypatch):
+    repository = write_repository(tmp_path / "repo")
+    agent = ChangeImpactAnalysisAgent()
+    monkeypatch.setattr(agent, "dependency_index", DependencyIndex(str(tmp_path / "index.sqlite")))
+    scripts = "".join(
+        f"```python\nimport requests\n\ndef test_tc_00{i}_api():\n    pass\n```\n" for i in range(1, 6)
+    )
+    diff = "--- a/shop/search.py\n+++ b/shop/search.py\n@@ -1 +1 @@\n+import re\n"
+
+    # Every generated test still runs, but only the linked repository tests set the level
+    result = agent.analyze_impact(diff, scripts, repository)
+    assert len(result["affected_tests"]) == 5
+    assert result["unlinked_tests"] == result["affected_tests"]
+    assert result["affected_repository_tests"] == ["tests.test_search::test_query"]
+    assert result["impact_level"] == "medium"
+
+    # Without an index there is nothing to measure the share against; the diff rules decide
+    assert agent.analyze_impact(diff, scripts)["impact_level"] is None
@@ -0,0 +1,74 @@
+import asyncio
+
+from backend.agents.diff_analysis import aanalyze_diff, iter_diff_chunks, iter_lines
+
+DIFF = """diff --git a/app/models.py b/app/models.py
+index 1111111..2222222 100644
+--- a/app/models.py
++++ b/app/models.py
+@@ -1,3 +1,4 @@ class User
+ class User:
+-    name = Column(String)
++    name = Column(String(64))
++    email = Column(String)  # db migration
+@@ -20,2 +21,2 @@ class Order
+-    total = 0
++    total = Decimal(0)
+diff --git a/web/button.css b/web/button.css
+new file mode 100644
+--- /dev/null
++++ b/web/button.css
+@@ -0,0 +1 @@
++.primary { color: red; }
+diff --git a/app/old.py b/app/old.py
+deleted file mode 100644
+--- a/app/old.py
++++ /dev/null
+@@ -1 +0,0 @@
+--- legacy helper
+"""
+
+
+def test_chunks_per_file_and_hunk():
+    chunks = list(iter_diff_chunks(iter_lines(DIFF)))
+    assert [(chunk.path, chunk.hunk_header.split(" @@")[0]) for chunk in chunks] == [
+        ("app/models.py", "@@ -1,3 +1,4"),
+        ("app/models.py", "@@ -20,2 +21,2"),
+        ("web/button.css", "@@ -0,0 +1"),
+        ("app/old.py", "@@ -1 +0,0"),
+    ]
+    assert chunks[2].new_file and not chunks[2].deleted_file
+    assert chunks[3].deleted_file
+    # A removed line starting with "-- " is content, not a file header
+    assert chunks[3].lines == ["--- legacy helper"]
+
+
+def test_long_hunks_are_split():
+    diff = "--- a/big.py\n+++ b/big.py\n@@ -1,10 +1,10 @@\n" + "\n".join(f"+line {i}" for i in range(10))
+    chunks = list(iter_diff_chunks(iter_lines(diff), max_chunk_lines=4))
+    assert [len(chunk.lines) for chunk in chunks] == [4, 4, 2]
+    assert {chunk.hunk_header for chunk in chunks} == {"@@ -1,10 +1,10 @@"}
+
+
+def test_plain_text_is_analyzed_as_unknown_file():
+    assert [chunk.path for chunk in iter_diff_chunks(iter_lines("renamed the login button"))] == ["(unknown)"]
+
+
+def test_reduce_takes_the_highest_impact_per_file():
+    result = asyncio.run(aanalyze_diff(DIFF, max_concurrency=2))
+    assert result["impact_level"] == "high"
+    assert result["affected_areas"][0] == "app/models.py"
+    assert result["files"]["app/models.py"]["impact_level"] == "high"
+    assert result["files"]["app/models.py"]["chunks"] == 2
+    assert result["files"]["web/button.css"]["impact_level"] == "low"
+    assert result["stats"] == {"files": 3, "chunks": 4, "lines_added": 4, "lines_removed": 3}
+
+
+def test_new_feature_elevates_impact():
+    result = asyncio.run(aanalyze_diff("--- a/ui.py\n+++ b/ui.py\n@@ -1 +1 @@\n+new_feature()"))
+    assert result["impact_level"] == "high"
+    assert any("New test cases" in item for item in result["recommendations"])
+
+
+def test_empty_diff_has_no_impact():
+    assert asyncio.run(aanalyze_diff(""))["impact_level"] == "none"
@@ -0,0 +1,80 @@
+from backend.agents.base import fetch_issue_logs_tool
+from backend.agents.issue_clustering import IssueClusterStore, signature, split_issues
+
+TRACEBACK = """test_checkout.py::test_pay (failed):
+Traceback (most recent call last):
+  File "/tmp/run_{run}/test_checkout.py", line {line}, in test_pay
+    pay(order_id={order})
+  File "/srv/app/payments.py", line 88, in pay
+    raise PaymentError(f"order {order} declined")
+PaymentError: order {order} declined"""
+
+
+def test_indented_plain_log_splits_into_one_issue_per_line():
+    issues = split_issues(fetch_issue_logs_tool())
+    assert len(issues) == 4
+    assert issues[0].startswith("Issue 1: User cannot login")
+
+
+def test_traceback_stays_one_issue():
+    issues = split_issues(TRACEBACK.format(run=1, line=12, order=1001))
+    assert len(issues) == 1
+    assert issues[0].endswith("PaymentError: order 1001 declined")
+
+
+def test_distinct_issues_get_their_own_clusters(tmp_path):
+    store = IssueClusterStore(str(tmp_path / "clusters.sqlite"))
+    clusters = store.cluster(fetch_issue_logs_tool(), "run-1")
+    assert len(clusters) == 4
+    assert all(cluster["new"] and cluster["occurrences"] == 1 for cluster in clusters)
+
+
+def test_near_duplicates_cluster_across_runs_with_current_text(tmp_path):
+    store = IssueClusterStore(str(tmp_path / "clusters.sqlite"))
+    first = TRACEBACK.format(run=1, line=12, order=1001)
+    store.cluster(first, "run-1")
+
+    # Same failure, different line numbers, paths and IDs; twice in this run
+    second = TRACEBACK.format(run=2, line=14, order=2002)
+    third = TRACEBACK.format(run=2, line=14, order=3003)
+    clusters = store.cluster(second + "\n\n" + third, "run-2")
+
+    assert len(clusters) == 1
+    cluster = clusters[0]
+    assert not cluster["new"]
+    assert cluster["occurrences"] == 2
+    assert cluster["total_occurrences"] == 3
+    assert cluster["runs"] == 2
+    assert cluster["representative"] == second
+
+
+def test_quoted_keys_and_selectors_stay_apart(tmp_path):
+    store = IssueClusterStore(str(tmp_path / "clusters.sqlite"))
+    logs = "\n".join([
+        "KeyError: 'user'",
+        "KeyError: 'order'",
+        "Element '#login' not found",
+        "Element '#search' not found",
+    ])
+    clusters = store.cluster(logs, "run-1")
+    assert len(clusters) == 4
+
+
+def test_volatile_tokens_in_quotes_still_cluster(tmp_path):
+    store = IssueClusterStore(str(tmp_path / "clusters.sqlite"))
+    logs = "\n".join([
+        "2024-06-01 10:00:00 Session '3f2b8c1e-1a2b-4c3d-8e9f-0a1b2c3d4e5f' expired after 30s",
+        "2024-06-02 11:30:05 Session '9a8b7c6d-1a2b-4c3d-8e9f-0a1b2c3d4e5f' expired after 45s",
+    ])
+    clusters = store.cluster(logs, "run-1")
+    assert len(clusters) == 1
+    assert clusters[0]["occurrences"] == 2
+
+
+def test_traceback_signature_keeps_the_exception_message():
+    traceback = """Traceback (most recent call last):
+  File "/srv/app/cart.py", line {line}, in load
+    return session[key]
+KeyError: '{key}'"""
+    assert signature(traceback.format(line=10, key="user")) == signature(traceback.format(line=12, key="user"))
+    assert signature(traceback.format(line=10, key="user")) != signature(traceback.format(line=10, key="order"))
@@ -0,0 +1,88 @@
+import io
+import gzip
+
+from backend.execution import junit_ingest
+from backend.execution.junit_ingest import ResultAggregator, aggregate_junit, format_aggregate, ingest_junit
+
+REPORT = b"""<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="login">
+    <testcase classname="tests.test_login" name="test_valid" time="0.5"/>
+    <testcase classname="tests.test_login" name="test_locked[1]" time="2.0">
+      <failure type="AssertionError" message="expected 200, got 423 at 0x7f00aa">trace</failure>
+    </testcase>
+    <testcase classname="tests.test_login" name="test_locked[2]" time="1.5">
+      <failure type="AssertionError" message="expected 200, got 423 at 0x7f00bb">trace</failure>
+    </testcase>
+    <testcase classname="tests.test_login" name="test_sso" time="0.1"><skipped/></testcase>
+  </testsuite>
+  <testsuite name="checkout">
+    <testcase name="test_pay" time="3.0">
+      <error type="TimeoutError" message="gateway did not answer"/>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+def test_counts_suites_and_signatures():
+    aggregate = aggregate_junit(io.BytesIO(REPORT))
+    assert aggregate["total"] == 5
+    assert aggregate["counts"] == {"passed": 1, "failed": 2, "error": 1, "skipped": 1}
+    assert aggregate["pass_rate"] == 0.25
+    assert aggregate["duration"] == 7.1
+
+    # Failures differing only in volatile tokens share one signature
+    signatures = aggregate["failure_signatures"]
+    assert [(group["type"], group["count"]) for group in signatures] == [("AssertionError", 2), ("TimeoutError", 1)]
+    assert signatures[0]["example_test"] == "tests.test_login::test_locked[1]"
+
+    # Test cases without a classname fall back to the enclosing suite
+    assert aggregate["suites"]["checkout"]["error"] == 1
+    assert aggregate["suites"]["tests.test_login"]["tests"] == 4
+    assert [test["id"] for test in aggregate["slowest"][:2]] == ["test_pay", "tests.test_login::test_locked[1]"]
+
+
+def test_gzip_paths_streams_and_directories(tmp_path):
+    with gzip.open(tmp_path / "nightly.xml.gz", "wb") as handle:
+        handle.write(REPORT)
+    (tmp_path / "smoke.xml").write_bytes(REPORT)
+    (tmp_path / "notes.txt").write_text("not a report")
+
+    assert aggregate_junit(str(tmp_path / "nightly.xml.gz"))["total"] == 5
+    assert aggregate_junit(io.BytesIO(gzip.compress(REPORT)))["total"] == 5
+    assert aggregate_junit(str(tmp_path))["total"] == 10
+
+    aggregator = ingest_junit(str(tmp_path / "smoke.xml"))
+    ingest_junit(str(tmp_path / "smoke.xml"), aggregator)
+    assert aggregator.aggregate()["counts"]["failed"] == 4
+
+
+def test_aggregate_stays_bounded(monkeypatch):
+    monkeypatch.setattr(junit_ingest, "MAX_SUITES", 2)
+    monkeypatch.setattr(junit_ingest, "MAX_FAILURE_SIGNATURES", 1)
+    aggregator = ResultAggregator(slowest=3)
+    for i in range(10):
+        aggregator.add(f"suite_{chr(97 + i)}::test", f"suite_{chr(97 + i)}", "failed", float(i), f"{chr(97 + i)}Error: boom", f"{chr(97 + i)}Error")
+
+    aggregate = aggregator.aggregate()
+    assert len(aggregate["suites"]) == 3
+    assert aggregate["suites"]["(other)"]["tests"] == 8
+    assert [group["count"] for group in aggregate["failure_signatures"]] == [9, 1]
+    assert aggregate["failure_signatures"][0]["signature"] == "(other)"
+    assert [test["duration"] for test in aggregate["slowest"]] == [9.0, 8.0, 7.0]
+
+
+def test_add_results_and_format():
+    aggregator = ResultAggregator().add_results([
+        {"id": "tests/test_a.py::test_ok", "outcome": "passed", "duration": 0.2},
+        {"id": "tests/test_a.py::test_bad", "outcome": "failed", "duration": None, "message": "AssertionError: 1 != 2"},
+    ])
+    aggregate = aggregator.aggregate()
+    assert aggregate["suites"]["tests/test_a.py"]["failed"] == 1
+
+    text = format_aggregate(aggregate)
+    assert text.startswith("Total: 2 tests in 0.2s; 1 passed, 1 failed, 0 errors, 0 skipped (pass rate 50.0%).")
+    assert "- 1x failed: AssertionError: 1 != 2 (e.g. tests/test_a.py::test_bad)" in text
+    assert "- tests/test_a.py: 1/2 failing" in text
+    assert format_aggregate(ResultAggregator().aggregate()) == "No test results."
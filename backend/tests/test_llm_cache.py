@@ -0,0 +1,78 @@
+import asyncio
+
+from backend.agents.llm_cache import LLMResponseCache, cache_bypass
+
+
+def test_async_tiers_round_trip(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = LLMResponseCache(path)
+
+    async def run():
+        assert await cache.aget_many(["a", "b"]) == [None, None]
+        await cache.aset_many({"a": "reply a", "b": "reply b"})
+        assert await cache.aget("a") == "reply a"
+        with cache_bypass():
+            assert await cache.aget("a") is None
+
+    asyncio.run(run())
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["writes"] == 2
+
+    # A fresh instance has an empty memory tier and reads from SQLite
+    reopened = LLMResponseCache(path)
+    assert asyncio.run(reopened.aget_many(["b", "c"])) == ["reply b", None]
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.get("b") == "reply b"
+    assert reopened.stats()["memory_hits"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), ttl_seconds=-1)
+    cache.set("a", "reply a")
+    assert cache.get("a") is None
+
+
+def test_memory_hits_keep_entries_from_disk_eviction(tmp_path, monkeypatch):
+    clock = iter(range(1, 100))
+    monkeypatch.setattr("backend.agents.llm_cache.time.time", lambda: float(next(clock)))
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = LLMResponseCache(path, max_entries=2, evict_interval=1)
+    cache.set("a", "reply a")
+    cache.set("b", "reply b")
+    assert cache.get("a") == "reply a"  # Served from memory
+    cache.set("c", "reply c")  # Overflows the disk tier: "b" is the least recently used
+
+    reopened = LLMResponseCache(path)
+    assert reopened.get("a") == "reply a"
+    assert reopened.get("b") is None
+
+
+def test_eviction_runs_every_interval_writes(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), max_entries=1, evict_interval=3)
+    cache.set_many({"a": "1", "b": "2"})
+    assert cache.stats()["evictions"] == 0
+    cache.set("c", "3")
+    assert cache.stats()["evictions"] == 2
+
+
+def test_cache_key_and_runnable_follow_the_shared_model():
+    from backend.agents.base import AIAgent, set_llm
+    from backend.agents.providers import FakeChatModel
+
+    agent = AIAgent("Agent", "", "Answer briefly.")
+    configured = agent._cache_key("hello")
+    first, second = FakeChatModel(model_name="first"), FakeChatModel(model_name="second")
+    try:
+        set_llm(first)
+        with cache_bypass():
+            agent.invoke("hello")
+        first_key = agent._cache_key("hello")
+        # Agents built before a swap call, and cache under, the new model
+        set_llm(second)
+        with cache_bypass():
+            agent.invoke("hello")
+        assert len({configured, first_key, agent._cache_key("hello")}) == 3
+        assert (first.stats["calls"], second.stats["calls"]) == (1, 1)
+    finally:
+        set_llm(None)
+    assert agent._cache_key("hello") == configured
@@ -0,0 +1,38 @@
+import asyncio
+
+from backend.execution.pytest_runner import (
+    arun_pytest, extract_code_blocks, extract_test_modules, format_execution_log, map_code_blocks
+)
+
+SCRIPTS = '''```python
+def test_tc_001_login():
+    assert 1 + 1 == 2
+```
+
+```python
+def test_tc_002_search(:
+    """TC-002: search returns results"""
+```
+
+```javascript
+test("TC-003", () => {});
+```
+'''
+
+
+def test_unparsable_python_blocks_are_not_modules():
+    assert len(extract_test_modules(SCRIPTS)) == 1
+
+
+def test_unparsable_script_is_reported_by_test_case():
+    report = asyncio.run(arun_pytest(SCRIPTS, workers=1))
+    outcomes = {result["id"]: result["outcome"] for result in report["results"]}
+    assert outcomes == {"test_generated_0.py::test_tc_001_login": "passed", "TC-002": "error"}
+    assert "ERROR: TC-002: Generated script is not valid Python" in format_execution_log(report)
+
+
+def test_code_block_helpers_keep_fences_and_prose():
+    text = "Intro\n```python\nx = 1\n```\ntext\n```\ny = 2\n```\n"
+    assert extract_code_blocks(text) == ["x = 1\n", "y = 2\n"]
+    assert map_code_blocks(text, str.upper) == "Intro\n```python\nX = 1\n```\ntext\n```\nY = 2\n```\n"
+    assert extract_code_blocks("x = 1") == []
@@ -0,0 +1,51 @@
+from backend.agents.release_rules import CAUTION, NOT_READY, READY, ReleaseRuleEngine, collect_metrics, format_verdict
+
+PASSING_REPORT = {"counts": {"passed": 100, "failed": 0, "error": 0, "skipped": 0}}
+HISTORY = {"runs": 2, "regressed": [], "new_failures": [], "flaky": []}
+
+
+def test_clean_run_is_ready():
+    result = ReleaseRuleEngine().evaluate(collect_metrics(PASSING_REPORT, None, HISTORY, [], 0.9))
+    assert result["verdict"] == READY
+    assert not result["triggered"]
+
+
+def test_run_without_test_evidence_is_not_ready():
+    result = ReleaseRuleEngine().evaluate(collect_metrics(None, None, None, []))
+    assert result["verdict"] == CAUTION
+    assert {rule["metric"] for rule in result["triggered"]} == {"tests_run", "pass_rate"}
+    assert "tests_run has no data" in format_verdict(result)
+
+
+def test_missing_evidence_holds_with_custom_rules():
+    engine = ReleaseRuleEngine([{"metric": "coverage", "operator": "<", "threshold": 0.5, "verdict": NOT_READY}])
+    assert engine.evaluate(collect_metrics(None, None, None, [], 0.9))["verdict"] == CAUTION
+
+
+def test_most_severe_triggered_rule_wins():
+    report = {"counts": {"passed": 90, "failed": 10, "error": 0, "skipped": 0}}
+    result = ReleaseRuleEngine().evaluate(collect_metrics(report, None, HISTORY, [{"severity": "Critical"}]))
+    assert result["verdict"] == NOT_READY
+    assert {rule["metric"] for rule in result["triggered"]} == {"critical_bugs", "pass_rate"}
+
+
+def test_advisor_only_justifies_the_engine_verdict(monkeypatch):
+    import asyncio
+
+    from backend.agents.release_readiness_advisor import ReleaseReadinessAdvisorAgent
+
+    agent = ReleaseReadinessAdvisorAgent()
+    prompts = []
+
+    async def ainvoke(text):
+        return agent.invoke(text)
+
+    monkeypatch.setattr(agent, "invoke", lambda text: prompts.append(text) or "Because the suite is green.")
+    monkeypatch.setattr(agent, "ainvoke", ainvoke)
+    report = format_verdict(ReleaseRuleEngine().evaluate(collect_metrics(PASSING_REPORT, None, HISTORY, [], 0.9)))
+
+    assert agent.justify_verdict(report, "100 passed", "No bugs") == "Because the suite is green."
+    assert asyncio.run(agent.ajustify_verdict(report, "100 passed", "No bugs")) == "Because the suite is green."
+    assert prompts[0] == prompts[1]
+    assert report in prompts[0]
+    assert "never decide or change it" in agent.system_prompt
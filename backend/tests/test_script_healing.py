@@ -0,0 +1,93 @@
+from backend.agents.script_healing import apply_renames, diff_api, diff_dom, diff_states, parse_state_text, unresolved_fragments
+
+OLD_DOM = """<form>
+  <input type="email" id="email" name="email">
+  <button type="submit" id="btn-login">Log in</button>
+  <a href="/help" data-testid="help-link">Help</a>
+  <span id="banner">Sale</span>
+</form>"""
+NEW_DOM = """<form>
+  <input type="email" id="email" name="email">
+  <button type="submit" id="main-login-btn">Log in</button>
+  <a href="/help" data-testid="help-link">Help</a>
+</form>"""
+
+SCRIPT = '''import requests
+
+# Clicks btn-login
+def test_login(page):
+    page.click("#btn-login")
+    page.fill("#email", "btn-login is not a locator here")
+    assert requests.get(f"{BASE}/users/{USER_ID}?full=1").ok
+
+
+def test_banner(page):
+    assert page.locator("#banner").is_visible()
+
+
+def test_help(page):
+    page.click("[data-testid=help-link]")
+'''
+
+
+def test_dom_diff_matches_renamed_elements():
+    diff = diff_dom(OLD_DOM, NEW_DOM)
+    assert diff.renames == {"btn-login": "main-login-btn"}
+    assert list(diff.unresolved) == ["banner"]
+
+
+def test_api_diff_matches_by_operation_id_and_shape():
+    old = {"paths": {"/users/{id}": {"get": {"operationId": "getUser"}}, "/orders": {"post": {}}, "/legacy": {"get": {}}}}
+    new = {"paths": {"/api/v1/users/{id}": {"get": {"operationId": "getUser"}}, "/v2/orders": {"post": {}}}}
+    diff = diff_api(old, new)
+    assert diff.renames == {"/users": "/api/v1/users", "/orders": "/v2/orders"}
+    assert list(diff.unresolved) == ["/legacy"]
+
+
+def test_conflicting_renames_are_unresolved():
+    diff = diff_states(
+        {"dom": '<a id="/users">Users</a>', "api": {"paths": {"/users": {"get": {"operationId": "listUsers"}}}}},
+        {"dom": '<a id="/people">Users</a>', "api": {"paths": {"/members": {"get": {"operationId": "listUsers"}}}}},
+    )
+    assert diff.renames == {}
+    assert "/users" in diff.unresolved
+
+
+def test_renames_stated_in_prose():
+    text = "Login button changed from 'btn-login' to 'main-login-btn'; '/users' is now '/api/users'."
+    assert parse_state_text(text).renames == {"btn-login": "main-login-btn", "/users": "/api/users"}
+
+
+def test_renames_touch_only_locator_literals():
+    healed, count = apply_renames(SCRIPT, {"btn-login": "main-login-btn", "/users": "/api/v1/users"})
+    assert count == 2
+    assert 'page.click("#main-login-btn")' in healed
+    assert "# Clicks btn-login" in healed  # Comments are not rewritten
+    assert '"btn-login is not a locator here"' in healed  # Nor plain text values
+    assert 'f"{BASE}/api/v1/users/{USER_ID}?full=1"' in healed
+
+
+def test_only_unresolved_and_failing_functions_go_to_the_agent():
+    fragments = unresolved_fragments(SCRIPT, ["banner"], failing_tests=["test_help"])
+    assert [name for name, _ in fragments] == ["test_banner", "test_help"]
+    assert fragments[0][1].startswith("def test_banner(page):")
+
+
+def test_agent_heals_fenced_scripts_in_place(monkeypatch):
+    from backend.agents.self_healing_test_script import SelfHealingTestScriptAgent
+
+    agent = SelfHealingTestScriptAgent()
+    prompts = []
+    reply = '```python\ndef test_banner(page):\n    assert page.locator("#promo").is_visible()\n```'
+    monkeypatch.setattr(agent, "invoke", lambda text: prompts.append(text) or reply)
+    script = f"Login tests:\n\n```python\n{SCRIPT}```\n\nNotes stay as they are.\n"
+
+    result = agent.heal(script, "", diff_dom(OLD_DOM, NEW_DOM))
+    assert result["replacements"] == 1
+    assert (result["fragments"], result["healed_fragments"]) == (1, 1)
+    assert "def test_banner" in prompts[0]
+    healed = result["script"]
+    assert healed.startswith("Login tests:\n\n```python\nimport requests\n")
+    assert healed.endswith("```\n\nNotes stay as they are.\n")
+    assert 'page.click("#main-login-btn")' in healed
+    assert 'page.locator("#promo")' in healed
@@ -0,0 +1,67 @@
+from backend.agents.bug_report_generator import parse_bug_reports, summarize_bug_reports
+from backend.agents.test_case_generator import format_test_cases, parse_test_cases
+from backend.agents.test_data_generator import parse_test_data
+from backend.agents.test_script_automation import parse_scripts
+
+TEST_CASES = """Here are the test cases:
+
+| Test ID | Description | Preconditions | Steps | Expected Result | Priority |
+|---|---|---|---|---|---|
+| TC-001 | Login with valid credentials | User exists | Enter email and password | Dashboard is shown | High |
+| TC-002 | Login with a wrong password | User exists | Enter a wrong password |
+"""
+
+BUG_REPORTS = """## Bug Report 1: Login button missing
+**Description:** The login button is not rendered.
+It only happens on Safari.
+**Steps to Reproduce:**
+1. Open /login
+**Severity:** Critical
+**Priority:** High
+
+---
+
+- **Title:** Search is slow
+- **Severity:** Minor
+
+### Notes
+Nothing to report here.
+"""
+
+
+def test_test_case_table_rows_become_records():
+    cases = parse_test_cases(TEST_CASES)
+    assert [case.id for case in cases] == ["TC-001", "TC-002"]
+    assert cases[0].expected_result == "Dashboard is shown"
+    assert cases[1].priority == ""  # Short rows get empty fields
+    table = format_test_cases([case.model_dump() for case in cases], ["id", "description"])
+    assert table.splitlines() == ["| Test ID | Description |", "|---|---|", "| TC-001 | Login with valid credentials |", "| TC-002 | Login with a wrong password |"]
+
+
+def test_test_data_from_fenced_or_bare_json():
+    fenced = parse_test_data('Sure:\n```json\n{"email": ["a@b.co", ""], "age": 18}\n```')
+    assert fenced.fields == {"email": ["a@b.co", ""], "age": [18]}
+    assert parse_test_data('Values: {"name": ["Ann"]} as requested').fields == {"name": ["Ann"]}
+    assert parse_test_data("No JSON here").fields == {}
+
+
+def test_bug_reports_from_headings_and_field_lines():
+    reports = parse_bug_reports(BUG_REPORTS)
+    assert [report.title for report in reports] == ["Login button missing", "Search is slow"]
+    assert reports[0].description == "The login button is not rendered.\nIt only happens on Safari."
+    assert reports[0].steps_to_reproduce == "1. Open /login"
+    assert (reports[0].severity, reports[0].priority) == ("Critical", "High")
+    assert summarize_bug_reports([report.model_dump() for report in reports]).splitlines() == [
+        "- [Critical / High] Login button missing", "- [Minor / Unknown] Search is slow",
+    ]
+
+
+def test_scripts_are_named_like_runner_modules():
+    scripts = parse_scripts(
+        "```python\ndef test_tc_001_login():\n    pass\n```\n"
+        "```python\ndef broken(:\n```\n"
+        "```python\ndef test_search():\n    '''Covers TC-2 and TC-003.'''\n```\n"
+    )
+    assert [(script.name, script.test_case_ids) for script in scripts] == [
+        ("test_generated_0.py", ["TC-001"]), ("test_generated_1.py", ["TC-002", "TC-003"]),
+    ]
@@ -0,0 +1,64 @@
+from backend.agents.test_case_generator import TABLE_HEADER, merge_test_cases, parse_test_cases, shard_requirements
+
+NUMBERED_REQUIREMENTS = """1. Login
+The user signs in with an email and a password.
+Steps:
+1. Open the login page
+2. Enter the credentials
+3. Submit the form
+
+2. Search
+The user searches the catalogue.
+Steps:
+
+1. Type a query
+2. Press enter
+
+3. Checkout
+The user pays for the cart with a saved card or with a new card."""
+
+
+def table(*rows):
+    return TABLE_HEADER + "\n".join("| " + " | ".join(row) + " |" for row in rows) + "\n"
+
+
+def test_small_documents_stay_one_shard():
+    assert shard_requirements("Login must work.", "As a user I log in.") == [("Login must work.", "As a user I log in.")]
+
+
+def test_numbered_steps_stay_with_their_requirement():
+    shards = shard_requirements(NUMBERED_REQUIREMENTS, "", max_chars=140)
+    texts = [text for text, _ in shards]
+    assert len(texts) == 3
+    assert texts[0].startswith("1. Login") and "3. Submit the form" in texts[0]
+    assert texts[1].startswith("2. Search") and "2. Press enter" in texts[1]
+    assert texts[2].startswith("3. Checkout")
+
+
+def test_numbered_lines_are_steps_under_markdown_headings():
+    document = "## Login\nSteps:\n1. Open the page\n\n2. Sign in\n\n## Search\nSteps:\n1. Type a query"
+    texts = [text for text, _ in shard_requirements(document, "", max_chars=50)]
+    assert texts == ["## Login\nSteps:\n1. Open the page\n\n2. Sign in", "## Search\nSteps:\n1. Type a query"]
+
+
+def test_stories_are_sharded_separately():
+    stories = "As a user I log in.\nAs an admin I ban users.\n" * 3
+    shards = shard_requirements("x" * 40, stories, max_chars=60)
+    assert shards[0] == ("x" * 40, "")
+    assert all(text == "" and story for text, story in shards[1:])
+
+
+def test_merge_renumbers_and_drops_repeated_cases():
+    existing = table(["TC-001", "Login works", "", "", "", "High"], ["TC-002", "Logout works", "", "", "", "Low"])
+    new = table(["TC-001", "login  WORKS", "", "", "", "High"], ["TC-001", "Search finds items", "", "", "", "Medium"])
+    merged, added = merge_test_cases(existing, new)
+    assert [case.id for case in parse_test_cases(merged)] == ["TC-001", "TC-002", "TC-003"]
+    assert [(case.id, case.description) for case in parse_test_cases(added)] == [("TC-003", "Search finds items")]
+    assert merge_test_cases(merged, new) == (merged, "")
+
+
+def test_merging_shards_numbers_ids_across_the_document():
+    merged = ""
+    for shard in (table(["TC-001", "Login works", "", "", "", "High"]), table(["TC-001", "Search works", "", "", "", "High"])):
+        merged, _ = merge_test_cases(merged, shard)
+    assert [(case.id, case.description) for case in parse_test_cases(merged)] == [("TC-001", "Login works"), ("TC-002", "Search works")]
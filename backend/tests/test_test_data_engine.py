@@ -0,0 +1,65 @@
+import itertools
+import re
+
+import pytest
+from pydantic import ValidationError
+
+from backend.agents.test_data_engine import boundary_values, generate_rows, pairwise, random_rows, regex_examples
+from backend.models import FieldConstraint
+
+
+def test_pairwise_covers_every_pair_in_fewer_rows_than_the_product():
+    parameters = {"browser": ["chrome", "firefox", "safari"], "os": ["linux", "mac", "windows"], "locale": ["en", "de"], "plan": ["free", "pro"]}
+    rows = list(pairwise(parameters))
+    for (a, left), (b, right) in itertools.combinations(parameters.items(), 2):
+        assert {(x, y) for x in left for y in right} == {(row[a], row[b]) for row in rows}
+    assert len(rows) < 3 * 3 * 2 * 2
+
+
+def test_integer_boundaries():
+    values = boundary_values(FieldConstraint(name="age", type="integer", minimum=18, maximum=65))
+    assert values["valid"] == [18, 19, 41, 64, 65]
+    assert values["invalid"][:2] == [17, 66]
+    assert None in values["invalid"]
+
+
+def test_fractional_bounds_of_integer_fields_round_inwards():
+    values = boundary_values(FieldConstraint(name="quantity", type="integer", minimum=0.5))
+    assert min(values["valid"]) == 1
+    assert 0 in values["invalid"]
+
+    constraint = FieldConstraint(name="quantity", type="integer", minimum=0.5, maximum=9.5)
+    assert all(1 <= row["data"]["quantity"] <= 9 for row in random_rows([constraint], 50))
+
+
+def test_string_length_boundaries():
+    values = boundary_values(FieldConstraint(name="username", min_length=3, max_length=8, required=False))
+    assert [len(value) for value in values["valid"]] == [3, 4, 5, 7, 8]
+    assert [len(value) for value in values["invalid"] if isinstance(value, str)] == [2, 9]
+    assert None not in values["invalid"]
+
+
+def test_regex_examples_fully_match():
+    pattern = r"[A-Z]{2}-\d{3,5}(-[a-z]+)?"
+    examples = regex_examples(pattern, count=4)
+    assert len(examples) == 4
+    assert all(re.fullmatch(pattern, example) for example in examples)
+    invalid = boundary_values(FieldConstraint(name="code", pattern=pattern))["invalid"]
+    assert not any(isinstance(value, str) and re.fullmatch(pattern, value) for value in invalid)
+
+
+def test_invalid_rows_vary_one_field():
+    constraints = [FieldConstraint(name="age", type="integer", minimum=18, maximum=65), FieldConstraint(name="active", type="boolean")]
+    invalid = [row for row in generate_rows(constraints) if row["kind"] == "invalid"]
+    assert {row["field"] for row in invalid} == {"age", "active"}
+    assert all(18 <= row["data"]["age"] <= 65 for row in invalid if row["field"] == "active")
+
+
+@pytest.mark.parametrize("fields", [
+    {"pattern": "("},
+    {"min_length": 5, "max_length": 2},
+    {"minimum": 10, "maximum": 1},
+])
+def test_inconsistent_constraints_are_rejected(fields):
+    with pytest.raises(ValidationError):
+        FieldConstraint(name="field", **fields)
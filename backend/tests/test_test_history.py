@@ -0,0 +1,34 @@
+from backend.execution import test_history as history
+from backend.execution.test_history import history_test_id
+
+
+def result(test_id, outcome):
+    return {"id": test_id, "outcome": outcome, "duration": 0.1}
+
+
+def test_generated_module_number_is_not_part_of_the_identity():
+    assert history_test_id("test_generated_3.py::TestLogin::test_tc_001[chrome]") == "TestLogin::test_tc_001[chrome]"
+    assert history_test_id("tests/test_api.py::test_users") == "tests/test_api.py::test_users"
+
+
+def test_reordered_modules_record_no_flips(tmp_path):
+    store = history.TestHistoryStore(str(tmp_path / "history.sqlite"))
+    store.record_run("run-1", "demo", [
+        result("test_generated_0.py::test_tc_001_login", "passed"),
+        result("test_generated_1.py::test_tc_002_search", "failed"),
+    ])
+    # Test cases regenerated in a different order: the modules swap numbers
+    store.record_run("run-2", "demo", [
+        result("test_generated_0.py::test_tc_002_search", "failed"),
+        result("test_generated_1.py::test_tc_001_login", "passed"),
+    ])
+
+    assert store.regressions("run-2") == {"regressed": [], "fixed": [], "new_failures": []}
+    assert store.flaky_tests("demo") == []
+
+
+def test_flip_is_tracked_across_module_numbers(tmp_path):
+    store = history.TestHistoryStore(str(tmp_path / "history.sqlite"))
+    store.record_run("run-1", "demo", [result("test_generated_0.py::test_tc_001_login", "passed")])
+    store.record_run("run-2", "demo", [result("test_generated_4.py::test_tc_001_login", "failed")])
+    assert store.regressions("run-2")["regressed"] == ["test_tc_001_login"]
@@ -17,6 +17,12 @@ function App() {
   const [stlcResult, setStlcResult] = useState(null);
 
   const [error, setError] = useState(null);
+
+  const [liveOutput, setLiveOutput] = useState({});
+
+  const [lastRunId, setLastRunId] = useState(null);
+
+  const [refinePreviousRun, setRefinePreviousRun] = useState(false);
  
   const backendUrl = 'http://localhost:8000';
  
@@ -27,6 +33,8 @@ function App() {
     setStlcResult(null);
 
     setError(null);
+
+    setLiveOutput({});
  
     const payload = {
 
@@ -38,11 +46,15 @@ function App() {
 
       previous_test_results: previousTestResults || null,
 
+      // Reuse outputs of the previous run for every agent whose inputs did not change.
+      parent_run_id: refinePreviousRun ? lastRunId : null,
+
     };
  
     try {
 
-      const response = await fetch(`${backendUrl}/chat`, {
+      // Stream the run over Server-Sent Events so each agent's output renders as soon as it is ready.
+      const response = await fetch(`${backendUrl}/chat/stream`, {
 
         method: 'POST',
 
@@ -59,11 +71,31 @@ function App() {
         throw new Error(errorData.detail || 'STLC process failed');
 
       }
- 
-      const data = await response.json();
 
-      setStlcResult(data?.response || {});
+      setStlcResult({});
+
+      const reader = response.body.getReader();
+
+      const decoder = new TextDecoder();
+
+      let buffer = '';
+
+      while (true) {
+
+        const { done, value } = await reader.read();
+
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
 
+        const frames = buffer.split('\n\n');
+
+        buffer = frames.pop();
+
+        frames.forEach(handleStreamFrame);
+
+      }
+ 
     } catch (err) {
 
       setError(err.message);
@@ -76,6 +108,42 @@ function App() {
 
   };
  
+  const handleStreamFrame = (frame) => {
+
+    const dataLine = frame.split('\n').find((line) => line.startsWith('data: '));
+
+    if (!dataLine) return;
+
+    const event = JSON.parse(dataLine.slice('data: '.length));
+ 
+    if (event.event === 'run') {
+
+      setLastRunId(event.run_id);
+
+    } else if (event.event === 'token') {
+
+      setLiveOutput((prev) => ({ ...prev, [event.node]: (prev[event.node] || '') + event.content }));
+
+    } else if (event.event === 'node') {
+
+      setStlcResult((prev) => ({ ...prev, [event.node]: event.update }));
+
+      setLiveOutput((prev) => {
+
+        const { [event.node]: _finished, ...rest } = prev;
+
+        return rest;
+
+      });
+
+    } else if (event.event === 'error') {
+
+      setError(event.detail || 'STLC process failed');
+
+    }
+
+  };
+ 
   const renderTextarea = (label, value) => (
 
     value ? (
@@ -112,6 +180,17 @@ function App() {
 <label htmlFor="previousTestResults">Previous Test Results (Optional):</label>
 <textarea id="previousTestResults" rows="3" value={previousTestResults} onChange={(e) => setPreviousTestResults(e.target.value)}></textarea>
 </div>
+
+        {lastRunId && (
+<div className="input-group">
+<label htmlFor="refinePreviousRun">
+<input id="refinePreviousRun" type="checkbox" checked={refinePreviousRun} onChange={(e) => setRefinePreviousRun(e.target.checked)} />
+
+            {' '}Refine previous run ({lastRunId.slice(0, 8)}) and reuse unchanged results
+</label>
+</div>
+
+        )}
 <button onClick={handleStartStlc} disabled={loading || !requirements}>
 
             {loading ? 'Running STLC...' : 'Start STLC Process'}
@@ -130,6 +209,19 @@ function App() {
 <div className="output-section">
 <h2>STLC Results</h2>
  
+            {loading && Object.keys(stlcResult).length > 0 && (
+<p>Completed: {Object.keys(stlcResult).join(', ')}</p>
+
+            )}
+ 
+            {Object.entries(liveOutput).map(([node, text]) => (
+<React.Fragment key={node}>
+
+                {renderTextarea(`${node} (in progress)`, text)}
+</React.Fragment>
+
+            ))}
+ 
             {renderTextarea("Test Cases", stlcResult.test_case_generation?.test_cases)}
 
             {renderTextarea("Test Data", stlcResult.test_data_generation?.test_data)}